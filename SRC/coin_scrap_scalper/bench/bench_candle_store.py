@@ -0,0 +1,75 @@
+import argparse
+import tempfile
+import time
+
+from utils.candle_store import CandleStore, INTERVAL_MS
+
+STEP = INTERVAL_MS["1h"]
+
+
+class _FakeMarket:
+    """/api/v3/klines 흉내 (startTime은 앞에서, endTime만 주면 뒤에서 limit개). 호출 기록을 남긴다."""
+
+    def __init__(self, listed_hours: int, latency_ms: float):
+        self.now = int(time.time() * 1000) // STEP * STEP
+        self.first = self.now - listed_hours * STEP
+        self.latency = latency_ms / 1000.0
+        self.calls = []
+
+    def candle(self, t: int) -> dict:
+        return {"open_time": t, "open": 1.0, "high": 2.0, "low": 0.5, "close": float(t % 997), "volume": 1.0}
+
+    def fetch(self, pair, interval, limit, start_time=None, end_time=None):
+        self.calls.append((limit, start_time, end_time))
+        time.sleep(self.latency)
+        lo = max(self.first, start_time if start_time is not None else self.first)
+        hi = min(self.now, end_time if end_time is not None else self.now)
+        times = list(range(lo, hi + 1, STEP))
+        times = times[:limit] if start_time is not None else times[-limit:]
+        return [self.candle(t) for t in times]
+
+
+def _check_grows(listed_hours: int, latency_ms: float) -> None:
+    """작은 요청(12)으로 만들어진 시리즈에 큰 요청(1000)이 오면 과거를 채워 1000개 (또는 상장 이후 전부)."""
+    market = _FakeMarket(listed_hours, latency_ms)
+    store = CandleStore(tempfile.mkdtemp(), fetch=market.fetch)
+    assert len(store.get_candles("XUSDT", "1h", 12)) == 12
+    start = time.perf_counter()
+    rows = store.get_candles("XUSDT", "1h", 1000)
+    elapsed = time.perf_counter() - start
+    expected = min(1000, listed_hours + 1)
+    assert len(rows) == expected, f"listed {listed_hours}h: got {len(rows)} rows, want {expected}"
+    assert [r["open_time"] for r in rows] == list(range(market.now - (expected - 1) * STEP, market.now + 1, STEP))
+    assert rows[-1] == market.candle(market.now)
+
+    # 상장 이후 전부 받았으면 다시 조회하지 않는다
+    market.calls.clear()
+    assert store.get_candles("XUSDT", "1h", 1000) == rows
+    assert not market.calls, market.calls
+    print(f"listed {listed_hours:>5}h: 12 → 1000 request returns {len(rows)} rows "
+          f"(backfill {elapsed * 1000:.1f} ms, stats {store.stats})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="캔들 저장소: 작은 요청 후 큰 요청 시 과거 보충 확인 + 캐시 조회 시간")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="가짜 klines 응답 지연")
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    _check_grows(5000, args.latency_ms)
+    _check_grows(300, args.latency_ms)
+
+    market = _FakeMarket(5000, args.latency_ms)
+    store = CandleStore(tempfile.mkdtemp(), fetch=market.fetch)
+    store.get_candles("XUSDT", "1h", 1000)
+    market.calls.clear()
+    start = time.perf_counter()
+    for _ in range(args.reads):
+        store.get_candles("XUSDT", "1h", 12)
+    elapsed = time.perf_counter() - start
+    assert not market.calls
+    print(f"cached get_candles(12): {elapsed / args.reads * 1e6:.1f} us/call, no REST calls")
+
+
+if __name__ == "__main__":
+    main()
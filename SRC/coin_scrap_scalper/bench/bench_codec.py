@@ -0,0 +1,62 @@
+import argparse
+import json
+import random
+import time
+
+from utils import codec
+
+
+def _ticker(i: int) -> dict:
+    price = round(random.uniform(0.0001, 50000), 8)
+    return {
+        "e": "24hrMiniTicker",
+        "E": 1700000000000 + i,
+        "s": f"C{i:04d}USDT",
+        "c": f"{price:.8f}",
+        "o": f"{price * 0.98:.8f}",
+        "h": f"{price * 1.03:.8f}",
+        "l": f"{price * 0.95:.8f}",
+        "v": f"{random.uniform(1, 1e7):.2f}",
+        "q": f"{random.uniform(1, 1e8):.2f}",
+    }
+
+
+def _run(label: str, fn, messages: list, tickers_per_msg: int, seconds: float) -> None:
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for m in messages:
+            fn(m)
+        count += len(messages)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {count / elapsed:>12,.0f} msg/s  {count * tickers_per_msg / elapsed:>14,.0f} ticker/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="miniTicker 디코딩 처리량 (단일 코어)")
+    parser.add_argument("--symbols", type=int, default=2000, help="!miniTicker@arr 1건당 심볼 수")
+    parser.add_argument("--seconds", type=float, default=2.0, help="케이스당 측정 시간")
+    args = parser.parse_args()
+
+    random.seed(7)
+    arr_msg = json.dumps([_ticker(i) for i in range(args.symbols)], separators=(",", ":"))
+    single_msgs = [
+        json.dumps({"stream": f"c{i:04d}usdt@miniTicker", "data": _ticker(i)}, separators=(",", ":"))
+        for i in range(200)
+    ]
+    assert len(codec.decode_mini_ticker_array(arr_msg)) == args.symbols
+
+    print(f"codec backend: {codec.BACKEND}")
+    print(f"-- !miniTicker@arr ({args.symbols} symbols, {len(arr_msg) / 1024:.0f} KB/msg)")
+    _run("json.loads (stdlib)", json.loads, [arr_msg], args.symbols, args.seconds)
+    _run(f"codec.loads ({codec.BACKEND})", codec.loads, [arr_msg], args.symbols, args.seconds)
+    _run("codec.decode_mini_ticker_array", codec.decode_mini_ticker_array, [arr_msg], args.symbols, args.seconds)
+    print("-- <symbol>@miniTicker (combined stream, 1 ticker/msg)")
+    _run("json.loads (stdlib)", json.loads, single_msgs, 1, args.seconds)
+    _run(f"codec.loads ({codec.BACKEND})", codec.loads, single_msgs, 1, args.seconds)
+    _run("codec.decode_mini_ticker", codec.decode_mini_ticker, single_msgs, 1, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import random
+import tempfile
+import time
+from array import array
+
+from strategy.drawdown_screener import DrawdownScreener, deep_drawdown_without_rebound
+from utils.candle_store import COLUMNS, CandleStore, CandleView
+
+DAY_MS = 86_400_000
+
+
+def _series(rnd: random.Random, days: int, start_ms: int) -> list:
+    price = rnd.uniform(0.5, 50.0)
+    # 20%는 바닥 횡보 + 과거 꼬리 고점 (판정 True 쪽), 나머지는 추세/변동성 섞인 경로
+    flat = rnd.random() < 0.2
+    drift = 0.0 if flat else rnd.choice((-0.02, -0.012, 0.0, 0.004))
+    vol = 0.004 if flat else 0.03
+    out = []
+    for i in range(days):
+        o = price
+        price = max(1e-6, price * (1 + drift + rnd.gauss(0, vol)))
+        out.append({
+            "open_time": start_ms + i * DAY_MS,
+            "open": o,
+            "high": max(o, price) * (1 + abs(rnd.gauss(0, 0.01))),
+            "low": min(o, price) * (1 - abs(rnd.gauss(0, 0.01))),
+            "close": price,
+            "volume": 1.0,
+        })
+    if flat:
+        out[rnd.randrange(len(out) // 2)]["high"] = max(c["high"] for c in out) * rnd.uniform(4, 8)
+    return out
+
+
+def _next_day(rnd: random.Random, candles: list) -> dict:
+    last = candles[-1]
+    price = max(1e-6, last["close"] * (1 + rnd.gauss(0, 0.004)))
+    return {
+        "open_time": last["open_time"] + DAY_MS,
+        "open": last["close"],
+        "high": max(last["close"], price) * 1.005,
+        "low": min(last["close"], price) * 0.995,
+        "close": price,
+        "volume": 1.0,
+    }
+
+
+def _window(candles: list) -> tuple:
+    """CandleStore.window()와 같은 모양: (마지막을 뺀 마감 캔들 컬럼 뷰, 진행 중 캔들)."""
+    closed = candles[:-1]
+    return CandleView({name: memoryview(array(code, [c[name] for c in closed])) for name, code in COLUMNS}), candles[-1]
+
+
+def _store_with(windows: dict) -> CandleStore:
+    """windows의 캔들을 돌려주는 가짜 klines로 채운 임시 저장소 (마지막 캔들 = 오늘 진행 중 일봉)."""
+    today = int(time.time() * 1000) // DAY_MS * DAY_MS
+    for candles in windows.values():
+        shift = today - candles[-1]["open_time"]
+        for c in candles:
+            c["open_time"] += shift
+
+    def fetch(pair, interval, limit, start_time=None, end_time=None):
+        rows = [c for c in windows.get(pair, [])
+                if (start_time is None or c["open_time"] >= start_time) and (end_time is None or c["open_time"] <= end_time)]
+        return [dict(c) for c in (rows[:limit] if start_time is not None else rows[-limit:])]
+
+    return CandleStore(tempfile.mkdtemp(), fetch=fetch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="장기 폭락 + 반등 없음 판정: 후보별 파이썬 vs 2차원 배치")
+    parser.add_argument("--symbols", type=int, default=400)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--steps", type=int, default=30, help="증분 갱신 반복 수 (새 일봉 1개씩)")
+    args = parser.parse_args()
+
+    rnd = random.Random(11)
+    windows = {f"C{i:04d}USDT": _series(rnd, args.days + rnd.randint(-5, 0), 1_600_000_000_000)
+               for i in range(args.symbols)}
+    store = _store_with(windows)
+    screener = DrawdownScreener(days=args.days)
+
+    start = time.perf_counter()
+    expected = {p: deep_drawdown_without_rebound(c) for p, c in windows.items()}
+    scalar_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = screener.screen(windows)
+    batch_sec = time.perf_counter() - start
+    assert got == expected, "batch result differs from per-candidate result"
+    deep_first = sum(got.values())
+
+    # 저장소 컬럼에서 바로 적재 (stage1 경로). 저장소 조회 결과는 get_candles()와 같은 구간
+    views = {p: store.window(p, "1d", args.days) for p in windows}
+    assert all(store.get_candles(p, "1d", args.days) == windows[p] for p in windows)
+    start = time.perf_counter()
+    got = DrawdownScreener(days=args.days).screen_windows(views)
+    store_sec = time.perf_counter() - start
+    assert got == expected, "store-column batch result differs from per-candidate result"
+    column_screener = DrawdownScreener(days=args.days)
+    column_screener.screen_windows({p: _window(c) for p, c in windows.items()})
+
+    scalar_total = incremental_total = column_total = 0.0
+    for _ in range(args.steps):
+        for pair, candles in windows.items():
+            candles.append(_next_day(rnd, candles))
+            del candles[:-args.days]
+        start = time.perf_counter()
+        expected = {p: deep_drawdown_without_rebound(c) for p, c in windows.items()}
+        scalar_total += time.perf_counter() - start
+        start = time.perf_counter()
+        got = screener.screen(windows)
+        incremental_total += time.perf_counter() - start
+        assert got == expected, "incremental result differs from per-candidate result"
+        step_windows = {p: _window(c) for p, c in windows.items()}
+        start = time.perf_counter()
+        got = column_screener.screen_windows(step_windows)
+        column_total += time.perf_counter() - start
+        assert got == expected, "incremental store-column result differs from per-candidate result"
+
+    print(f"symbols={args.symbols} days={args.days} deep(first)={deep_first} deep(last)={sum(expected.values())}")
+    print(f"{'full (per-candidate)':<32} {scalar_sec * 1000:>9.2f} ms")
+    print(f"{'full (2-D batch, dicts)':<32} {batch_sec * 1000:>9.2f} ms")
+    print(f"{'full (2-D batch, store columns)':<32} {store_sec * 1000:>9.2f} ms")
+    print(f"{'daily step (per-candidate)':<32} {scalar_total / args.steps * 1000:>9.2f} ms")
+    print(f"{'daily step (incremental, dicts)':<32} {incremental_total / args.steps * 1000:>9.2f} ms")
+    print(f"{'daily step (incremental, columns)':<32} {column_total / args.steps * 1000:>9.2f} ms")
+    print(f"screener stats: dicts {screener.stats}, columns {column_screener.stats}")
+
+
+if __name__ == "__main__":
+    main()
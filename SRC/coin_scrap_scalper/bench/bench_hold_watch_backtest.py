@@ -0,0 +1,131 @@
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from strategy import backtest as bt
+from strategy.watch_trend import get_trend_state
+
+START_MS = 1_700_000_000_000 // bt.HOUR_MS * bt.HOUR_MS
+
+
+def _synthetic_batch(pairs, hours: int, seed: int) -> bt.MinuteBatch:
+    """추세 구간(평균 6시간)이 섞인 1m 랜덤워크. 1h는 1m에서 만든다."""
+    rng = np.random.default_rng(seed)
+    batch = bt.MinuteBatch(pairs, START_MS, hours)
+    rows, minutes = len(pairs), batch.minutes
+    regime = rng.choice(np.array([-0.00015, 0.0, 0.00015]), size=(rows, hours // 6 + 1))
+    drift = np.repeat(regime, 360, axis=1)[:, :minutes]
+    steps = drift + rng.standard_normal((rows, minutes)) * 0.001
+    close = rng.uniform(0.5, 50.0, size=(rows, 1)) * np.exp(np.cumsum(steps, axis=1))
+    open_ = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    wick = np.abs(rng.standard_normal((rows, minutes))) * 0.0005
+    batch.close = close
+    batch.high = np.maximum(open_, close) * (1 + wick)
+    batch.low = np.minimum(open_, close) * (1 - wick)
+    batch.fill_hours_from_minutes()
+    return batch
+
+
+def _replay_scalar(batch: bt.MinuteBatch, row: int, trade_from: int) -> list:
+    """hold_watch._step을 분마다 그대로 따라가는 기준 구현 (c1h dict + get_trend_state, 초 단위 쿨다운)."""
+    live_low = bt._live_running(batch.low, batch.hours, np.fmin)[row]
+    live_high = bt._live_running(batch.high, batch.hours, np.fmax)[row]
+    holding = False
+    buy = high = 0.0
+    entry_minute = 0
+    last_sell = cooldown_until = float("-inf")
+    trades = []
+    for minute in range(trade_from, batch.minutes):
+        now = minute * 60
+        if now < cooldown_until:
+            continue
+        price = float(batch.close[row, minute])
+        hour = minute // 60
+        c1h = [{"close": float(batch.h_close[row, h]), "low": float(batch.h_low[row, h])}
+               for h in range(max(0, hour - (bt.WINDOW_HOURS - 1)), hour)]
+        c1h.append({"close": price, "low": float(live_low[minute]), "high": float(live_high[minute])})
+        if len(c1h) < 6:
+            continue
+        m30 = get_trend_state(c1h[-6:])
+        m10 = get_trend_state(c1h[-3:])
+        bottom = min(c["low"] for c in c1h[-6:])
+        falling = m30 == "down" or (m30 == "side" and m10 == "down")
+        if holding:
+            profit = price / buy
+            if price > high:
+                high = price
+            reason = None
+            if profit > 1.05 and price < high * 0.98 and falling:
+                reason = "TP"
+            elif profit < 0.97 and falling:
+                reason = "SL"
+            if reason:
+                trades.append((entry_minute, minute, reason))
+                holding = False
+                cooldown_until = now + 60
+                last_sell = now
+        elif (price > bottom * 1.005
+              and (m30 == "up" or (m30 == "side" and m10 == "up"))
+              and now - last_sell > 600):
+            holding, buy, high, entry_minute = True, price, price, minute
+            cooldown_until = now + 60
+    if holding:
+        trades.append((entry_minute, batch.minutes - 1, "OPEN"))
+    return trades
+
+
+def main():
+    parser = argparse.ArgumentParser(description="hold_watch 백테스트: 배열 신호/시뮬레이션 vs 분 단위 기준 재생, 전체 유니버스 소요 시간")
+    parser.add_argument("--symbols", type=int, default=400)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--batch", type=int, default=bt.DEFAULT_BATCH)
+    parser.add_argument("--verify", type=int, default=200, help="배치마다 watch_trend 함수와 대조할 분 수")
+    parser.add_argument("--replay-symbols", type=int, default=3, help="분 단위 기준 재생과 거래 내역을 비교할 심볼 수")
+    parser.add_argument("--replay-days", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    # 1) 거래 내역이 분 단위 기준 재생과 같은지 (짧은 구간)
+    pairs = [f"R{i:03d}USDT" for i in range(args.replay_symbols)]
+    batch = _synthetic_batch(pairs, args.replay_days * 24, seed=1)
+    trade_from = bt.WINDOW_HOURS * 60
+    signals = bt.Signals(batch, trade_from)
+    got = bt.simulate(batch, signals)
+    start = time.perf_counter()
+    replay_trades = 0
+    for row, pair in enumerate(pairs):
+        expected = _replay_scalar(batch, row, trade_from)
+        mine = [((t["entry_ms"] - START_MS) // bt.MINUTE_MS, (t["exit_ms"] - START_MS) // bt.MINUTE_MS, t["reason"])
+                for t in got if t["pair"] == pair]
+        assert mine == expected, f"{pair}: trades differ from per-minute replay"
+        replay_trades += len(expected)
+    replay_sec = time.perf_counter() - start
+    print(f"replay check: {len(pairs)} symbols x {args.replay_days} days, {replay_trades} trades identical "
+          f"(per-minute replay {replay_sec:.1f}s)")
+
+    # 2) 전체 유니버스 1년: 배치 단위 배열 계산 + watch_trend 함수 표본 대조
+    pairs = [f"C{i:04d}USDT" for i in range(args.symbols)]
+    hours = args.days * 24 + bt.WINDOW_HOURS
+    offset = {p: i for i, p in enumerate(pairs)}
+    start = time.perf_counter()
+    trades, stats = bt.run_batches(
+        lambda chunk: _synthetic_batch(chunk, hours, seed=offset[chunk[0]]),
+        pairs,
+        args.batch,
+        START_MS + bt.WINDOW_HOURS * bt.HOUR_MS,
+        verify_samples=args.verify,
+    )
+    elapsed = time.perf_counter() - start
+    assert stats["mismatches"] == 0, f"{stats['mismatches']} samples differ from watch_trend"
+    minutes = stats["minutes"] * stats["symbols"]
+    print(f"universe: {stats['symbols']} symbols x {args.days} days = {minutes / 1e6:.1f}M symbol-minutes, "
+          f"{len(trades)} trades, verify mismatches {stats['mismatches']}")
+    print(f"  generate {stats['load_sec']:.1f}s  signals {stats['signal_sec']:.1f}s  "
+          f"simulate {stats['simulate_sec']:.1f}s  total {elapsed:.1f}s")
+    print(f"  portfolio: {bt.portfolio(trades, 1000.0)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from config.auth import build_signed_params
+from utils.exchange_client import ExchangeClient
+
+_ORDER_RESPONSE = json.dumps({
+    "symbol": "BTCUSDT",
+    "orderId": 1,
+    "status": "FILLED",
+    "executedQty": "0.00100000",
+    "cummulativeQuoteQty": "30.00000000",
+    "fills": [],
+}).encode("utf-8")
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """/api/v3/order, /api/v3/ping 만 흉내 내는 keep-alive HTTP 서버."""
+
+    protocol_version = "HTTP/1.1"
+    # 헤더/본문 분할 전송 시 Nagle + delayed ACK로 40ms가 붙는 것 방지
+    disable_nagle_algorithm = True
+    handshake_sec = 0.0
+
+    def setup(self):
+        # 새 연결마다 TLS 핸드셰이크 비용을 흉내 내는 지연
+        if self.handshake_sec:
+            time.sleep(self.handshake_sec)
+        super().setup()
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        body = _ORDER_RESPONSE if self.path.startswith("/api/v3/order") else b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+def _params() -> dict:
+    return {"symbol": "BTCUSDT", "side": "SELL", "type": "MARKET", "quantity": "0.00100000"}
+
+
+def _bare_order(base_url: str) -> None:
+    headers, signed = build_signed_params(_params())
+    requests.post(f"{base_url}/api/v3/order", headers=headers, params=signed)
+
+
+def _run(label: str, fn, count: int) -> None:
+    samples = []
+    for _ in range(count):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{label:<28} mean {statistics.mean(samples):7.2f} ms  p50 {samples[len(samples) // 2]:7.2f} ms  "
+        f"p99 {p99:7.2f} ms  max {samples[-1]:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주문 REST 왕복 지연: bare requests.post vs 공용 ExchangeClient")
+    parser.add_argument("--orders", type=int, default=300, help="케이스당 주문 수")
+    parser.add_argument("--handshake-ms", type=float, default=30.0, help="새 연결당 추가 지연 (TLS 핸드셰이크 모사)")
+    args = parser.parse_args()
+
+    _StandIn.handshake_sec = args.handshake_ms / 1000.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    client = ExchangeClient(base_url=base_url)
+    client.warm()
+
+    print(f"stand-in {base_url}, handshake {args.handshake_ms:.0f} ms/connection, {args.orders} orders")
+    _run("requests.post (no Session)", lambda: _bare_order(base_url), args.orders)
+    _run("ExchangeClient (pooled)", lambda: client.post("/api/v3/order", _params(), signed=True), args.orders)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import random
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from requests import ConnectionError, RequestException, Session, Timeout
+
+from utils import safe_request as sr
+from utils import weight_governor
+
+LEGACY_DELAY_SEC = 1.2
+
+
+class _FaultyStandIn(BaseHTTPRequestHandler):
+    """/api/v3/ticker/price 흉내. 요청마다 확률적으로 429 / 5xx / 응답 지연(타임아웃)을 섞는다."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    rate_429 = 0.0
+    rate_5xx = 0.0
+    rate_slow = 0.0
+    slow_sec = 0.0
+    rnd = random.Random(5)
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            roll = self.rnd.random()
+        if roll < self.rate_429:
+            self._send(429, b'{"code":-1003,"msg":"Too many requests"}', {"Retry-After": "0"})
+        elif roll < self.rate_429 + self.rate_5xx:
+            self._send(503, b'{"code":-1001,"msg":"Internal error"}')
+        elif roll < self.rate_429 + self.rate_5xx + self.rate_slow:
+            time.sleep(self.slow_sec)
+            self._send(200, b'{"symbol":"BTCUSDT","price":"30000.00"}')
+        else:
+            self._send(200, b'{"symbol":"BTCUSDT","price":"30000.00"}')
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-MBX-USED-WEIGHT-1M", "1")
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # 지연 응답: 클라이언트가 read timeout으로 이미 끊음
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def _legacy_safe_request(method, url, **kwargs):
+    """변경 전 safe_request: 성공마다 고정 대기, 실패는 선형 대기 (비교용 그대로 옮김)."""
+    for attempt in range(1, sr.MAX_RETRIES + 1):
+        try:
+            res = method(url, **kwargs)
+            res.raise_for_status()
+            data = res.json()
+            time.sleep(LEGACY_DELAY_SEC)
+            return data
+        except (ConnectionError, Timeout, RequestException):
+            if attempt == sr.MAX_RETRIES:
+                return None
+            time.sleep(LEGACY_DELAY_SEC * attempt)
+
+
+def _run(label: str, fn, count: int) -> None:
+    samples = []
+    ok = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        if fn() is not None:
+            ok += 1
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{label:<22} {count / elapsed:>8.1f} req/s  success {ok / count:6.1%}  "
+        f"mean {statistics.mean(samples):8.1f} ms  p50 {samples[len(samples) // 2]:7.1f} ms  p99 {p99:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="safe_request 처리량: 고정 대기(기존) vs 적응형 재시도, 장애 주입 로컬 서버")
+    parser.add_argument("--requests", type=int, default=300, help="적응형 케이스 요청 수")
+    parser.add_argument("--legacy-requests", type=int, default=15, help="기존 방식 요청 수 (성공마다 1.2s 대기)")
+    parser.add_argument("--rate-429", type=float, default=0.05)
+    parser.add_argument("--rate-5xx", type=float, default=0.05)
+    parser.add_argument("--rate-slow", type=float, default=0.02, help="read timeout을 넘기는 응답 비율")
+    parser.add_argument("--read-timeout-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    _FaultyStandIn.rate_429 = args.rate_429
+    _FaultyStandIn.rate_5xx = args.rate_5xx
+    _FaultyStandIn.rate_slow = args.rate_slow
+    _FaultyStandIn.slow_sec = args.read_timeout_ms / 1000.0 * 2
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FaultyStandIn)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/v3/ticker/price"
+
+    # 분당 weight 한도는 이 측정과 무관하게 풀어 둔다
+    weight_governor._GOVERNOR = weight_governor.WeightGovernor(limit=10 ** 9)
+    session = Session()
+    timeout = (1.0, args.read_timeout_ms / 1000.0)
+    params = {"symbol": "BTCUSDT"}
+
+    print(
+        f"stand-in {url}: 429 {args.rate_429:.0%} / 5xx {args.rate_5xx:.0%} / "
+        f"slow {args.rate_slow:.0%} (read timeout {args.read_timeout_ms:.0f} ms)"
+    )
+    _run("fixed sleep (legacy)", lambda: _legacy_safe_request(session.get, url, params=params, timeout=timeout),
+         args.legacy_requests)
+    sr.REQUEST_STATS.reset()
+    _run("adaptive retry", lambda: sr.safe_request(session.get, url, params=params, timeout=timeout), args.requests)
+    for endpoint, stats in sr.get_request_stats().items():
+        print(
+            f"  {endpoint}: attempts {stats['attempts']} ok {stats['ok']} failed {stats['failed']} "
+            f"retries {stats['retries']} ({stats['retry_wait_sec']:.2f}s) kinds {stats['kinds']} "
+            f"mean {stats['latency_mean_ms']} ms"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
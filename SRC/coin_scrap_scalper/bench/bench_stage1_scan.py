@@ -0,0 +1,73 @@
+import argparse
+import random
+import tempfile
+import time
+import zlib
+
+from strategy import stage1_filter
+from strategy.drawdown_screener import DrawdownScreener
+from strategy.stage1_filter import verify_candidates
+from utils.candle_store import INTERVAL_MS, CandleStore
+
+
+def _install_fake_rest(latency_sec: float) -> None:
+    """후보 보조 체크의 REST 호출을 고정 지연 + 결정적 결과로 대체 (캔들 저장소는 실행마다 새 임시 디렉터리)."""
+
+    def seed(*parts) -> int:
+        return zlib.crc32(":".join(str(p) for p in parts).encode())
+
+    def is_recent_listing(symbol_pair, max_days=2):
+        time.sleep(latency_sec)
+        return seed(symbol_pair, "listing") % 10 == 0
+
+    def fetch(symbol_pair, interval, limit, start_time=None, end_time=None):
+        time.sleep(latency_sec)
+        rnd = random.Random(seed(symbol_pair, interval, limit))
+        n = limit if rnd.random() > 0.05 else 2
+        step = INTERVAL_MS[interval]
+        last_open = int(time.time() * 1000) // step * step
+        return [{"open_time": last_open - (n - 1 - i) * step, "open": 1.0, "high": 1.1, "low": 0.9,
+                 "close": rnd.uniform(0.1, 1.0), "volume": 1.0} for i in range(n)]
+
+    stage1_filter.is_recent_listing = is_recent_listing
+    stage1_filter.get_store = lambda: _STORE["store"]
+    stage1_filter.get_drawdown_screener = lambda: _STORE["screener"]
+    _STORE["fetch"] = fetch
+
+
+_STORE = {}
+
+
+def _candidates(n: int) -> list:
+    return [(f"C{i:04d}USDT", f"C{i:04d}", -7.5, 1e6, 5000) for i in range(n)]
+
+
+def _scan(candidates: list, workers: int):
+    with tempfile.TemporaryDirectory() as root:
+        _STORE["store"] = CandleStore(root, fetch=_STORE["fetch"])
+        _STORE["screener"] = DrawdownScreener()
+        start = time.perf_counter()
+        results = verify_candidates(candidates, "USDT", 2, workers=workers)
+        return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="stage1 후보 보조 체크 wall time: 순차 vs 워커 풀")
+    parser.add_argument("--counts", default="10,25,50,100", help="후보 수 목록 (쉼표 구분)")
+    parser.add_argument("--latency-ms", type=float, default=60.0, help="REST 호출 1건당 지연")
+    parser.add_argument("--workers", type=int, default=stage1_filter.STAGE1_WORKERS)
+    args = parser.parse_args()
+
+    _install_fake_rest(args.latency_ms / 1000.0)
+    print(f"REST latency {args.latency_ms:.0f} ms/call, workers={args.workers}")
+    print(f"{'candidates':>10} {'sequential':>12} {'pooled':>12} {'speedup':>8}  passed")
+    for n in (int(x) for x in args.counts.split(",")):
+        candidates = _candidates(n)
+        seq, seq_sec = _scan(candidates, 1)
+        par, par_sec = _scan(candidates, args.workers)
+        assert par == seq, "pooled scan result differs from sequential scan"
+        print(f"{n:>10} {seq_sec:>11.2f}s {par_sec:>11.2f}s {seq_sec / par_sec:>7.1f}x  {len(par)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from websockets.asyncio.server import serve
+
+from strategy.watchlist import WatchlistService
+from utils import ws_stream
+from utils.ws_price import MiniTickerStream
+from utils.ws_stream import StreamConnection
+
+
+class _CombinedStreamStandIn:
+    """combined stream 흉내. 연결별 URL stream 목록과 받은 control 메시지를 기록하고 result로 응답한다."""
+
+    def __init__(self):
+        self.connections = []
+        self.lock = threading.Lock()
+        self.port = None
+
+    async def _handler(self, ws):
+        query = parse_qs(urlsplit(ws.request.path).query)
+        conn = {"streams": sorted(filter(None, query.get("streams", [""])[0].split("/"))), "controls": []}
+        with self.lock:
+            self.connections.append(conn)
+        try:
+            async for message in ws:
+                msg = json.loads(message)
+                with self.lock:
+                    conn["controls"].append(msg)
+                await ws.send(json.dumps({"result": None, "id": msg["id"]}))
+        except Exception:
+            pass
+
+    def start(self) -> None:
+        ready = threading.Event()
+
+        async def main():
+            async with serve(self._handler, "127.0.0.1", 0) as server:
+                self.port = server.sockets[0].getsockname()[1]
+                ready.set()
+                await asyncio.Future()
+
+        threading.Thread(target=lambda: asyncio.run(main()), daemon=True).start()
+        assert ready.wait(5), "stand-in server did not start"
+
+    def by_first_stream(self, stream: str) -> dict:
+        with self.lock:
+            return next(c for c in self.connections if c["streams"] and c["streams"][0] == stream)
+
+
+def _wait(predicate, timeout: float = 10.0) -> None:
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def _streams(symbols) -> list:
+    return [f"{s.lower()}usdt@miniTicker" for s in symbols]
+
+
+def _controls(conn: dict) -> list:
+    return [(m["method"], m["params"]) for m in conn["controls"]]
+
+
+def _check_watchlist(server: _CombinedStreamStandIn, per_conn: int) -> None:
+    """WATCHLIST publish → update_symbols: shard 배치, SUBSCRIBE/UNSUBSCRIBE 내용, 재연결 없음."""
+    base_url = f"ws://127.0.0.1:{server.port}"
+    symbols = [f"S{i:03d}" for i in range(per_conn * 2 + per_conn // 2)]
+    watchlist = WatchlistService(kind="BENCH")
+    stream = MiniTickerStream(symbols, base_url=base_url, max_streams_per_connection=per_conn)
+    watchlist.subscribe(lambda event: stream.update_symbols(list(event.symbols)))
+    watchlist.publish(symbols, source="bench")
+    stream.start()
+    _wait(lambda: len(server.connections) == 3 and all(c.connected for c in stream._stream._shards))
+
+    all_streams = sorted(_streams(symbols))
+    layout = [all_streams[i:i + per_conn] for i in range(0, len(all_streams), per_conn)]
+    with server.lock:
+        urls = sorted(c["streams"] for c in server.connections)
+    assert urls == layout, "shard layout differs"
+
+    # shard 0에서 10개 빠지고 새 심볼 15개: 빈 자리(shard 0)부터 채우고 나머지는 shard 2로
+    removed = symbols[:10]
+    added = [f"N{i:03d}" for i in range(15)]
+    start = time.perf_counter()
+    watchlist.publish([s for s in symbols if s not in removed] + added, source="bench")
+    publish_ms = (time.perf_counter() - start) * 1000
+    new_sorted = sorted(_streams(added))
+    expected = {
+        layout[0][0]: [("UNSUBSCRIBE", sorted(_streams(removed))), ("SUBSCRIBE", new_sorted[:10])],
+        layout[1][0]: [],
+        layout[2][0]: [("SUBSCRIBE", new_sorted[10:])],
+    }
+    _wait(lambda: all(len(server.by_first_stream(k)["controls"]) == len(v) for k, v in expected.items()))
+    time.sleep(0.3)
+    for first, messages in expected.items():
+        got = _controls(server.by_first_stream(first))
+        assert got == messages, f"shard starting {first}: {got}"
+    assert len(server.connections) == 3, "watchlist change reconnected"
+    stream.stop()
+    print(f"watchlist: 3 shards x {per_conn} as expected, diff sent as SUBSCRIBE/UNSUBSCRIBE, "
+          f"no reconnect (publish returned in {publish_ms:.2f} ms)")
+
+
+def _check_pacing_off_lock(server: _CombinedStreamStandIn, extra: int) -> None:
+    """큰 diff(여러 batch, 간격 대기)를 보내는 동안에도 set_streams()는 바로 반환."""
+    base_url = f"ws://127.0.0.1:{server.port}"
+    base = _streams(f"P{i:03d}" for i in range(10))
+    conn = StreamConnection("bench", lambda data: None, base_url)
+    conn.set_streams(base)
+    before = len(server.connections)
+    conn.start()
+    _wait(lambda: conn.connected and len(server.connections) == before + 1)
+    server_conn = server.connections[-1]
+
+    more = _streams(f"Q{i:04d}" for i in range(extra))
+    start = time.perf_counter()
+    conn.set_streams(base + more)
+    first_ms = (time.perf_counter() - start) * 1000
+    time.sleep(ws_stream.CONTROL_MSG_INTERVAL_SEC)
+    start = time.perf_counter()
+    conn.set_streams(base[5:] + more)
+    second_ms = (time.perf_counter() - start) * 1000
+    sending_start = time.perf_counter()
+    _wait(lambda: conn._live == set(base[5:] + more))
+    sending_sec = time.perf_counter() - sending_start
+
+    batches = _controls(server_conn)
+    subscribed = [p for m, params in batches if m == "SUBSCRIBE" for p in params]
+    unsubscribed = [p for m, params in batches if m == "UNSUBSCRIBE" for p in params]
+    assert sorted(subscribed) == sorted(more) and sorted(unsubscribed) == sorted(base[:5])
+    assert all(len(params) <= ws_stream.SUBSCRIBE_BATCH_SIZE for _, params in batches)
+    assert len(server.connections) == before + 1, "diff reconnected"
+    assert first_ms < 50 and second_ms < 50, (first_ms, second_ms)
+    conn.stop()
+    print(f"pacing: {len(batches)} control messages over {sending_sec:.2f}s after set_streams returned, "
+          f"set_streams {first_ms:.2f} ms / {second_ms:.2f} ms (during send), no reconnect")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ws_stream: 로컬 websockets 서버로 shard 배치 / 구독 diff / 재연결 없음 확인")
+    parser.add_argument("--per-conn", type=int, default=40, help="연결당 stream 수 (shard 분할 확인용으로 작게)")
+    parser.add_argument("--extra", type=int, default=450, help="전송 간격 확인용 추가 stream 수")
+    args = parser.parse_args()
+    logging.getLogger("websockets").setLevel(logging.WARNING)
+
+    server = _CombinedStreamStandIn()
+    server.start()
+    _check_watchlist(server, args.per_conn)
+    _check_pacing_off_lock(server, args.extra)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,26 @@ import time
 import json
 import sys
 import argparse
-from decimal import Decimal
-from strategy.hold_watch import start_scalping_thread
+from strategy.engine import ScalpingEngine
 from strategy.stage1_filter import stage1_scan
 from utils.logger import logger  # 로거 사용
-from storage.repo import fetch_open_positions, save_snapshot, upsert_position
+from strategy.position_registry import POSITION_REGISTRY
+from strategy.watchlist import WATCHLIST
 from config.exchange import MAX_OPEN_POSITIONS
 from utils.ws_price import start_price_stream
-from data.fetch_balance import fetch_active_balances
+from utils.kline_stream import start_kline_stream
+from utils.user_stream import get_balances, start_user_stream
 from utils.telemetry_report import start_3h_reporter_thread
-from trade.order_executor import get_symbol_filters
+from utils.lot_math import get_constraints, below_min_qty
+from utils.exchange_catalog import get_catalog
+from utils.listing_index import get_listing_index
+from utils.ticker_table import start_ticker_table
+from utils.exchange_client import get_client
+from utils.side_effects import get_pipeline
+from utils.latency import install_dump_signal
+
+# threshold cross가 몰려도 1차 필터 재스캔은 이 간격 이상 띄운다
+RESCAN_MIN_INTERVAL_SEC = 30
 
 
 def load_target_symbols(path: str = "config/target_currency.json") -> list:
@@ -46,7 +56,7 @@ def load_symbols(args) -> list:
         return symbols
 
     # 3) 기본: 전체 유니버스 스캔 → 1차 필터 통과 리스트
-    open_positions = fetch_open_positions()
+    open_positions = POSITION_REGISTRY.open_symbols()
     if len(open_positions) >= MAX_OPEN_POSITIONS:
         logger.info("⚠️ max 포지션 도달: 스캔 중지, watch-only 모드")
         symbols = open_positions
@@ -60,42 +70,37 @@ def load_symbols(args) -> list:
     return symbols
 
 
-ACTIVE_WATCHLIST_KIND = "ACTIVE_WATCHLIST"
-
-
 def seed_positions_from_balance() -> None:
-    balances, _ = fetch_active_balances()
+    balances, _ = get_balances()
     if not balances:
         return
     for coin in balances:
         symbol = coin.get("symbol")
         qty = float(coin.get("available", 0)) + float(coin.get("limit", 0))
         if symbol and qty > 0:
-            filters = get_symbol_filters(symbol)
-            if filters:
-                min_qty, _, min_notional = filters
-                d_qty = Decimal(str(qty))
-                if d_qty < min_qty:
-                    upsert_position(
-                        symbol=symbol,
-                        status="DUST",
+            c = get_constraints(symbol)
+            if c is not None:
+                if below_min_qty(c, qty):
+                    POSITION_REGISTRY.upsert(
+                        symbol,
+                        "DUST",
                         qty=0.0,
                         avg_price=coin.get("average_price") or None,
                         data={"reason": "minQty", "qty": qty},
                     )
                     continue
-                if min_notional is not None:
-                    upsert_position(
-                        symbol=symbol,
-                        status="OPEN",
+                if c.min_notional is not None:
+                    POSITION_REGISTRY.upsert(
+                        symbol,
+                        "OPEN",
                         qty=qty,
                         avg_price=coin.get("average_price") or None,
-                        data={"min_notional": str(min_notional)},
+                        data={"min_notional": c.min_notional_text},
                     )
                     continue
-            upsert_position(
-                symbol=symbol,
-                status="OPEN",
+            POSITION_REGISTRY.upsert(
+                symbol,
+                "OPEN",
                 qty=qty,
                 avg_price=coin.get("average_price") or None,
             )
@@ -107,10 +112,29 @@ if __name__ == "__main__":
     parser.add_argument("--max-watch", type=int, default=0, help="limit number of symbols to watch")
     args = parser.parse_args()
 
+    # 주문 경로용 REST 연결 예열 + 유휴 연결 유지
+    rest_client = get_client()
+    rest_client.warm()
+    rest_client.start_keepalive()
+
+    # kill -USR1 <pid> → storage/latency_histograms.json 덤프
+    install_dump_signal()
+
+    # 체결 후 텔레그램/trade/event 저장은 백그라운드 처리 (미저장 trade journal 재처리 포함)
+    get_pipeline().start()
+
+    # 계정 잔고/체결은 user-data-stream 장부 1개를 모든 심볼이 공유 (REST 폴링 대체)
+    start_user_stream()
+
+    get_catalog().ensure_loaded()
+    # 상장일 인덱스는 카탈로그 신규 pair만 백그라운드로 채운다 (1차 필터는 메모리 비교만)
+    get_listing_index().start()
+    # 전체 pair 24h 통계는 all-market ticker 스트림으로 메모리에 유지 (1차 필터 ticker/24hr REST 대체)
+    ticker_table = start_ticker_table()
     seed_positions_from_balance()
 
     target_symbols = load_symbols(args)
-    open_positions = fetch_open_positions()
+    open_positions = POSITION_REGISTRY.open_symbols()
     for sym in open_positions:
         if sym not in target_symbols:
             target_symbols.append(sym)
@@ -118,44 +142,70 @@ if __name__ == "__main__":
         logger.error("⚠️ 대상 심볼 없음 → 종료 프로그램")
         sys.exit(1)
 
-    active_symbols = set(target_symbols)
-    save_snapshot(ACTIVE_WATCHLIST_KIND, sorted(active_symbols), min_interval_sec=0, force=True)
+    WATCHLIST.publish(target_symbols, source="startup")
+    active_symbols = set(WATCHLIST.symbols())
 
     logger.info(f"✅ 감시 시작할 심볼 목록: {', '.join(sorted(active_symbols))}")
 
     # start websocket price stream for watchlist symbols
     ws_stream = start_price_stream(list(active_symbols))
+    kline_stream = start_kline_stream(list(active_symbols))
 
     start_3h_reporter_thread()
 
-    started_symbols = set()
-    for symbol in sorted(active_symbols):
-        start_scalping_thread(symbol)
-        started_symbols.add(symbol)
-        logger.info(f"📌 감시 스레드 시작: {symbol}")
+    engine = ScalpingEngine(price_stream=ws_stream)
+    engine.start()
+    engine.sync_symbols(active_symbols)
+
+    # 이후 watchlist 변경(메인 스캔, 심볼 스레드의 dust 제외)은 구독으로 즉시 반영
+    def apply_watchlist(event):
+        ws_stream.update_symbols(list(event.symbols))
+        kline_stream.update_symbols(list(event.symbols))
+        engine.sync_symbols(event.symbols)
+        logger.info(
+            f"ACTIVE watchlist v{event.version} ({event.source}): "
+            f"+{sorted(event.added)} -{sorted(event.removed)}"
+        )
+
+    WATCHLIST.subscribe(apply_watchlist)
 
     last_mode = None
     last_open_positions = set(open_positions)
+    last_scan_ts = time.time()
 
-    # 메인 스레드는 로그만 찍고 주기적으로 대기
+    # 메인 스레드는 1분 주기 또는 1차 필터 threshold cross 시 깨어난다
     while True:
-        time.sleep(60)  # 1분 대기
+        if ticker_table.has_crossed():
+            ticker_table.wait_crossing(max(1.0, RESCAN_MIN_INTERVAL_SEC - (time.time() - last_scan_ts)))
+        else:
+            ticker_table.wait_crossing(60)
         try:
-            open_positions = fetch_open_positions()
+            open_positions = POSITION_REGISTRY.open_symbols()
             open_set = set(open_positions)
+            active_symbols = set(WATCHLIST.symbols())
 
             if args.symbols or args.use_target_file:
                 mode = "MANUAL"
                 desired = set(target_symbols) | open_set
+                ticker_table.take_crossed()
             else:
                 if len(open_positions) >= MAX_OPEN_POSITIONS:
                     mode = "WATCH"
                     desired = open_set
+                    ticker_table.take_crossed()
                 else:
                     mode = "SCAN"
-                    need_scan = (last_mode != "SCAN") or (open_set != last_open_positions)
+                    crossed_due = (
+                        ticker_table.has_crossed()
+                        and time.time() - last_scan_ts >= RESCAN_MIN_INTERVAL_SEC
+                    )
+                    need_scan = (last_mode != "SCAN") or (open_set != last_open_positions) or crossed_due
                     if need_scan:
+                        crossed = ticker_table.take_crossed()
+                        if crossed:
+                            logger.info(f"1차 필터 threshold cross {len(crossed)}건 → 재스캔: {sorted(crossed)[:10]}")
                         candidates = stage1_scan(exclude_symbols=open_set)
+                        last_scan_ts = time.time()
                         symbols = [c["symbol"] for c in candidates]
                         if args.max_watch and args.max_watch > 0:
                             symbols = symbols[:args.max_watch]
@@ -163,15 +213,7 @@ if __name__ == "__main__":
                     else:
                         desired = set(active_symbols) | open_set
 
-            if desired != active_symbols:
-                save_snapshot(ACTIVE_WATCHLIST_KIND, sorted(desired), min_interval_sec=0, force=True)
-                ws_stream.update_symbols(list(desired))
-                for sym in sorted(desired - started_symbols):
-                    start_scalping_thread(sym)
-                    started_symbols.add(sym)
-                    logger.info(f"📌 감시 스레드 시작: {sym}")
-                active_symbols = set(desired)
-                logger.info(f"ACTIVE watchlist 갱신: {sorted(active_symbols)} (mode={mode})")
+            WATCHLIST.publish(desired, source=mode)
 
             last_mode = mode
             last_open_positions = open_set
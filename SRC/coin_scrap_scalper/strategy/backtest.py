@@ -0,0 +1,502 @@
+import argparse
+import datetime
+import logging
+import random
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.exchange import ALLOC_PCT, MAX_OPEN_POSITIONS, MIN_ORDER_QUOTE, RESERVE_QUOTE
+from strategy.watch_trend import get_relative_position, get_trend_state
+from utils.candle_store import CandleStore, STORE_DIR, get_store
+from utils.capital import calc_order_quote
+from utils.codec import dumps_line
+
+MINUTE_MS = 60_000
+HOUR_MS = 3_600_000
+
+# hold_watch._step 규칙 그대로 (값을 바꾸면 양쪽 같이)
+WINDOW_HOURS = 12          # get_kline_candles(symbol, "1h", 12): 마감 11개 + 진행 중 1개
+MIN_HOURS = 6              # len(c1h) < 6 이면 대기
+TREND_LONG = 6             # minute_30_trend = get_trend_state(c1h[-6:])
+TREND_SHORT = 3            # minute_10_trend = get_trend_state(c1h[-3:])
+TREND_DEPTH = 4            # is_trend_rising/falling 기본 depth
+ENTRY_BOTTOM_RATIO = 1.005
+TP_RATIO = 1.05
+TP_PULLBACK = 0.98
+SL_RATIO = 0.97
+# now - last_sell_time > 600 → 분 격자에서는 매도 11분 뒤부터 (진입/청산 후 60s 쿨다운은 다음 분에 이미 지남)
+REENTRY_AFTER_SELL_MIN = 11
+
+DEFAULT_DAYS = 365
+DEFAULT_BATCH = 32
+DEFAULT_FEE_PCT = 0.1
+# 청산 탐색 구간: 하루치부터 두 배씩 늘린다
+SEARCH_CHUNK_MIN = 1440
+
+UP, SIDE, DOWN = 1, 0, -1
+
+
+class MinuteBatch:
+    """
+    심볼 묶음을 같은 시간 격자에 정렬한 배열.
+    - 1m close/high/low: (심볼 수, hours * 60), 1h close/high/low: (심볼 수, hours)
+    - 격자 시작은 정시, 빈 칸(상장 전/누락)은 NaN
+    """
+
+    def __init__(self, pairs: List[str], start_ms: int, hours: int):
+        self.pairs = list(pairs)
+        self.start_ms = start_ms
+        self.hours = hours
+        shape = (len(self.pairs), hours * 60)
+        self.close = np.full(shape, np.nan)
+        self.high = np.full(shape, np.nan)
+        self.low = np.full(shape, np.nan)
+        shape = (len(self.pairs), hours)
+        self.h_close = np.full(shape, np.nan)
+        self.h_high = np.full(shape, np.nan)
+        self.h_low = np.full(shape, np.nan)
+
+    @property
+    def minutes(self) -> int:
+        return self.hours * 60
+
+    def fill_hours_from_minutes(self) -> None:
+        """1h 저장분이 없는 시간은 1m으로 채운다 (close = 그 시간 마지막 1m close)."""
+        rows = len(self.pairs)
+        missing = np.isnan(self.h_close)
+        if not missing.any():
+            return
+        close = self.close.reshape(rows, self.hours, 60)[:, :, -1]
+        high = np.fmax.reduce(self.high.reshape(rows, self.hours, 60), axis=2)
+        low = np.fmin.reduce(self.low.reshape(rows, self.hours, 60), axis=2)
+        self.h_close = np.where(missing, close, self.h_close)
+        self.h_high = np.where(missing, high, self.h_high)
+        self.h_low = np.where(missing, low, self.h_low)
+
+
+def load_batch(store: CandleStore, pairs: List[str], start_ms: int, end_ms: int) -> MinuteBatch:
+    """저장소의 마감 1m/1h 캔들을 [start_ms, end_ms) 격자로 (mmap 뷰에서 바로 scatter)."""
+    start = start_ms // HOUR_MS * HOUR_MS
+    hours = max(1, -(-(end_ms - start) // HOUR_MS))
+    batch = MinuteBatch(pairs, start, hours)
+    end = start + hours * HOUR_MS
+    for row, pair in enumerate(pairs):
+        for interval, step, targets in (
+            ("1m", MINUTE_MS, (batch.close, batch.high, batch.low)),
+            ("1h", HOUR_MS, (batch.h_close, batch.h_high, batch.h_low)),
+        ):
+            cols = store.view(pair, interval).numpy()
+            open_time = cols["open_time"]
+            lo, hi = np.searchsorted(open_time, [start, end])
+            idx = (open_time[lo:hi] - start) // step
+            for target, name in zip(targets, ("close", "high", "low")):
+                target[row, idx] = cols[name][lo:hi]
+    batch.fill_hours_from_minutes()
+    return batch
+
+
+def _compare(a, b):
+    """a > b → 1, a < b → -1, 같거나 NaN → 0 (get_trend_state의 score 한 칸)."""
+    return (a > b).astype(np.int8) - (a < b).astype(np.int8)
+
+
+def _window_sum(prefix, h, width: int):
+    """prefix[:, j] = 앞 j칸 합일 때 시간 h 직전 width칸 (h-width..h-1) 합. 부족한 앞쪽은 0부터."""
+    lo = np.maximum(h - width, 0)
+    return prefix[:, h] - prefix[:, lo]
+
+
+def _prefix(values):
+    out = np.zeros((values.shape[0], values.shape[1] + 1), dtype=np.int32)
+    np.cumsum(values, axis=1, out=out[:, 1:])
+    return out
+
+
+def _closed_extreme(values, width: int, ufunc, fill: float):
+    """out[:, h] = ufunc(values[:, h-width..h-1]) (시간 h 직전 마감 width개). NaN은 그대로 전파."""
+    out = np.full_like(values, fill)
+    for k in range(1, width + 1):
+        out[:, k:] = ufunc(out[:, k:], values[:, :-k])
+    out[:, :width] = np.nan
+    return out
+
+
+def _live_running(values, hours: int, ufunc):
+    """진행 중 1h 캔들의 high/low: 같은 시간 안에서 1m 값을 누적 (NaN 분은 건너뜀)."""
+    rows = values.shape[0]
+    return ufunc.accumulate(values.reshape(rows, hours, 60), axis=2).reshape(rows, hours * 60)
+
+
+def trend_codes(h_close, close, hour_of_minute, n: int, depth: int = TREND_DEPTH):
+    """
+    분마다 get_trend_state(c1h[-n:]) 결과를 UP/SIDE/DOWN(int8)으로.
+    창 = 직전 마감 1h n-1개 + 진행 중 1h (close = 그 분의 1m close).
+    score는 마감 봉끼리 부분(시간 단위 누적합) + 마지막 칸(진행 중 close vs 직전 마감 close)으로 나눠 계산하고,
+    is_trend_rising/falling(마지막 depth개 strict)은 n < depth면 항상 False라 그대로 side가 된다.
+    """
+    if n < 3 or n < depth:
+        return np.zeros(close.shape, dtype=np.int8)
+    hours = h_close.shape[1]
+    prev_close = np.full_like(h_close, np.nan)
+    prev_close[:, 1:] = h_close[:, :-1]
+    step = np.zeros(h_close.shape, dtype=np.int8)
+    step[:, 1:] = _compare(h_close[:, 1:], h_close[:, :-1])
+
+    h = np.arange(hours)
+    # 마감 봉 구간 h-n+1..h-1 사이 비교는 step[h-n+2..h-1] (n-2칸)
+    closed_score = _window_sum(_prefix(step), h, n - 2)
+    # 마지막 depth개 중 마감 봉끼리 비교 depth-2칸이 모두 같은 방향
+    rising = _window_sum(_prefix(step == 1), h, depth - 2) == depth - 2
+    falling = _window_sum(_prefix(step == -1), h, depth - 2) == depth - 2
+
+    prev = prev_close[:, hour_of_minute]
+    last = _compare(close, prev)
+    score = closed_score[:, hour_of_minute] + last
+    up = (score >= 2) & rising[:, hour_of_minute] & (last == 1)
+    down = (score <= -2) & falling[:, hour_of_minute] & (last == -1)
+    return up.astype(np.int8) - down.astype(np.int8)
+
+
+class Signals:
+    """
+    (심볼 수, 분) 신호 배열.
+    - trend_long / trend_short: minute_30_trend / minute_10_trend (UP/SIDE/DOWN)
+    - bottom: min(c1h[-6:] low), valid: c1h가 6개 이상이고 창 안에 빈 시간이 없는 분
+    - entry: 미보유 시 진입 조건 (재진입 대기는 시뮬레이션에서)
+    - exit_trend: 익절/손절 공통 추세 조건
+    - position: get_relative_position(c1h, price) (with_position=True일 때만)
+    """
+
+    def __init__(self, batch: MinuteBatch, trade_from_minute: int = 0, with_position: bool = False):
+        hour_of_minute = np.arange(batch.minutes) // 60
+        close = batch.close
+        with np.errstate(invalid="ignore"):
+            self.trend_long = trend_codes(batch.h_close, close, hour_of_minute, TREND_LONG)
+            self.trend_short = trend_codes(batch.h_close, close, hour_of_minute, TREND_SHORT)
+
+            closed = MIN_HOURS - 1
+            complete = np.isfinite(batch.h_close) & np.isfinite(batch.h_low) & np.isfinite(batch.h_high)
+            hour_ok = _window_sum(_prefix(complete), np.arange(batch.hours), closed) == closed
+            hour_ok[:, :closed] = False
+            live_low = _live_running(batch.low, batch.hours, np.fmin)
+            self.valid = hour_ok[:, hour_of_minute] & np.isfinite(close) & np.isfinite(live_low)
+            self.valid[:, :trade_from_minute] = False
+
+            low6 = _closed_extreme(batch.h_low, closed, np.minimum, np.inf)
+            self.bottom = np.fmin(low6[:, hour_of_minute], live_low)
+
+            long_up = self.trend_long == UP
+            long_side = self.trend_long == SIDE
+            self.entry = (
+                self.valid
+                & (close > self.bottom * ENTRY_BOTTOM_RATIO)
+                & (long_up | (long_side & (self.trend_short == UP)))
+            )
+            self.exit_trend = self.valid & (
+                (self.trend_long == DOWN) | (long_side & (self.trend_short == DOWN))
+            )
+
+            self.position = None
+            if with_position:
+                closed = WINDOW_HOURS - 1
+                live_high = _live_running(batch.high, batch.hours, np.fmax)
+                lowest = np.fmin(_closed_extreme(batch.h_low, closed, np.minimum, np.inf)[:, hour_of_minute], live_low)
+                highest = np.fmax(_closed_extreme(batch.h_high, closed, np.maximum, -np.inf)[:, hour_of_minute], live_high)
+                span_ = highest - lowest
+                self.position = np.where(span_ == 0, 0.5, (close - lowest) / np.where(span_ == 0, 1.0, span_))
+
+
+def _find_exit(price, exit_trend, entry: int, buy: float) -> Tuple[Optional[int], Optional[str], float]:
+    """진입 다음 분부터 익절/손절 첫 분. 고점은 진입가 포함 누적 max (state.high_price)."""
+    peak = buy
+    start = entry + 1
+    chunk = SEARCH_CHUNK_MIN
+    total = len(price)
+    while start < total:
+        seg = price[start:start + chunk]
+        run = np.fmax(np.fmax.accumulate(seg), peak)
+        down = exit_trend[start:start + chunk]
+        with np.errstate(invalid="ignore"):
+            ratio = seg / buy
+            take = (ratio > TP_RATIO) & (seg < run * TP_PULLBACK) & down
+            stop = (ratio < SL_RATIO) & down
+        hit = np.flatnonzero(take | stop)
+        if hit.size:
+            i = int(hit[0])
+            return start + i, "TP" if take[i] else "SL", float(run[i])
+        peak = float(run[-1])
+        start += chunk
+        chunk *= 2
+    return None, None, peak
+
+
+def simulate(batch: MinuteBatch, signals: Signals, fee_pct: float = DEFAULT_FEE_PCT) -> List[Dict]:
+    """
+    심볼별 포지션 상태 전이. 진입 후보 분 목록에서 다음 진입을 찾고, 청산은 구간 배열로 한 번에 찾는다
+    (분 단위 루프 없음). 기간 끝까지 안 닫힌 포지션은 마지막 가격으로 평가하고 open=True.
+    """
+    fee = (1 - fee_pct / 100) ** 2
+    trades: List[Dict] = []
+    for row, pair in enumerate(batch.pairs):
+        price = batch.close[row]
+        exit_trend = signals.exit_trend[row]
+        entries = np.flatnonzero(signals.entry[row])
+        t = 0
+        while True:
+            k = int(np.searchsorted(entries, t))
+            if k >= len(entries):
+                break
+            entry = int(entries[k])
+            buy = float(price[entry])
+            exit_, reason, peak = _find_exit(price, exit_trend, entry, buy)
+            if exit_ is None:
+                finite = np.flatnonzero(np.isfinite(price))
+                exit_, reason = int(finite[-1]), "OPEN"
+            sell = float(price[exit_])
+            trades.append({
+                "pair": pair,
+                "entry_ms": batch.start_ms + entry * MINUTE_MS,
+                "exit_ms": batch.start_ms + exit_ * MINUTE_MS,
+                "entry_price": buy,
+                "exit_price": sell,
+                "peak_price": peak,
+                "reason": reason,
+                "pnl_pct": (sell / buy - 1.0) * 100.0,
+                "net_pct": (sell / buy * fee - 1.0) * 100.0,
+            })
+            if reason == "OPEN":
+                break
+            t = exit_ + REENTRY_AFTER_SELL_MIN
+    return trades
+
+
+def verify(batch: MinuteBatch, signals: Signals, samples: int, seed: int = 7) -> int:
+    """
+    임의의 분을 골라 hold_watch와 같은 방식으로 c1h dict 리스트를 만들고
+    get_trend_state / get_relative_position / bottom 이 배열 값과 정확히 같은지 확인. 불일치 수 반환.
+    """
+    rows, cols = np.nonzero(signals.valid)
+    if not len(rows) or samples <= 0:
+        return 0
+    rnd = random.Random(seed)
+    # 추세가 나오는 분도 섞이도록 절반은 up/down 분에서 고른다
+    trending = np.flatnonzero(signals.trend_long[rows, cols] != SIDE)
+    picks = [rnd.randrange(len(rows)) for _ in range(samples - samples // 2)]
+    if len(trending):
+        picks += [int(trending[rnd.randrange(len(trending))]) for _ in range(samples // 2)]
+    live_low = _live_running(batch.low, batch.hours, np.fmin)
+    live_high = _live_running(batch.high, batch.hours, np.fmax)
+    code = {"up": UP, "side": SIDE, "down": DOWN}
+    mismatches = 0
+    previous = logging.root.manager.disable
+    logging.disable(logging.INFO)  # get_trend_state의 추세 감지 로그
+    try:
+        for i in picks:
+            row, minute = int(rows[i]), int(cols[i])
+            hour = minute // 60
+            c1h = [
+                {"close": float(batch.h_close[row, h]), "high": float(batch.h_high[row, h]),
+                 "low": float(batch.h_low[row, h])}
+                for h in range(max(0, hour - (WINDOW_HOURS - 1)), hour)
+                if np.isfinite(batch.h_close[row, h]) and np.isfinite(batch.h_low[row, h]) and np.isfinite(batch.h_high[row, h])
+            ]
+            price = float(batch.close[row, minute])
+            c1h.append({"close": price, "high": float(live_high[row, minute]), "low": float(live_low[row, minute])})
+            expected = (
+                code[get_trend_state(c1h[-TREND_LONG:])],
+                code[get_trend_state(c1h[-TREND_SHORT:])],
+                min(c["low"] for c in c1h[-MIN_HOURS:]),
+            )
+            got = (int(signals.trend_long[row, minute]), int(signals.trend_short[row, minute]),
+                   float(signals.bottom[row, minute]))
+            if signals.position is not None and len(c1h) == WINDOW_HOURS:
+                expected += (get_relative_position(c1h, price),)
+                got += (float(signals.position[row, minute]),)
+            if got != expected:
+                mismatches += 1
+                print(f"불일치 {batch.pairs[row]} minute={minute}: 배열 {got} / 기준 {expected}")
+    finally:
+        logging.disable(previous)
+    return mismatches
+
+
+def summarize(trades: List[Dict]) -> Dict[str, Dict]:
+    """심볼별 거래 수 / 승률 / 수익률 합계·복리 (수수료 반영 net 기준)."""
+    out: Dict[str, Dict] = {}
+    for t in trades:
+        s = out.setdefault(t["pair"], {"trades": 0, "wins": 0, "tp": 0, "sl": 0, "open": 0,
+                                       "sum_net_pct": 0.0, "compound": 1.0})
+        s["trades"] += 1
+        s["wins"] += t["net_pct"] > 0
+        s["tp"] += t["reason"] == "TP"
+        s["sl"] += t["reason"] == "SL"
+        s["open"] += t["reason"] == "OPEN"
+        s["sum_net_pct"] += t["net_pct"]
+        s["compound"] *= 1 + t["net_pct"] / 100
+    for s in out.values():
+        s["win_rate"] = round(s["wins"] / s["trades"], 4)
+        s["compound_pct"] = round((s.pop("compound") - 1) * 100, 4)
+        s["sum_net_pct"] = round(s["sum_net_pct"], 4)
+    return out
+
+
+def portfolio(trades: List[Dict],
+              capital: float,
+              fee_pct: float = DEFAULT_FEE_PCT,
+              max_open: int = MAX_OPEN_POSITIONS,
+              alloc_pct: float = ALLOC_PCT,
+              reserve_quote: float = RESERVE_QUOTE,
+              min_order_quote: float = MIN_ORDER_QUOTE) -> Dict:
+    """
+    전체 심볼 거래를 시간순으로 합쳐 계좌 1개로 재생.
+    - 진입 금액은 운영과 같은 calc_order_quote(잔고, ALLOC_PCT, MAX_OPEN_POSITIONS, RESERVE_QUOTE)
+    - 슬롯이 꽉 찼거나 주문 금액이 MIN_ORDER_QUOTE 미만이면 그 거래는 건너뜀
+      (운영에서는 그 심볼이 다음 step에 다시 진입을 시도하므로 근사치)
+    - 같은 시각이면 청산 먼저, drawdown은 실현 손익 기준 (보유분은 원가)
+    """
+    fee = 1 - fee_pct / 100
+    events = [(t["exit_ms"], 0, i) for i, t in enumerate(trades)] + [(t["entry_ms"], 1, i) for i, t in enumerate(trades)]
+    events.sort()
+    cash = capital
+    open_: Dict[int, float] = {}
+    taken = skipped = wins = 0
+    peak_equity = capital
+    max_drawdown = 0.0
+    for _, kind, i in events:
+        if kind == 0:
+            stake = open_.pop(i, None)
+            if stake is None:
+                continue
+            t = trades[i]
+            proceeds = stake * t["exit_price"] / t["entry_price"] * fee * fee
+            cash += proceeds
+            wins += proceeds > stake
+            equity = cash + sum(open_.values())
+            peak_equity = max(peak_equity, equity)
+            max_drawdown = max(max_drawdown, 1 - equity / peak_equity)
+            continue
+        stake = calc_order_quote(cash, alloc_pct, max_open, reserve_quote)
+        if len(open_) >= max_open or stake < min_order_quote:
+            skipped += 1
+            continue
+        cash -= stake
+        open_[i] = stake
+        taken += 1
+    equity = cash + sum(open_.values())
+    return {
+        "capital": capital,
+        "final_equity": round(equity, 4),
+        "return_pct": round((equity / capital - 1) * 100, 4),
+        "trades": taken,
+        "skipped": skipped,
+        "win_rate": round(wins / taken, 4) if taken else None,
+        "max_drawdown_pct": round(max_drawdown * 100, 4),
+    }
+
+
+def run_batches(load, pairs: List[str], batch_size: int = DEFAULT_BATCH, trade_from_ms: Optional[int] = None,
+                fee_pct: float = DEFAULT_FEE_PCT, verify_samples: int = 0) -> Tuple[List[Dict], Dict]:
+    """
+    load(pairs) -> MinuteBatch 를 batch_size개 심볼씩 불러 신호 계산 + 시뮬레이션.
+    메모리는 배치 크기 × 분 수에 비례 (1년 1m 기준 심볼당 배열 1개 약 4MB).
+    """
+    trades: List[Dict] = []
+    stats = {"symbols": 0, "minutes": 0, "load_sec": 0.0, "signal_sec": 0.0, "simulate_sec": 0.0, "mismatches": 0}
+    for i in range(0, len(pairs), batch_size):
+        chunk = pairs[i:i + batch_size]
+        start = time.perf_counter()
+        batch = load(chunk)
+        stats["load_sec"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        trade_from = 0
+        if trade_from_ms is not None:
+            trade_from = max(0, (trade_from_ms - batch.start_ms) // MINUTE_MS)
+        signals = Signals(batch, trade_from, with_position=verify_samples > 0)
+        stats["signal_sec"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        trades.extend(simulate(batch, signals, fee_pct))
+        stats["simulate_sec"] += time.perf_counter() - start
+
+        if verify_samples:
+            stats["mismatches"] += verify(batch, signals, verify_samples)
+        stats["symbols"] += len(chunk)
+        stats["minutes"] = max(stats["minutes"], batch.minutes)
+    return trades, stats
+
+
+def stored_pairs(root: Path = STORE_DIR) -> List[str]:
+    """1m 캔들이 저장된 pair 목록."""
+    root = Path(root)
+    if not root.exists():
+        return []
+    return sorted(p.name for p in root.iterdir() if (p / "1m.close").exists() and (p / "1h.close").exists())
+
+
+def _parse_date_ms(value: str) -> int:
+    day = datetime.datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+    return int(day.timestamp() * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="hold_watch 전략 다중 심볼 백테스트 (저장된 1h/1m 캔들 재생)")
+    parser.add_argument("--symbols", default="", help="쉼표 구분 pair (비우면 저장소 전체)")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    parser.add_argument("--end", default="", help="종료일 YYYY-MM-DD (UTC, 비우면 현재)")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="한 번에 배열로 올리는 심볼 수")
+    parser.add_argument("--fee-pct", type=float, default=DEFAULT_FEE_PCT, help="편도 수수료 %%")
+    parser.add_argument("--capital", type=float, default=1000.0)
+    parser.add_argument("--verify", type=int, default=0, help="배치마다 watch_trend 함수와 대조할 분 수")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", default="", help="거래 내역 jsonl 경로")
+    args = parser.parse_args()
+
+    store = get_store()
+    pairs = [p.strip().upper() for p in args.symbols.split(",") if p.strip()] or stored_pairs(store.root)
+    if not pairs:
+        print(f"저장된 캔들 없음: {store.root}")
+        return
+    end_ms = _parse_date_ms(args.end) if args.end else int(time.time() * 1000) // MINUTE_MS * MINUTE_MS
+    trade_from_ms = end_ms - args.days * 86_400_000
+    # 시작 시점에 c1h 12개가 차도록 앞쪽 여유
+    load_from_ms = trade_from_ms - WINDOW_HOURS * HOUR_MS
+
+    start = time.perf_counter()
+    trades, stats = run_batches(
+        lambda chunk: load_batch(store, chunk, load_from_ms, end_ms),
+        pairs,
+        args.batch,
+        trade_from_ms,
+        args.fee_pct,
+        args.verify,
+    )
+    elapsed = time.perf_counter() - start
+
+    per_symbol = summarize(trades)
+    ranked = sorted(per_symbol.items(), key=lambda kv: kv[1]["compound_pct"], reverse=True)
+    print(f"{'pair':<14} {'trades':>6} {'win':>6} {'TP':>4} {'SL':>4} {'sum net %':>10} {'compound %':>11}")
+    for pair, s in ranked[:args.top]:
+        print(f"{pair:<14} {s['trades']:>6} {s['win_rate']:>6.1%} {s['tp']:>4} {s['sl']:>4} "
+              f"{s['sum_net_pct']:>10.2f} {s['compound_pct']:>11.2f}")
+    if len(ranked) > args.top:
+        print(f"... (거래 있는 심볼 {len(ranked)}개 중 상위 {args.top})")
+    print(f"portfolio: {portfolio(trades, args.capital, args.fee_pct)}")
+    print(
+        f"symbols={stats['symbols']} minutes={stats['minutes']} trades={len(trades)} "
+        f"load {stats['load_sec']:.1f}s signal {stats['signal_sec']:.1f}s simulate {stats['simulate_sec']:.1f}s "
+        f"total {elapsed:.1f}s"
+    )
+    if args.verify:
+        print(f"verify: 불일치 {stats['mismatches']}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for t in trades:
+                f.write(dumps_line(t))
+
+
+if __name__ == "__main__":
+    main()
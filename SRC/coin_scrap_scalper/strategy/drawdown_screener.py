@@ -0,0 +1,349 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy 미설치 시 후보별 파이썬 판정으로 대체
+    np = None
+
+from config.exchange import CANDLE_LIMITS
+from utils.candle_store import CandleView
+
+MIN_DAILY_CANDLES = 10
+INITIAL_ROWS = 64
+
+
+def deep_drawdown_without_rebound(candles: List[Dict],
+                                  min_drawdown_pct: float = 70.0,
+                                  max_drawdown_pct: float = 90.0,
+                                  rebound_ratio: float = 1.2) -> bool:
+    """일봉 1개 구간 판정: 고점 대비 -70~-90% 구간인데 저점 대비 반등(종가 기준)이 없으면 True."""
+    if len(candles) < MIN_DAILY_CANDLES:
+        return False
+
+    highs = [c["high"] for c in candles]
+    lows = [c["low"] for c in candles]
+    closes = [c["close"] for c in candles]
+
+    peak = max(highs)
+    if peak <= 0:
+        return False
+
+    current = closes[-1]
+    drawdown_pct = (1 - (current / peak)) * 100
+    if not (min_drawdown_pct <= drawdown_pct <= max_drawdown_pct):
+        return False
+
+    low = min(lows)
+    has_rebound = any(c >= low * rebound_ratio for c in closes)
+    return not has_rebound
+
+
+class DrawdownScreener:
+    """
+    후보 전체의 최근 일봉 high/low/close를 (pair 수 × days) 2차원 배열로 들고 한 번에 판정.
+    - 행은 오른쪽 정렬 (마지막 열 = 최신/진행 중 일봉), 빈 칸은 ±inf라 reduce에 영향 없음
+    - 행별 peak(max high) / trough(min low) / max close를 캐시. 반등 여부는 max close >= trough * ratio 와 같다
+    - 새 일봉이 오면 해당 행들만 왼쪽으로 밀고 새 값 반영 (같은 개수씩 들어온 행끼리 묶어 한 번에)
+    - 빠져나가거나 덮어써 작아진 값이 극값이었던 행만 다시 reduce, 나머지는 새 값과 비교만
+    - 판정 결과는 deep_drawdown_without_rebound()와 같다 (같은 float64 연산)
+    - screen()은 캔들 dict 리스트, screen_windows()는 CandleStore.window() 컬럼 뷰를 받는다 (처음 적재가 빠른 쪽)
+    """
+
+    def __init__(self,
+                 days: Optional[int] = None,
+                 min_drawdown_pct: float = 70.0,
+                 max_drawdown_pct: float = 90.0,
+                 rebound_ratio: float = 1.2):
+        self.days = int(days or CANDLE_LIMITS.get("1d", 120))
+        self.min_drawdown_pct = min_drawdown_pct
+        self.max_drawdown_pct = max_drawdown_pct
+        self.rebound_ratio = rebound_ratio
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._capacity = 0
+        self.stats = {"loaded": 0, "advanced": 0, "unchanged": 0, "reduced": 0}
+        if np is not None:
+            empty = np.empty((0, self.days))
+            self._high, self._low, self._close = empty, empty.copy(), empty.copy()
+            self._open_time = np.empty(0, dtype=np.int64)
+            self._count = np.empty(0, dtype=np.int64)
+            self._peak, self._trough, self._max_close = np.empty(0), np.empty(0), np.empty(0)
+            self._stale = np.empty(0, dtype=bool)
+            self._grow(INITIAL_ROWS)
+
+    def _grow(self, capacity: int) -> None:
+        n = self._capacity
+
+        def grown(arr, fill):
+            out = np.full((capacity,) + arr.shape[1:], fill, dtype=arr.dtype)
+            out[:n] = arr[:n]
+            return out
+
+        self._high = grown(self._high, -np.inf)
+        self._low = grown(self._low, np.inf)
+        self._close = grown(self._close, -np.inf)
+        self._open_time = grown(self._open_time, -1)
+        self._count = grown(self._count, 0)
+        self._peak = grown(self._peak, -np.inf)
+        self._trough = grown(self._trough, np.inf)
+        self._max_close = grown(self._max_close, -np.inf)
+        self._stale = grown(self._stale, True)
+        self._capacity = capacity
+
+    def _row(self, pair: str) -> int:
+        row = self._rows.get(pair)
+        if row is None:
+            row = len(self._rows)
+            if row >= self._capacity:
+                self._grow(self._capacity * 2)
+            self._rows[pair] = row
+        return row
+
+    def _load_rows(self, items: List[Tuple[int, List[Dict]]]) -> None:
+        rows = np.asarray([row for row, _ in items], dtype=np.intp)
+        tails = [candles[-self.days:] for _, candles in items]
+        lens = np.asarray([len(t) for t in tails], dtype=np.intp)
+        # 행마다 오른쪽 정렬: 행 r의 i번째 값 → 열 days - len + i
+        total = int(lens.sum())
+        target_rows = np.repeat(rows, lens)
+        starts = np.cumsum(lens) - lens
+        target_cols = np.arange(total) - np.repeat(starts, lens) + np.repeat(self.days - lens, lens)
+        for arr, key, fill in ((self._high, "high", -np.inf), (self._low, "low", np.inf), (self._close, "close", -np.inf)):
+            arr[rows] = fill
+            arr[target_rows, target_cols] = np.fromiter((c[key] for t in tails for c in t), dtype=np.float64, count=total)
+        self._count[rows] = lens
+        self._open_time[rows] = [t[-1]["open_time"] for t in tails]
+        self._stale[rows] = True
+        self.stats["loaded"] += len(items)
+
+    def _load_views(self, items: List[Tuple[int, CandleView, Optional[Dict]]]) -> None:
+        """저장소 컬럼 뷰를 행에 그대로 복사 (마감 캔들은 mmap에서 슬라이스 1번, 진행 중 캔들은 마지막 열)."""
+        rows = np.asarray([row for row, _, _ in items], dtype=np.intp)
+        columns = ((self._high, "high", -np.inf), (self._low, "low", np.inf), (self._close, "close", -np.inf))
+        for arr, _, fill in columns:
+            arr[rows] = fill
+        lens = []
+        for row, view, live in items:
+            n = min(self.days, len(view) + (live is not None))
+            closed = n - (live is not None)
+            start = self.days - n
+            for arr, key, _ in columns:
+                column = getattr(view, key)
+                if closed:
+                    arr[row, start:start + closed] = np.frombuffer(column[len(column) - closed:], dtype=np.float64)
+                if live is not None:
+                    arr[row, -1] = live[key]
+            lens.append(n)
+        self._count[rows] = lens
+        self._open_time[rows] = [_last_open_time(view, live) for _, view, live in items]
+        self._stale[rows] = True
+        self.stats["loaded"] += len(items)
+
+    def _tail_since_last(self, row: int, candles: List[Dict]) -> Optional[List[Dict]]:
+        """저장된 마지막 open_time부터의 캔들 (그 캔들 포함). 이어지지 않거나 창을 통째로 넘으면 None."""
+        last = self._open_time[row]
+        for i in range(len(candles) - 1, -1, -1):
+            t = candles[i]["open_time"]
+            if t == last:
+                tail = candles[i:]
+                return tail if len(tail) <= self.days else None
+            if t < last:
+                return None
+        return None
+
+    def _advance_rows(self, k: int, rows: "np.ndarray",
+                      new_h: "np.ndarray", new_l: "np.ndarray", new_c: "np.ndarray", open_times: List[int]) -> None:
+        """
+        새 일봉 k개씩 들어온 행들을 한 번에 갱신. new_*는 (행 수 × k+1), 0열은 기존 마지막(진행 중) 일봉의 최신 값.
+        빠져나가거나 작아진 값이 극값이었던 행만 stale로 표시하고, 나머지는 새 값과 비교만 한다.
+        """
+        old_h, old_l, old_c = self._high[rows, -1], self._low[rows, -1], self._close[rows, -1]
+        lost_h = np.where(new_h[:, 0] < old_h, old_h, -np.inf)
+        lost_l = np.where(new_l[:, 0] > old_l, old_l, np.inf)
+        lost_c = np.where(new_c[:, 0] < old_c, old_c, -np.inf)
+        if k:
+            lost_h = np.maximum(lost_h, self._high[rows, :k].max(axis=1))
+            lost_l = np.minimum(lost_l, self._low[rows, :k].min(axis=1))
+            lost_c = np.maximum(lost_c, self._close[rows, :k].max(axis=1))
+            for arr in (self._high, self._low, self._close):
+                arr[rows, :-k] = arr[rows, k:]
+            self._count[rows] = np.minimum(self.days, self._count[rows] + k)
+            self._open_time[rows] = open_times
+        else:
+            unchanged = (new_h[:, 0] == old_h) & (new_l[:, 0] == old_l) & (new_c[:, 0] == old_c)
+            self.stats["unchanged"] += int(unchanged.sum())
+        self._high[rows, -(k + 1):] = new_h
+        self._low[rows, -(k + 1):] = new_l
+        self._close[rows, -(k + 1):] = new_c
+
+        stale = (
+            self._stale[rows]
+            | (lost_h >= self._peak[rows])
+            | (lost_l <= self._trough[rows])
+            | (lost_c >= self._max_close[rows])
+        )
+        fresh = rows[~stale]
+        keep = ~stale
+        self._peak[fresh] = np.maximum(self._peak[fresh], new_h[keep].max(axis=1))
+        self._trough[fresh] = np.minimum(self._trough[fresh], new_l[keep].min(axis=1))
+        self._max_close[fresh] = np.maximum(self._max_close[fresh], new_c[keep].max(axis=1))
+        self._stale[rows] = stale
+        self.stats["advanced"] += len(rows)
+
+    def _advance_candles(self, k: int, items: List[Tuple[int, List[Dict]]]) -> None:
+        new_h, new_l, new_c = (np.array([[c[key] for c in tail] for _, tail in items]) for key in ("high", "low", "close"))
+        self._advance_rows(k, np.asarray([row for row, _ in items], dtype=np.intp),
+                           new_h, new_l, new_c, [tail[-1]["open_time"] for _, tail in items])
+
+    def _advance_views(self, k: int, items: List[Tuple[int, CandleView, Optional[Dict]]]) -> None:
+        new_h, new_l, new_c = (np.array([_tail(getattr(view, key), live, key, k + 1) for _, view, live in items])
+                               for key in ("high", "low", "close"))
+        self._advance_rows(k, np.asarray([row for row, _, _ in items], dtype=np.intp),
+                           new_h, new_l, new_c, [_last_open_time(view, live) for _, view, live in items])
+
+    def _judge(self, pairs: List[str], rows: List[int]) -> Dict[str, bool]:
+        """stale 행만 다시 reduce한 뒤 행 전체를 한 번에 판정."""
+        idx = np.asarray(rows, dtype=np.intp)
+        stale = idx[self._stale[idx]]
+        if stale.size:
+            self._peak[stale] = self._high[stale].max(axis=1)
+            self._trough[stale] = self._low[stale].min(axis=1)
+            self._max_close[stale] = self._close[stale].max(axis=1)
+            self._stale[stale] = False
+            self.stats["reduced"] += int(stale.size)
+
+        peak = self._peak[idx]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdown_pct = (1 - (self._close[idx, -1] / peak)) * 100
+        deep = (
+            (self._count[idx] >= MIN_DAILY_CANDLES)
+            & (peak > 0)
+            & (drawdown_pct >= self.min_drawdown_pct)
+            & (drawdown_pct <= self.max_drawdown_pct)
+            & ~(self._max_close[idx] >= self._trough[idx] * self.rebound_ratio)
+        )
+        return dict(zip(pairs, deep.tolist()))
+
+    def screen(self, daily: Dict[str, List[Dict]]) -> Dict[str, bool]:
+        """
+        {pair: 최근 일봉 리스트(오래된 → 최신)} → {pair: 장기 폭락 + 반등 없음 여부}.
+        이미 가진 pair는 새로 온 일봉만 반영하고, 갱신과 판정 모두 행 전체를 한 번에 계산한다.
+        dict → 배열 변환이 후보별 파이썬 판정과 같은 비용이라 처음 적재는 빨라지지 않는다 (이득은 증분 갱신뿐).
+        캔들 저장소에서 읽을 때는 screen_windows()를 쓴다.
+        """
+        if np is None:
+            return {
+                pair: deep_drawdown_without_rebound(candles, self.min_drawdown_pct, self.max_drawdown_pct, self.rebound_ratio)
+                for pair, candles in daily.items()
+            }
+
+        result = {pair: False for pair in daily}
+        with self._lock:
+            pairs = [pair for pair, candles in daily.items() if candles]
+            rows = []
+            loads: List[Tuple[int, List[Dict]]] = []
+            advances: Dict[int, List[Tuple[int, List[Dict]]]] = {}
+            for pair in pairs:
+                candles = daily[pair]
+                known = pair in self._rows
+                row = self._row(pair)
+                tail = self._tail_since_last(row, candles) if known else None
+                if tail is None:
+                    loads.append((row, candles))
+                else:
+                    advances.setdefault(len(tail) - 1, []).append((row, tail))
+                rows.append(row)
+            if not rows:
+                return result
+            if loads:
+                self._load_rows(loads)
+            for k, items in advances.items():
+                self._advance_candles(k, items)
+            result.update(self._judge(pairs, rows))
+        return result
+
+    def screen_windows(self, windows: Dict[str, Optional[Tuple[CandleView, Optional[Dict]]]]) -> Dict[str, bool]:
+        """
+        {pair: CandleStore.window(pair, "1d", days) 결과} → screen()과 같은 판정.
+        마감 캔들은 저장소 컬럼(mmap)에서 행으로 바로 복사해 캔들 dict를 만들지 않는다 (처음 적재도 슬라이스 복사만).
+        window가 None(조회 실패)이거나 비어 있으면 False.
+        """
+        if np is None:
+            return self.screen({pair: _window_candles(window) for pair, window in windows.items()})
+
+        result = {pair: False for pair in windows}
+        with self._lock:
+            pairs, rows = [], []
+            loads: List[Tuple[int, CandleView, Optional[Dict]]] = []
+            advances: Dict[int, List[Tuple[int, CandleView, Optional[Dict]]]] = {}
+            for pair, window in windows.items():
+                if window is None or (not len(window[0]) and window[1] is None):
+                    continue
+                view, live = window
+                known = pair in self._rows
+                row = self._row(pair)
+                k = self._new_since_last(row, view.open_time, live) if known else None
+                if k is None:
+                    loads.append((row, view, live))
+                else:
+                    advances.setdefault(k, []).append((row, view, live))
+                pairs.append(pair)
+                rows.append(row)
+            if not rows:
+                return result
+            if loads:
+                self._load_views(loads)
+            for k, items in advances.items():
+                self._advance_views(k, items)
+            result.update(self._judge(pairs, rows))
+        return result
+
+    def _new_since_last(self, row: int, open_times: memoryview, live: Optional[Dict]) -> Optional[int]:
+        """저장된 마지막 open_time 이후 새 일봉 수 (_tail_since_last와 같은 기준). 이어지지 않으면 None."""
+        last = int(self._open_time[row])
+        n = len(open_times) + (live is not None)
+        if live is not None and live["open_time"] == last:
+            return 0
+        for i in range(len(open_times) - 1, -1, -1):
+            t = open_times[i]
+            if t == last:
+                return n - 1 - i if n - i <= self.days else None
+            if t < last:
+                return None
+        return None
+
+
+def _tail(column: memoryview, live: Optional[Dict], key: str, size: int) -> List[float]:
+    """마감 캔들 컬럼 + 진행 중 캔들 값의 마지막 size개."""
+    if live is None:
+        return column[len(column) - size:].tolist()
+    return column[len(column) - size + 1:].tolist() + [live[key]]
+
+
+def _last_open_time(view: CandleView, live: Optional[Dict]) -> int:
+    return live["open_time"] if live is not None else view.open_time[-1]
+
+
+def _window_candles(window: Optional[Tuple[CandleView, Optional[Dict]]]) -> List[Dict]:
+    if window is None:
+        return []
+    view, live = window
+    names = CandleView.__slots__
+    candles = [dict(zip(names, values)) for values in zip(*(getattr(view, name) for name in names))]
+    if live is not None:
+        candles.append(live)
+    return candles
+
+
+_SCREENER: Optional[DrawdownScreener] = None
+_SCREENER_LOCK = threading.Lock()
+
+
+def get_drawdown_screener() -> DrawdownScreener:
+    global _SCREENER
+    if _SCREENER is None:
+        with _SCREENER_LOCK:
+            if _SCREENER is None:
+                _SCREENER = DrawdownScreener()
+    return _SCREENER
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+from strategy.hold_watch import ScalpingStrategy
+from strategy.state_registry import STATE_REGISTRY, STATE_FLUSH_SEC
+from utils.latency import record_latency
+from utils.logger import logger
+
+# 전략 step 안의 REST/DB/주문 호출은 블로킹이라 소수 워커 풀에서 실행한다.
+# 심볼 수와 무관하게 스레드 수는 STEP_WORKERS로 고정.
+STEP_WORKERS = 8
+
+
+class ScalpingEngine:
+    """
+    단일 asyncio 이벤트 루프에서 모든 심볼의 ScalpingStrategy를 구동한다.
+    - 심볼당 스레드 대신 코루틴 1개 (대기 중에는 메모리/CPU 거의 0)
+    - sync_symbols()로 watchlist 변경 반영: 빠진 심볼은 보유 청산 후 종료
+    - wake()로 대기 중인 심볼을 즉시 깨울 수 있음 (price_stream 지정 시 tick마다 자동 wake)
+    - 단, step()이 실패 back-off(not_before)를 건 대기는 wake로 줄어들지 않음
+    """
+
+    def __init__(self, max_workers: int = STEP_WORKERS, price_stream=None):
+        self._price_stream = price_stream
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scalp")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._strategies: Dict[str, ScalpingStrategy] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._wake: Dict[str, asyncio.Event] = {}
+        self._tick_callbacks: Dict[str, Callable[[str, float], None]] = {}
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run_loop, name="scalp-engine", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self) -> None:
+        if not self._loop:
+            return
+        self._loop.call_soon_threadsafe(self._cancel_all)
+
+    def sync_symbols(self, symbols: Iterable[str]) -> None:
+        """스레드 안전. 원하는 심볼 집합으로 맞춘다."""
+        desired = {s.upper() for s in symbols}
+        self._call(self._sync, desired)
+
+    def wake(self, symbol: str) -> None:
+        """스레드 안전. 해당 심볼의 대기를 즉시 끝낸다."""
+        self._call(self._set_wake, symbol.upper())
+
+    def active_symbols(self) -> list:
+        return sorted(self._tasks.keys())
+
+    def _call(self, fn, *args) -> None:
+        if not self._loop:
+            raise RuntimeError("ScalpingEngine not started")
+        self._loop.call_soon_threadsafe(fn, *args)
+
+    def _run_loop(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.create_task(self._flush_states())
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    def _set_wake(self, symbol: str) -> None:
+        ev = self._wake.get(symbol)
+        if ev is not None:
+            ev.set()
+
+    def _sync(self, desired: set) -> None:
+        for symbol in sorted(desired):
+            strategy = self._strategies.get(symbol)
+            if strategy is not None:
+                if strategy.retiring:
+                    strategy.retiring = False
+                    logger.info(f"📌 감시 재개: {symbol}")
+                continue
+            strategy = ScalpingStrategy(symbol)
+            self._strategies[symbol] = strategy
+            self._wake[symbol] = asyncio.Event()
+            self._tasks[symbol] = self._loop.create_task(self._drive(strategy))
+            self._subscribe_ticks(symbol)
+            logger.info(f"📌 감시 시작: {symbol}")
+
+        for symbol, strategy in self._strategies.items():
+            if symbol not in desired and not strategy.retiring:
+                strategy.retiring = True
+                self._set_wake(symbol)
+
+    def _subscribe_ticks(self, symbol: str) -> None:
+        if self._price_stream is None:
+            return
+        # tick → 해당 심볼 즉시 wake (디스패처 스레드에서 호출됨)
+        callback = lambda _pair, _price, s=symbol: self.wake(s)
+        self._tick_callbacks[symbol] = callback
+        self._price_stream.subscribe(symbol, callback)
+
+    def _unsubscribe_ticks(self, symbol: str) -> None:
+        callback = self._tick_callbacks.pop(symbol, None)
+        if callback is not None and self._price_stream is not None:
+            self._price_stream.unsubscribe(symbol, callback)
+
+    def _cancel_all(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        STATE_REGISTRY.flush(force=True)
+
+    async def _flush_states(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(STATE_FLUSH_SEC)
+            try:
+                await loop.run_in_executor(self._executor, STATE_REGISTRY.flush, True)
+            except Exception:
+                logger.warning("STATE_BOOK flush 오류", exc_info=True)
+
+    @staticmethod
+    def _run_step(strategy: ScalpingStrategy, submitted: float):
+        # 워커 풀 대기 시간 (스레드가 모자라면 여기서 늘어난다)
+        record_latency("engine.dispatch", time.perf_counter() - submitted)
+        return strategy.step()
+
+    async def _drive(self, strategy: ScalpingStrategy) -> None:
+        symbol = strategy.symbol
+        loop = asyncio.get_running_loop()
+        wake = self._wake[symbol]
+        try:
+            await loop.run_in_executor(self._executor, strategy.start)
+            while True:
+                wake.clear()
+                delay = await loop.run_in_executor(self._executor, self._run_step, strategy, time.perf_counter())
+                if delay is None:
+                    STATE_REGISTRY.remove(symbol)
+                    break
+                if delay <= 0:
+                    continue
+                if time.time() < strategy.not_before:
+                    # 실패 back-off 중: tick wake로 당기지 않는다 (거부된 주문을 tick마다 재전송하지 않도록)
+                    await asyncio.sleep(max(delay, strategy.not_before - time.time()))
+                    continue
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.error(f"⚠️ 엔진 구동 오류: {symbol}", exc_info=True)
+        finally:
+            # 같은 심볼이 다시 추가돼 새 태스크가 등록된 경우는 건드리지 않음
+            if self._strategies.get(symbol) is strategy:
+                self._strategies.pop(symbol, None)
+                self._tasks.pop(symbol, None)
+                self._wake.pop(symbol, None)
+                self._unsubscribe_ticks(symbol)
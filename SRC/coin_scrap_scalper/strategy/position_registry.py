@@ -0,0 +1,92 @@
+import threading
+from typing import Dict, List, Set
+
+from config.exchange import MAX_OPEN_POSITIONS
+from storage.repo import fetch_open_positions, upsert_position
+
+
+class PositionRegistry:
+    """
+    프로세스 전체 OPEN 포지션 목록 (메모리).
+    - 최초 1회만 fetch_open_positions()로 적재, 이후 조회는 DB를 타지 않는다
+    - upsert(): storage.repo.upsert_position write-through 후 메모리 반영
+    - try_reserve(): 매수 직전 슬롯 예약. OPEN + 예약 수로 MAX_OPEN_POSITIONS를 원자적으로 검사
+      (두 심볼 스레드가 동시에 "1자리 남음"을 보고 둘 다 매수하는 경합 방지)
+    """
+
+    def __init__(self, max_open: int = MAX_OPEN_POSITIONS):
+        self.max_open = max_open
+        self._lock = threading.RLock()
+        self._open: Set[str] = set()
+        self._reserved: Set[str] = set()
+        self._loaded = False
+
+    def load(self) -> int:
+        """DB의 OPEN 포지션으로 메모리 목록을 다시 채운다 (예약은 유지)."""
+        symbols = fetch_open_positions()
+        with self._lock:
+            self._open = set(symbols or [])
+            self._loaded = True
+            return len(self._open)
+
+    def ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self.load()
+
+    # ---- 조회 ----
+    def open_symbols(self) -> List[str]:
+        self.ensure_loaded()
+        with self._lock:
+            return sorted(self._open)
+
+    def open_count(self) -> int:
+        """OPEN + 매수 진행 중(예약) 포지션 수."""
+        self.ensure_loaded()
+        with self._lock:
+            return len(self._open | self._reserved)
+
+    def is_open(self, symbol: str) -> bool:
+        self.ensure_loaded()
+        return symbol in self._open
+
+    def has_room(self) -> bool:
+        return self.open_count() < self.max_open
+
+    # ---- 진입 슬롯 ----
+    def try_reserve(self, symbol: str) -> bool:
+        self.ensure_loaded()
+        with self._lock:
+            if symbol in self._open or symbol in self._reserved:
+                return True
+            if len(self._open | self._reserved) >= self.max_open:
+                return False
+            self._reserved.add(symbol)
+            return True
+
+    def release(self, symbol: str) -> None:
+        """매수 실패 시 예약 해제."""
+        with self._lock:
+            self._reserved.discard(symbol)
+
+    # ---- 쓰기 ----
+    def upsert(self, symbol: str, status: str, **fields) -> None:
+        self.ensure_loaded()
+        with self._lock:
+            # 메모리는 항상 실제 상태를 따르고, DB 실패는 호출 측에 그대로 올린다
+            if status == "OPEN":
+                self._open.add(symbol)
+            else:
+                self._open.discard(symbol)
+            self._reserved.discard(symbol)
+            upsert_position(symbol=symbol, status=status, **fields)
+
+    def snapshot(self) -> Dict[str, List[str]]:
+        with self._lock:
+            return {"open": sorted(self._open), "reserved": sorted(self._reserved)}
+
+
+POSITION_REGISTRY = PositionRegistry()
+
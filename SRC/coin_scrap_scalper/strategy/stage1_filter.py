@@ -1,15 +1,22 @@
-from typing import List, Dict, Optional
-import requests
-from datetime import datetime, timezone
-
-from config.exchange import BINANCE_BASE_URL, QUOTE_ASSET, CANDLE_LIMITS
-from data.fetch_price import get_all_tickers_24hr, get_candle_data_v2
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+from config.exchange import QUOTE_ASSET, CANDLE_LIMITS
+from data.fetch_price import get_all_tickers_24hr
+from strategy.drawdown_screener import get_drawdown_screener
+from utils.candle_store import get_store
+from utils.listing_index import get_listing_index
 from utils.logger import logger
+from utils.symbols import format_symbol
+from utils.ticker_table import get_ticker_table
+from utils.weight_governor import PRIORITY_SCAN, get_governor, priority_scope
 from utils.universe_cache import load_or_refresh_universe
-from storage.repo import get_latest_snapshot, save_snapshot
 
 EXCLUDED_BASE_SUFFIXES = ("UP", "DOWN", "BULL", "BEAR", "3L", "3S", "5L", "5S")
 
+# 후보 보조 체크 동시 실행 수 (weight는 전역 governor가 PRIORITY_SCAN 상한으로 묶는다)
+STAGE1_WORKERS = 8
+
 
 def _is_excluded_symbol(base_asset: str) -> bool:
     base = base_asset.upper()
@@ -36,81 +43,100 @@ def get_spot_symbols(quote_asset: str = QUOTE_ASSET) -> List[Dict]:
     return symbols
 
 
-def _get_first_kline_time_ms(symbol_pair: str, interval: str = "1h") -> Optional[int]:
-    url = f"{BINANCE_BASE_URL}/api/v3/klines"
-    params = {
-        "symbol": symbol_pair,
-        "interval": interval,
-        "limit": 1,
-        "startTime": 0
-    }
-    try:
-        res = requests.get(url, params=params)
-        data = res.json()
-        if isinstance(data, list) and data:
-            return int(data[0][0])
-    except Exception as e:
-        logger.warning(f"최초 캔들 조회 실패({symbol_pair}): {e}")
-    return None
+def is_recent_listing(symbol_pair: str, max_days: int = 2) -> bool:
+    """
+    상장 후 max_days일 이내 여부. 영구 listing index 메모리 비교, 인덱스에 없을 때만 REST 1회.
+    최근 조회 실패한 pair는 RETRY_FAILED_SEC 동안 다시 조회하지 않는다 (신규 상장 아님으로 처리, 기존과 같음).
+    인덱스 파일 저장은 verify_candidates가 스캔당 1회.
+    """
+    index = get_listing_index()
+    recent = index.is_recent(symbol_pair, max_days)
+    if recent is None and index.lookup_due(symbol_pair):
+        index.lookup(symbol_pair, save=False)
+        recent = index.is_recent(symbol_pair, max_days)
+    return bool(recent)
 
 
-def is_recent_listing(symbol_pair: str, max_days: int = 2) -> bool:
-    first_ts = _get_first_kline_time_ms(symbol_pair)
-    if first_ts is None:
-        return False
-    first_dt = datetime.fromtimestamp(first_ts / 1000, tz=timezone.utc)
-    age_days = (datetime.now(tz=timezone.utc) - first_dt).days
-    return age_days <= max_days
-
-
-def _load_listing_cache(today: str, quote_asset: str) -> Dict[str, bool]:
-    latest = get_latest_snapshot("LISTING_CACHE")
-    if not latest:
-        return {}
-    data = latest.get("data", {})
-    if data.get("date") != today or data.get("quoteAsset") != quote_asset:
-        return {}
-    return data.get("recent", {}) or {}
-
-
-def _load_drawdown_cache(today: str, quote_asset: str) -> Dict[str, bool]:
-    latest = get_latest_snapshot("DRAWDOWN_CACHE")
-    if not latest:
-        return {}
-    data = latest.get("data", {})
-    if data.get("date") != today or data.get("quoteAsset") != quote_asset:
-        return {}
-    return data.get("deep", {}) or {}
-
-
-def is_deep_drawdown_without_rebound(base_symbol: str,
-                                     quote_asset: str = QUOTE_ASSET,
-                                     min_drawdown_pct: float = 70.0,
-                                     max_drawdown_pct: float = 90.0,
-                                     rebound_ratio: float = 1.2,
-                                     days: int = None) -> bool:
-    if days is None:
-        days = CANDLE_LIMITS.get("1d", 120)
-    candles = get_candle_data_v2(base_symbol, quote_asset, interval="1d", size=days)
-    if len(candles) < 10:
-        return False
-
-    highs = [c["high"] for c in candles]
-    lows = [c["low"] for c in candles]
-    closes = [c["close"] for c in candles]
-
-    peak = max(highs)
-    if peak <= 0:
-        return False
-
-    current = closes[-1]
-    drawdown_pct = (1 - (current / peak)) * 100
-    if not (min_drawdown_pct <= drawdown_pct <= max_drawdown_pct):
-        return False
-
-    low = min(lows)
-    has_rebound = any(c["close"] >= low * rebound_ratio for c in candles)
-    return not has_rebound
+def prefilter_band(change_low: float = -20.0,
+                   change_high: float = -5.0,
+                   min_quote_volume: float = 10000.0,
+                   min_trade_count: int = 10):
+    """24h 통계 1차 조건 (change %, quote volume, trade count) → bool."""
+
+    def band(change_pct: float, quote_volume: float, trade_count: int) -> bool:
+        if not (change_low <= change_pct <= change_high):
+            return False
+        if change_pct <= -40:
+            return False
+        return quote_volume >= min_quote_volume and trade_count >= min_trade_count
+
+    return band
+
+
+def _verify_candidate(candidate: Tuple,
+                      quote_asset: str,
+                      max_new_listing_days: int) -> Tuple[Optional[Dict], Optional[Tuple]]:
+    """
+    후보 1개 보조 체크 (순차 스캔과 같은 순서/조기 종료).
+    반환: (통과 시 결과 dict, 장기 폭락 판정용 일봉 window (CandleStore.window)). 폭락 판정은 verify_candidates에서 배치로.
+    """
+    symbol_pair, base_symbol, change_pct, quote_volume, trade_count = candidate
+
+    if is_recent_listing(symbol_pair, max_days=max_new_listing_days):
+        return None, None
+
+    size_1h = CANDLE_LIMITS.get("1h", 1000)
+    # 디스크 저장소에 쌓인 캔들 이후분만 조회 (첫 스캔 이후에는 심볼당 몇 개 수준)
+    candles_1h = get_store().get_candles(symbol_pair, "1h", size_1h)
+    if len(candles_1h) < 3:
+        return None, None
+
+    # 일봉은 dict로 만들지 않고 저장소 컬럼 뷰 그대로 (폭락 판정이 배열로 바로 적재)
+    window_1d = get_store().window(format_symbol(base_symbol, quote_asset), "1d", get_drawdown_screener().days)
+
+    return {
+        "symbol": base_symbol,
+        "symbol_pair": symbol_pair,
+        "change_pct": change_pct,
+        "quote_volume": quote_volume,
+        "trade_count": trade_count
+    }, window_1d
+
+
+def verify_candidates(candidates: List[Tuple],
+                      quote_asset: str,
+                      max_new_listing_days: int,
+                      workers: int = STAGE1_WORKERS) -> List[Dict]:
+    """
+    후보별 REST 체크를 workers개 스레드로 병렬 실행 (REST 호출은 PRIORITY_SCAN으로 weight governor를 거친다).
+    남은 후보의 장기 폭락 + 반등 없음 판정은 끝난 뒤 DrawdownScreener로 한 번에 계산한다.
+    반환: 통과 목록 (후보 순서 그대로)
+    """
+    governor = get_governor()
+    waited_before = governor.stats["waited_sec"]
+
+    def check(candidate):
+        try:
+            with priority_scope(PRIORITY_SCAN):
+                return _verify_candidate(candidate, quote_asset, max_new_listing_days)
+        except Exception as e:
+            logger.warning(f"1차 필터 보조 체크 실패({candidate[0]}): {e}")
+            return None, None
+
+    if workers <= 1 or len(candidates) <= 1:
+        outcomes = [check(c) for c in candidates]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(candidates)), thread_name_prefix="stage1") as pool:
+            outcomes = list(pool.map(check, candidates))
+
+    get_listing_index().flush()
+    passed = [(result, window_1d) for result, window_1d in outcomes if result is not None]
+    deep = get_drawdown_screener().screen_windows({result["symbol_pair"]: window_1d for result, window_1d in passed})
+    results = [result for result, _ in passed if not deep.get(result["symbol_pair"])]
+    waited = governor.stats["waited_sec"] - waited_before
+    if waited > 0:
+        logger.info(f"1차 필터 weight 대기 (워커 합계): {waited:.1f}s")
+    return results
 
 
 def stage1_scan(quote_asset: str = QUOTE_ASSET,
@@ -128,90 +154,46 @@ def stage1_scan(quote_asset: str = QUOTE_ASSET,
     - 1h 캔들 1~2개 수준 제외
     - 장기 폭락(-70~-90%) + 반등 없음 제외
     """
-    symbols = get_spot_symbols(quote_asset)
-    tickers = get_all_tickers_24hr()
-    ticker_map = {t.get("symbol"): t for t in tickers if isinstance(t, dict)}
+    symbols = {info["symbol"]: info for info in get_spot_symbols(quote_asset)}
+    key = (change_low, change_high, min_quote_volume, min_trade_count)
+    band = prefilter_band(*key)
+
+    # 1) 24h 통계로 후보 축소: WS 통계표가 살아 있으면 메모리(통과 집합)만, 아니면 ticker/24hr 배치 REST
+    #    판정/crossing은 quote_asset spot universe만 (다른 quote pair는 거래량 단위도 다르고 선택될 수 없음)
+    table = get_ticker_table()
+    if table.is_live():
+        stats = table.matching(key, band, symbols.keys())
+    else:
+        # 스트림이 붙으면 같은 조건으로 crossing 감시가 바로 시작되도록 등록만 해 둔다
+        table.ensure_tracking(key, band, symbols.keys())
+        stats = {}
+        for t in get_all_tickers_24hr():
+            if not isinstance(t, dict) or not t.get("symbol"):
+                continue
+            row = (float(t.get("priceChangePercent", 0)), float(t.get("quoteVolume", 0)), int(t.get("count", 0)))
+            if band(*row):
+                stats[t["symbol"]] = row
 
-    results = []
     exclude = {s.upper() for s in (exclude_symbols or set())}
-    today = datetime.now(tz=timezone.utc).strftime("%Y-%m-%d")
-    listing_cache = _load_listing_cache(today, quote_asset)
-    listing_dirty = False
-    drawdown_cache = _load_drawdown_cache(today, quote_asset)
-    drawdown_dirty = False
-
-    # 1) ticker/24hr 배치로 후보 축소
     candidates = []
-    for info in sorted(symbols, key=lambda x: x["symbol"]):
-        symbol_pair = info["symbol"]
+    for symbol_pair in sorted(stats):
+        info = symbols.get(symbol_pair)
+        if info is None:
+            continue
         base_symbol = info["baseAsset"]
         if symbol_pair.upper() in exclude or base_symbol.upper() in exclude:
             continue
-        ticker = ticker_map.get(symbol_pair)
-        if not ticker:
-            continue
-
-        change_pct = float(ticker.get("priceChangePercent", 0))
-        if not (change_low <= change_pct <= change_high):
-            continue
-        if change_pct <= -40:
-            continue
-
-        quote_volume = float(ticker.get("quoteVolume", 0))
-        trade_count = int(ticker.get("count", 0))
-        if quote_volume < min_quote_volume or trade_count < min_trade_count:
-            continue
-
+        change_pct, quote_volume, trade_count = stats[symbol_pair]
         candidates.append((symbol_pair, base_symbol, change_pct, quote_volume, trade_count))
 
-    # 2) 후보만 REST 보조 체크
-    for symbol_pair, base_symbol, change_pct, quote_volume, trade_count in candidates:
-        cached_recent = listing_cache.get(symbol_pair)
-        if cached_recent is None:
-            cached_recent = is_recent_listing(symbol_pair, max_days=max_new_listing_days)
-            listing_cache[symbol_pair] = cached_recent
-            listing_dirty = True
-        if cached_recent:
-            continue
-
-        candles_1h = get_candle_data_v2(
-            base_symbol,
-            quote_asset,
-            interval="1h",
-            size=CANDLE_LIMITS.get("1h", 1000)
-        )
-        if len(candles_1h) < 3:
-            continue
-
-        cached_dd = drawdown_cache.get(base_symbol)
-        if cached_dd is None:
-            cached_dd = is_deep_drawdown_without_rebound(base_symbol, quote_asset)
-            drawdown_cache[base_symbol] = cached_dd
-            drawdown_dirty = True
-        if cached_dd:
-            continue
-
-        results.append({
-            "symbol": base_symbol,
-            "symbol_pair": symbol_pair,
-            "change_pct": change_pct,
-            "quote_volume": quote_volume,
-            "trade_count": trade_count
-        })
+    # 2) 후보만 REST 보조 체크 (워커 풀 + weight 예산, 결과 순서는 후보 순서 그대로)
+    results = verify_candidates(
+        candidates,
+        quote_asset,
+        max_new_listing_days,
+    )
 
     logger.info(f"✅ 1차 필터 통과 코인 수: {len(results)}")
-    if listing_dirty:
-        save_snapshot(
-            "LISTING_CACHE",
-            {"date": today, "quoteAsset": quote_asset, "recent": listing_cache},
-            force=True,
-        )
-    if drawdown_dirty:
-        save_snapshot(
-            "DRAWDOWN_CACHE",
-            {"date": today, "quoteAsset": quote_asset, "deep": drawdown_cache},
-            force=True,
-        )
     return results
 
 
@@ -0,0 +1,140 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from storage.repo import save_snapshot
+from utils.logger import logger
+
+STATE_BOOK_KIND = "STATE_BOOK"
+STATE_FLUSH_SEC = 60
+
+
+class SymbolState:
+    """심볼 1개의 매매 상태. dict 대신 __slots__ 레코드로 tick마다 할당이 생기지 않게 한다."""
+
+    __slots__ = (
+        "symbol",
+        "holding",
+        "qty",
+        "buy_price",
+        "high_price",
+        "low_price",
+        "last_price",
+        "cooldown_until",
+        "last_sell_time",
+        "last_summary_key",
+        "last_summary_ts",
+        "dirty",
+    )
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.holding = False
+        self.qty = 0.0
+        self.buy_price = 0.0
+        self.high_price = 0.0
+        self.low_price = None
+        self.last_price = 0.0
+        self.cooldown_until = 0.0
+        self.last_sell_time = 0.0
+        self.last_summary_key = ""
+        self.last_summary_ts = 0.0
+        self.dirty = False
+
+    def reset_position(self) -> None:
+        self.holding = False
+        self.qty = 0.0
+        self.buy_price = 0.0
+        self.high_price = 0.0
+        self.low_price = None
+        self.dirty = True
+
+    def open_position(self, price: float) -> None:
+        self.holding = True
+        self.buy_price = price
+        self.high_price = price
+        self.low_price = None
+        self.dirty = True
+
+    def set_qty(self, qty: float) -> None:
+        holding = qty > 0
+        if qty != self.qty or holding != self.holding:
+            self.qty = qty
+            self.holding = holding
+            self.dirty = True
+
+    def as_dict(self) -> Dict:
+        return {
+            "symbol": self.symbol,
+            "holding": self.holding,
+            "qty": self.qty,
+            "buy_price": self.buy_price,
+            "high_price": self.high_price,
+            "low_price": self.low_price,
+            "price": self.last_price,
+            "cooldown_until": self.cooldown_until,
+            "last_sell_time": self.last_sell_time,
+        }
+
+
+class StateRegistry:
+    """
+    심볼별 SymbolState 저장소.
+    - get(): O(1) 조회 (없으면 생성)
+    - snapshot(): 전체 북 dict 스냅샷
+    - flush(): 변경된 레코드가 있으면 STATE_BOOK 스냅샷 1건으로 일괄 저장
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, SymbolState] = {}
+        self._last_flush_ts = 0.0
+
+    def get(self, symbol: str) -> SymbolState:
+        key = symbol.upper()
+        state = self._states.get(key)
+        if state is None:
+            with self._lock:
+                state = self._states.get(key)
+                if state is None:
+                    state = SymbolState(key)
+                    self._states[key] = state
+        return state
+
+    def find(self, symbol: str) -> Optional[SymbolState]:
+        return self._states.get(symbol.upper())
+
+    def remove(self, symbol: str) -> None:
+        with self._lock:
+            self._states.pop(symbol.upper(), None)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {symbol: state.as_dict() for symbol, state in list(self._states.items())}
+
+    def flush(self, force: bool = False) -> int:
+        now = time.time()
+        if not force and now - self._last_flush_ts < STATE_FLUSH_SEC:
+            return 0
+        states = list(self._states.values())
+        dirty = [s for s in states if s.dirty]
+        if not dirty:
+            return 0
+        for s in dirty:
+            s.dirty = False
+        try:
+            save_snapshot(
+                STATE_BOOK_KIND,
+                {"ts": int(now), "states": {s.symbol: s.as_dict() for s in states}},
+                min_interval_sec=0,
+                force=True,
+            )
+        except Exception as e:
+            for s in dirty:
+                s.dirty = True
+            logger.warning(f"STATE_BOOK 저장 실패: {e}")
+            return 0
+        self._last_flush_ts = now
+        return len(dirty)
+
+
+STATE_REGISTRY = StateRegistry()
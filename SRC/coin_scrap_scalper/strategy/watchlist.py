@@ -0,0 +1,103 @@
+import threading
+from typing import Callable, FrozenSet, Iterable, List
+
+from storage.repo import save_snapshot
+from utils.logger import logger
+
+ACTIVE_WATCHLIST_KIND = "ACTIVE_WATCHLIST"
+
+
+class WatchlistEvent:
+    """watchlist 변경 1건. version은 publish마다 1씩 증가."""
+
+    __slots__ = ("version", "symbols", "added", "removed", "source")
+
+    def __init__(self, version: int, symbols: FrozenSet[str], added: FrozenSet[str], removed: FrozenSet[str], source: str):
+        self.version = version
+        self.symbols = symbols
+        self.added = added
+        self.removed = removed
+        self.source = source
+
+
+WatchlistCallback = Callable[[WatchlistEvent], None]
+
+
+class WatchlistService:
+    """
+    ACTIVE watchlist의 프로세스 내 단일 원본.
+    - publish(): 변경이 있을 때만 version 증가 → 구독자에게 즉시 전달 → snapshot 테이블에 미러 저장
+    - 구독자 호출과 저장은 같은 락 안에서 version 순서대로 (메인/심볼 스레드가 동시에 써도 역전 없음)
+    - 조회(symbols/contains)는 메모리만 읽는다. DB는 재시작 대비 기록용
+    """
+
+    def __init__(self, kind: str = ACTIVE_WATCHLIST_KIND):
+        self.kind = kind
+        self._lock = threading.RLock()
+        self._symbols: FrozenSet[str] = frozenset()
+        self._version = 0
+        self._subscribers: List[WatchlistCallback] = []
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def symbols(self) -> FrozenSet[str]:
+        return self._symbols
+
+    def contains(self, symbol: str) -> bool:
+        return symbol.upper() in self._symbols
+
+    def subscribe(self, callback: WatchlistCallback, replay: bool = False) -> None:
+        """replay=True면 현재 목록을 즉시 1회 전달."""
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+            if replay and self._version:
+                self._deliver(callback, WatchlistEvent(self._version, self._symbols, self._symbols, frozenset(), "replay"))
+
+    def unsubscribe(self, callback: WatchlistCallback) -> None:
+        with self._lock:
+            self._subscribers = [cb for cb in self._subscribers if cb != callback]
+
+    def publish(self, symbols: Iterable[str], source: str = "main") -> bool:
+        """목록 교체. 바뀐 게 없으면 False (version 유지, 저장 없음)."""
+        desired = frozenset(s.upper() for s in symbols)
+        with self._lock:
+            if self._version and desired == self._symbols:
+                return False
+            event = WatchlistEvent(
+                self._version + 1,
+                desired,
+                desired - self._symbols,
+                self._symbols - desired,
+                source,
+            )
+            self._symbols = desired
+            self._version = event.version
+            for callback in list(self._subscribers):
+                self._deliver(callback, event)
+            self._persist(event)
+        return True
+
+    def remove(self, symbol: str, source: str = "strategy") -> bool:
+        with self._lock:
+            key = symbol.upper()
+            if key not in self._symbols:
+                return False
+            return self.publish(self._symbols - {key}, source=source)
+
+    def _deliver(self, callback: WatchlistCallback, event: WatchlistEvent) -> None:
+        try:
+            callback(event)
+        except Exception:
+            logger.warning(f"watchlist 구독자 오류 (v{event.version})", exc_info=True)
+
+    def _persist(self, event: WatchlistEvent) -> None:
+        try:
+            save_snapshot(self.kind, sorted(event.symbols), min_interval_sec=0, force=True)
+        except Exception as e:
+            logger.warning(f"{self.kind} 스냅샷 저장 실패 (v{event.version}): {e}")
+
+
+WATCHLIST = WatchlistService()
@@ -1,148 +1,49 @@
 import requests
+import time
 import uuid
 import math
-import time
-from decimal import Decimal, ROUND_DOWN
-from config.auth import build_signed_params
-from config.exchange import BINANCE_BASE_URL, QUOTE_ASSET
-from data.fetch_balance import fetch_active_balances
+from decimal import Decimal
+from config.exchange import QUOTE_ASSET
 from utils.symbols import format_symbol
-from utils.telegram import send_telegram_message
+from utils.exchange_catalog import get_catalog
+from utils.lot_math import get_constraints, round_down_qty
+from utils import codec
+from utils.exchange_client import get_client
+from utils.latency import span, timed
 from utils.logger import logger
-from storage.repo import append_trade, append_event
-
-_LOT_CACHE = {}
-_MIN_NOTIONAL_CACHE = {}
-_LOT_CACHE_TS = 0.0
-_LOT_CACHE_TTL_SEC = 6 * 3600
-
-
-def _extract_lot(symbol_pair: str, symbols):
-    if not symbols:
-        return None
-    target = None
-    for s in symbols:
-        if s.get("symbol") == symbol_pair:
-            target = s
-            break
-    if not target:
-        return None
-    filters = target.get("filters", [])
-    for f in filters:
-        if f.get("filterType") == "LOT_SIZE":
-            return f
-    return None
+from utils.side_effects import notify, record_event, record_trade
+from utils.user_stream import get_balances
+from utils.weight_governor import RequestBanned
 
-
-def _extract_min_notional(symbol_pair: str, symbols):
-    if not symbols:
-        return None
-    target = None
-    for s in symbols:
-        if s.get("symbol") == symbol_pair:
-            target = s
-            break
-    if not target:
-        return None
-    filters = target.get("filters", [])
-    for f in filters:
-        if f.get("filterType") == "MIN_NOTIONAL":
-            return f
-    return None
+# 주문 POST가 응답 없이 끊겼을 때 origClientOrderId로 체결 여부 조회 (GET /api/v3/order weight 4)
+ORDER_LOOKUP_ATTEMPTS = 3
+ORDER_LOOKUP_DELAY_SEC = 1.0
+ORDER_LOOKUP_WEIGHT = 4
+# 조회 결과 이 상태이고 체결 수량이 0이면 주문 실패로 본다
+_DEAD_ORDER_STATUSES = ("CANCELED", "REJECTED", "EXPIRED", "EXPIRED_IN_MATCH")
 
 
-def _refresh_lot_cache_full() -> bool:
-    global _LOT_CACHE_TS
-    try:
-        res = requests.get(f"{BINANCE_BASE_URL}/api/v3/exchangeInfo", timeout=8)
-        if res.status_code != 200:
-            return False
-        data = res.json()
-        updated = 0
-        for s in data.get("symbols", []):
-            symbol = s.get("symbol")
-            if not symbol:
-                continue
-            lot = _extract_lot(symbol, [s])
-            if not lot:
-                continue
-            min_qty = lot.get("minQty")
-            step = lot.get("stepSize")
-            if not min_qty or not step:
-                continue
-            if Decimal(str(step)) <= 0 or Decimal(str(min_qty)) <= 0:
-                continue
-            _LOT_CACHE[symbol] = (str(min_qty), str(step))
-            mn = _extract_min_notional(symbol, [s])
-            if mn:
-                val = mn.get("minNotional")
-                if val:
-                    _MIN_NOTIONAL_CACHE[symbol] = str(val)
-            updated += 1
-        if updated:
-            _LOT_CACHE_TS = time.time()
-        return updated > 0
-    except Exception as e:
-        logger.warning(f"LOT_SIZE 전체 캐시 갱신 실패: {e}")
-        return False
+class OrderOutcomeUnknown(Exception):
+    """주문 요청이 응답 없이 끊겼고 조회로도 체결 여부를 확인하지 못함 (재전송하면 중복 주문 위험)."""
 
+    def __init__(self, symbol: str, client_order_id: str, reason: str):
+        super().__init__(f"{symbol} clientOrderId={client_order_id}: {reason}")
+        self.symbol = symbol
+        self.client_order_id = client_order_id
 
 def _get_lot_size(symbol_pair: str):
-    cached = _LOT_CACHE.get(symbol_pair)
-    if cached:
-        return cached
-
     try:
-        res = requests.get(f"{BINANCE_BASE_URL}/api/v3/exchangeInfo", params={"symbol": symbol_pair}, timeout=5)
-        if res.status_code == 200:
-            data = res.json()
-            symbols = data.get("symbols", [])
-            lot = _extract_lot(symbol_pair, symbols)
-            mn = _extract_min_notional(symbol_pair, symbols)
-            if mn:
-                val = mn.get("minNotional")
-                if val:
-                    _MIN_NOTIONAL_CACHE[symbol_pair] = str(val)
-        else:
-            lot = None
-        if not lot:
-            now = time.time()
-            if not _LOT_CACHE or (now - _LOT_CACHE_TS) > _LOT_CACHE_TTL_SEC:
-                _refresh_lot_cache_full()
-            return _LOT_CACHE.get(symbol_pair)
-        if not lot:
-            return None
-        min_qty = lot.get("minQty")
-        step = lot.get("stepSize")
-        if not min_qty or not step:
-            return None
-        if Decimal(str(step)) <= 0 or Decimal(str(min_qty)) <= 0:
-            return None
-        _LOT_CACHE[symbol_pair] = (str(min_qty), str(step))
-        return _LOT_CACHE[symbol_pair]
+        return get_catalog().lot(symbol_pair)
     except Exception as e:
         logger.warning(f"LOT_SIZE 조회 실패: {symbol_pair} {e}")
         return None
 
 
 def _adjust_qty(symbol_pair: str, qty: float):
-    lot = _get_lot_size(symbol_pair)
-    if not lot:
-        return None
-    min_qty, step = lot
-    d_qty = Decimal(str(qty))
-    d_step = Decimal(step)
-    if d_step <= 0:
+    c = get_constraints(symbol_pair)
+    if c is None:
         return None
-    d_min = Decimal(min_qty)
-    if d_qty < d_min:
-        return None
-    adj = (d_qty // d_step) * d_step
-    if adj < d_min:
-        return None
-    precision = abs(d_step.as_tuple().exponent)
-    adj_str = format(adj.quantize(Decimal(10) ** -precision, rounding=ROUND_DOWN), "f")
-    return adj_str
+    return round_down_qty(c, qty)
 
 
 def get_lot_size(symbol: str):
@@ -160,16 +61,82 @@ def get_symbol_filters(symbol: str):
     if not lot:
         return None
     min_qty, step = lot
-    min_notional = _MIN_NOTIONAL_CACHE.get(symbol_pair)
+    min_notional = get_catalog().min_notional(symbol_pair)
     d_min_notional = Decimal(min_notional) if min_notional else None
     return Decimal(min_qty), Decimal(step), d_min_notional
 
 
+def _post_order(symbol: str, params: dict, kind: str):
+    """
+    서명 + 공용 세션으로 주문 전송. 서명/네트워크 실패 시 None.
+    전송 후 응답이 끊기면(read timeout 등) newClientOrderId로 조회해 그 결과 응답을 돌려준다.
+    조회도 실패하면 OrderOutcomeUnknown (호출 측은 재전송하지 말고 잔고로 확인).
+    """
+    try:
+        return get_client().post("/api/v3/order", params, signed=True)
+    except (RequestBanned, requests.ConnectTimeout) as e:
+        # 보내기 전에 막힘/연결 실패: 주문은 나가지 않았다
+        logger.error(f"❌ {kind} 주문 요청 실패: {symbol} {e}")
+        record_event(level="ERROR", type="ORDER_ERROR", symbol=symbol.upper(), message=f"request failed: {e}")
+        return None
+    except requests.RequestException as e:
+        logger.error(f"❌ {kind} 주문 응답 없음 → 체결 여부 조회: {symbol} {e}")
+        return _lookup_order(symbol, params, kind, e)
+    except Exception as e:
+        logger.error(f"❌ 인증 파라미터 생성 실패: {e}")
+        return None
+
+
+def _lookup_order(symbol: str, params: dict, kind: str, cause: Exception):
+    """
+    GET /api/v3/order?origClientOrderId= 로 주문 결과 확인.
+    - 주문 있음: 그 응답 (체결 없이 취소/만료된 주문이면 None)
+    - 끝까지 -2013(주문 없음): 접수되지 않은 주문 → None
+    - 조회 자체가 계속 실패: OrderOutcomeUnknown
+    """
+    client_order_id = params["newClientOrderId"]
+    query = {"symbol": params["symbol"], "origClientOrderId": client_order_id}
+    reason = str(cause)
+    not_found = 0
+    for attempt in range(ORDER_LOOKUP_ATTEMPTS):
+        if attempt:
+            time.sleep(ORDER_LOOKUP_DELAY_SEC)
+        try:
+            response = get_client().get("/api/v3/order", query, signed=True, weight=ORDER_LOOKUP_WEIGHT)
+        except requests.RequestException as e:
+            reason = str(e)
+            continue
+        if response.status_code == 200:
+            data = codec.loads(response.content)
+            if data.get("status") in _DEAD_ORDER_STATUSES and not float(data.get("executedQty") or 0):
+                logger.error(f"⚠️ {kind} 주문 미체결 확인: {symbol} status={data.get('status')}")
+                record_event(level="ERROR", type="ORDER_ERROR", symbol=symbol.upper(),
+                             message=f"request failed ({cause}); order {data.get('status')}")
+                return None
+            logger.info(f"🔎 {kind} 주문 조회로 확인: {symbol} status={data.get('status')}")
+            return response
+        err = codec.loads(response.content) if response.content else {"msg": response.text}
+        reason = str(err)
+        if not (isinstance(err, dict) and err.get("code") == -2013):
+            break
+        # 처리 중인 주문도 잠깐 -2013일 수 있어 매번 없어야 미접수로 본다
+        not_found += 1
+    if not_found == ORDER_LOOKUP_ATTEMPTS:
+        logger.error(f"⚠️ {kind} 주문 미접수 확인: {symbol} clientOrderId={client_order_id}")
+        record_event(level="ERROR", type="ORDER_ERROR", symbol=symbol.upper(),
+                     message=f"request failed ({cause}); order not found")
+        return None
+    logger.error(f"❌ {kind} 주문 체결 여부 미확인: {symbol} clientOrderId={client_order_id} {reason}")
+    record_event(level="ERROR", type="ORDER_UNKNOWN", symbol=symbol.upper(),
+                 message=f"clientOrderId={client_order_id}: {reason}")
+    raise OrderOutcomeUnknown(symbol, client_order_id, reason)
+
+
+@timed("order.limit.total")
 def place_limit_order(symbol: str, price: float, qty: float, side: str = "BUY", retry: int = 0):
     """
     지정가 주문 (LIMIT)
     """
-    url = f"{BINANCE_BASE_URL}/api/v3/order"
     params = {
         "symbol": format_symbol(symbol, QUOTE_ASSET),
         "side": side.upper(),
@@ -179,34 +146,34 @@ def place_limit_order(symbol: str, price: float, qty: float, side: str = "BUY",
         "quantity": str(qty),
         "newClientOrderId": str(uuid.uuid4())[:16]
     }
-    try:
-        headers, signed = build_signed_params(params)
-    except Exception as e:
-        logger.error(f"❌ 인증 파라미터 생성 실패: {e}")
+    with span("order.post"):
+        response = _post_order(symbol, params, "LIMIT")
+    if response is None:
         return None
-    response = requests.post(url, headers=headers, params=signed)
 
     if response.status_code in (200, 201):
-        data = response.json()
+        with span("order.parse"):
+            data = codec.loads(response.content)
         logger.info(f"✅ LIMIT {side} 주문 성공: {symbol} @ {price} x {qty}")
-        send_telegram_message(
-            f"📈 {'매수' if side=='BUY' else '매도'} 완료 (지정가): {symbol} {qty}개 @ {price} {QUOTE_ASSET}"
-        )
-        append_trade(
-            symbol=symbol.upper(),
-            side=side.upper(),
-            qty=float(qty),
-            price=float(price),
-            quote_qty=float(price) * float(qty),
-            order_id=str(data.get("orderId")) if isinstance(data, dict) else None,
-            reason="LIMIT",
-            raw=data,
-        )
+        with span("order.side_effects"):
+            notify(
+                f"📈 {'매수' if side=='BUY' else '매도'} 완료 (지정가): {symbol} {qty}개 @ {price} {QUOTE_ASSET}"
+            )
+            record_trade(
+                symbol=symbol.upper(),
+                side=side.upper(),
+                qty=float(qty),
+                price=float(price),
+                quote_qty=float(price) * float(qty),
+                order_id=str(data.get("orderId")) if isinstance(data, dict) else None,
+                reason="LIMIT",
+                raw=data,
+            )
         return data
 
-    err = response.json() if response.content else {"msg": response.text}
+    err = codec.loads(response.content) if response.content else {"msg": response.text}
     logger.error(f"⚠️ LIMIT 주문 실패: {err}")
-    append_event(level="ERROR", type="ORDER_ERROR", symbol=symbol.upper(), message=str(err))
+    record_event(level="ERROR", type="ORDER_ERROR", symbol=symbol.upper(), message=str(err))
     return None
 
 
@@ -218,6 +185,7 @@ def sell_limit(symbol: str, price: float, qty: float):
     return place_limit_order(symbol, price, qty, side="SELL")
 
 
+@timed("order.market.total")
 def place_market_order(symbol: str,
                        amount: float = None,
                        qty: float = None,
@@ -226,13 +194,14 @@ def place_market_order(symbol: str,
                        retry: int = 0):
     """
     시장가 주문 (MARKET)
+    응답이 끊겨 체결 여부를 끝내 확인하지 못하면 OrderOutcomeUnknown.
     """
-    url = f"{BINANCE_BASE_URL}/api/v3/order"
     symbol_pair = format_symbol(symbol, QUOTE_ASSET)
     params = {
         "symbol": symbol_pair,
         "side": side.upper(),
-        "type": "MARKET"
+        "type": "MARKET",
+        "newClientOrderId": str(uuid.uuid4())[:16]
     }
     if side.upper() == "BUY":
         if amount is None:
@@ -244,7 +213,7 @@ def place_market_order(symbol: str,
         adj_qty = _adjust_qty(symbol_pair, qty)
         if adj_qty is None:
             logger.error(f"MARKET SELL 수량 보정 실패(LOT_SIZE): {symbol_pair} qty={qty}")
-            append_event(level="ERROR", type="ORDER_ERROR", symbol=symbol.upper(), message="LOT_SIZE adjust failed or too small")
+            record_event(level="ERROR", type="ORDER_ERROR", symbol=symbol.upper(), message="LOT_SIZE adjust failed or too small")
             return None
         params["quantity"] = adj_qty
     if limit_price is not None:
@@ -252,45 +221,45 @@ def place_market_order(symbol: str,
 
     logger.info(f"📈 MARKET {side} 주문: {symbol} {amount} {QUOTE_ASSET}, params {params}")
 
-    try:
-        headers, signed = build_signed_params(params)
-    except Exception as e:
-        logger.error(f"❌ 인증 파라미터 생성 실패: {e}")
+    with span("order.post"):
+        response = _post_order(symbol, params, "MARKET")
+    if response is None:
         return None
-    response = requests.post(url, headers=headers, params=signed)
 
     if response.status_code in (200, 201):
-        data = response.json()
-        executed = data.get("executedQty") or data.get("origQty")
-        quote_qty = data.get("cummulativeQuoteQty") or data.get("quoteOrderQty")
-        fee = None
-        fee_asset = None
-        fills = data.get("fills", []) if isinstance(data, dict) else []
-        if fills:
-            try:
-                fee = sum(float(f.get("commission", 0)) for f in fills)
-                fee_asset = fills[0].get("commissionAsset")
-            except Exception:
-                fee = None
+        with span("order.parse"):
+            data = codec.loads(response.content)
+            executed = data.get("executedQty") or data.get("origQty")
+            quote_qty = data.get("cummulativeQuoteQty") or data.get("quoteOrderQty")
+            fee = None
+            fee_asset = None
+            fills = data.get("fills", []) if isinstance(data, dict) else []
+            if fills:
+                try:
+                    fee = sum(float(f.get("commission", 0)) for f in fills)
+                    fee_asset = fills[0].get("commissionAsset")
+                except Exception:
+                    fee = None
         logger.info(f"✅ MARKET {side} 주문 성공: {symbol} x{executed} @ 시장가")
-        send_telegram_message(f"📈 {'매수' if side=='BUY' else '매도'} 완료 (시장가): {symbol} {executed}개 @ 시장가")
-        append_trade(
-            symbol=symbol.upper(),
-            side=side.upper(),
-            qty=float(executed) if executed else 0.0,
-            price=None,
-            quote_qty=float(quote_qty) if quote_qty else None,
-            fee=fee,
-            fee_asset=fee_asset,
-            order_id=str(data.get("orderId")) if isinstance(data, dict) else None,
-            reason="MARKET",
-            raw=data,
-        )
+        with span("order.side_effects"):
+            notify(f"📈 {'매수' if side=='BUY' else '매도'} 완료 (시장가): {symbol} {executed}개 @ 시장가")
+            record_trade(
+                symbol=symbol.upper(),
+                side=side.upper(),
+                qty=float(executed) if executed else 0.0,
+                price=None,
+                quote_qty=float(quote_qty) if quote_qty else None,
+                fee=fee,
+                fee_asset=fee_asset,
+                order_id=str(data.get("orderId")) if isinstance(data, dict) else None,
+                reason="MARKET",
+                raw=data,
+            )
         return data
 
-    err = response.json() if response.content else {"msg": response.text}
+    err = codec.loads(response.content) if response.content else {"msg": response.text}
     logger.error(f"⚠️ MARKET 주문 실패: {err}")
-    append_event(level="ERROR", type="ORDER_ERROR", symbol=symbol.upper(), message=str(err))
+    record_event(level="ERROR", type="ORDER_ERROR", symbol=symbol.upper(), message=str(err))
     return None
 
 
@@ -302,7 +271,7 @@ def sell_market(symbol: str, qty: float, limit_price: float = None):
     return place_market_order(symbol, qty=qty, side="SELL", limit_price=limit_price)
 
 def sell_market_all(symbol: str):
-    balances, _ = fetch_active_balances()
+    balances, _ = get_balances()
     for b in balances:
         if b["symbol"].upper() == symbol.upper():
             qty = float(b["available"])
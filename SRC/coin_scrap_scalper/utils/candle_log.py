@@ -1,8 +1,12 @@
+import threading
 import time
-from data.fetch_price import get_candle_data_v2
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.exchange import QUOTE_ASSET
+from utils.candle_store import get_store
+from utils.symbols import format_symbol
 
-# in-memory cache to avoid JSON file explosion
-_CANDLE_CACHE = {}
 _CACHE_TTL_SEC = {
     "1m": 30,
     "5m": 60,
@@ -12,29 +16,115 @@ _CACHE_TTL_SEC = {
     "4h": 1200,
     "1d": 3600,
 }
+# 캐시 전체 캔들 수 상한 (넘으면 가장 오래 안 쓴 시리즈부터 제거)
+CANDLE_CACHE_MAX_ROWS = 200_000
+
+Key = Tuple[str, str]
+
+
+class CandleCache:
+    """
+    (pair, tf)당 1개 윈도우만 두는 LRU 캐시.
+    - 더 큰 size로 받아 둔 윈도우는 작은 size 요청을 슬라이스로 처리
+    - 같은 키 동시 miss는 조회 1번으로 합치고 나머지 스레드는 결과를 기다린다 (single-flight)
+    - 전체 캔들 수가 max_rows를 넘으면 LRU부터 제거
+    """
+
+    def __init__(self, fetch: Callable[[str, str, int, float], List[Dict]],
+                 ttl_sec: Optional[Dict[str, float]] = None,
+                 max_rows: int = CANDLE_CACHE_MAX_ROWS):
+        self._fetch = fetch
+        self._ttl = dict(_CACHE_TTL_SEC if ttl_sec is None else ttl_sec)
+        self._max_rows = max_rows
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Key, Dict]" = OrderedDict()
+        self._inflight: Dict[Key, threading.Event] = {}
+        self._rows = 0
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    def ttl(self, tf: str) -> float:
+        return self._ttl.get(tf, 60)
+
+    def _lookup_locked(self, key: Key, size: int, now: float) -> Optional[List[Dict]]:
+        entry = self._entries.get(key)
+        if entry is None or entry["size"] < size or now - entry["ts"] >= self.ttl(key[1]):
+            return None
+        self._entries.move_to_end(key)
+        data = entry["data"]
+        return data if size >= len(data) else data[-size:]
 
+    def _store_locked(self, key: Key, size: int, data: List[Dict], ts: float) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._rows -= len(old["data"])
+        self._entries[key] = {"ts": ts, "size": size, "data": data}
+        self._rows += len(data)
+        while self._rows > self._max_rows and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._rows -= len(evicted["data"])
+            self.stats["evictions"] += 1
 
-def _cache_key(symbol: str, tf: str, size: int) -> str:
-    return f"{symbol.upper()}:{tf}:{size}"
+    def get(self, pair: str, tf: str, size: int) -> List[Dict]:
+        key = (pair.upper(), tf)
+        waited = False
+        while True:
+            with self._lock:
+                now = time.time()
+                data = self._lookup_locked(key, size, now)
+                if data is not None:
+                    self.stats["coalesced" if waited else "hits"] += 1
+                    return data
+                flight = self._inflight.get(key)
+                if flight is None:
+                    # 캐시된 윈도우가 더 크면 그 크기로 다시 받아 큰 요청도 계속 슬라이스로 처리
+                    entry = self._entries.get(key)
+                    fetch_size = max(size, entry["size"]) if entry else size
+                    flight = self._inflight[key] = threading.Event()
+                    self.stats["misses"] += 1
+                    break
+            # 같은 키를 이미 누가 조회 중 → 끝나면 캐시를 다시 본다 (더 큰 size가 필요하면 그때 직접 조회)
+            flight.wait()
+            waited = True
+
+        started = time.time()
+        try:
+            data = self._fetch(key[0], tf, fetch_size, self.ttl(tf))
+            if data:
+                with self._lock:
+                    self._store_locked(key, fetch_size, data, started)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.set()
+        if not data:
+            return data
+        return data if size >= len(data) else data[-size:]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"series": len(self._entries), "rows": self._rows, **self.stats}
+
+
+def _fetch_from_store(pair: str, tf: str, size: int, ttl: float) -> List[Dict]:
+    # 디스크 저장소: 마지막 open_time 이후 캔들만 REST 조회
+    return get_store().get_candles(pair, tf, size, max_age_sec=ttl)
+
+
+_CACHE = CandleCache(_fetch_from_store)
 
 
 def get_candles(symbol: str, tf: str, size: int):
     """
-    지정된 tf(timeframe) 캐시가 있으면 로드, 없으면 API 호출 후 메모리 캐시에 저장하여 반환
+    지정된 tf(timeframe) 캐시가 있으면 로드, 없으면 캔들 저장소(utils.candle_store)에서 받아 메모리 캐시에 저장하여 반환
     tf: '1d', '1h', '15m', '30m', '5m', '1m'
     size: 조회할 캔들 수
     """
-    key = _cache_key(symbol, tf, size)
-    ttl = _CACHE_TTL_SEC.get(tf, 60)
-    now = time.time()
-    cached = _CANDLE_CACHE.get(key)
-    if cached and (now - cached["ts"]) < ttl:
-        return cached["data"]
-
-    candles = get_candle_data_v2(symbol, interval=tf, size=size)
-    if candles:
-        _CANDLE_CACHE[key] = {"ts": now, "data": candles}
-    return candles
+    return _CACHE.get(format_symbol(symbol, QUOTE_ASSET), tf, size)
+
+
+def cache_stats() -> Dict:
+    """hit/miss/coalesced/eviction 카운터 + 현재 시리즈/캔들 수."""
+    return _CACHE.snapshot()
 
 # 편의 함수
 
@@ -0,0 +1,406 @@
+import mmap
+import os
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.exchange_client import get_client
+from utils.logger import logger
+
+STORE_DIR = Path("storage") / "candles"
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("open_time", "q"),
+    ("open", "d"),
+    ("high", "d"),
+    ("low", "d"),
+    ("close", "d"),
+    ("volume", "d"),
+)
+INTERVAL_MS = {
+    "1m": 60_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+    "1d": 86_400_000,
+}
+# 진행 중 캔들 재조회 주기 (이 간격 안에서는 디스크/메모리만 읽는다)
+REFRESH_SEC = {
+    "1m": 30,
+    "5m": 60,
+    "15m": 120,
+    "30m": 180,
+    "1h": 600,
+    "4h": 1200,
+    "1d": 3600,
+}
+# 심볼·주기별 보관 행 수. 넘으면 오래된 쪽을 잘라 파일을 다시 쓴다 (1m 1년, 나머지 약 2년치)
+KEEP_ROWS = {"1m": 527_040, "5m": 210_816, "1h": 17_568, "1d": 1_000}
+DEFAULT_KEEP_ROWS = 20_000
+FETCH_LIMIT = 1000
+MAX_REPAIR_GAPS = 20
+# 요청 size보다 저장분이 짧으면 과거 쪽을 받아 앞에 붙인다. 더 받을 게 없으면(상장 직후 등) 이 간격마다만 재시도
+BACKFILL_RETRY_SEC = 3600
+
+Fetcher = Callable[..., List[Dict]]
+
+
+def fetch_klines(symbol_pair: str, interval: str, limit: int,
+                 start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[Dict]:
+    params = {"symbol": symbol_pair, "interval": interval, "limit": limit}
+    if start_time is not None:
+        params["startTime"] = start_time
+    if end_time is not None:
+        params["endTime"] = end_time
+    res = get_client().get("/api/v3/klines", params=params)
+    if res.status_code != 200:
+        raise RuntimeError(f"klines {symbol_pair} {interval} status {res.status_code}")
+    return [
+        {
+            "open_time": int(row[0]),
+            "open": float(row[1]),
+            "high": float(row[2]),
+            "low": float(row[3]),
+            "close": float(row[4]),
+            "volume": float(row[5]),
+        }
+        for row in res.json()
+    ]
+
+
+class CandleView:
+    """마감 캔들 구간의 컬럼 뷰 (mmap 위 memoryview, 복사 없음)."""
+
+    __slots__ = ("open_time", "open", "high", "low", "close", "volume")
+
+    def __init__(self, columns: Dict[str, memoryview]):
+        for name, _ in COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self) -> int:
+        return len(self.open_time)
+
+    def numpy(self) -> Dict:
+        """numpy 배열 dict (np.frombuffer라 복사 없음). numpy 미설치 시 ImportError."""
+        import numpy as np
+
+        return {name: np.frombuffer(getattr(self, name), dtype=np.int64 if code == "q" else np.float64)
+                for name, code in COLUMNS}
+
+
+class _Series:
+    """
+    (pair, interval) 1개의 컬럼 파일 묶음: <root>/<PAIR>/<interval>.<column>
+    마감 캔들만 append, 진행 중 캔들은 live로 메모리에만 둔다.
+    """
+
+    def __init__(self, root: Path, pair: str, interval: str):
+        self.pair = pair
+        self.interval = interval
+        self.step = INTERVAL_MS[interval]
+        self.dir = root / pair
+        self.lock = threading.Lock()
+        self.count = 0
+        self.live: Optional[Dict] = None
+        self.refreshed_ts = 0.0
+        self.checked = False
+        self.history_start: Optional[int] = None
+        self.backfill_retry_ts = 0.0
+        self._maps: Dict[str, Optional[mmap.mmap]] = {}
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._open()
+
+    def _path(self, column: str) -> Path:
+        return self.dir / f"{self.interval}.{column}"
+
+    def _open(self) -> None:
+        # 컬럼 길이가 다르면(쓰다 죽은 경우) 가장 짧은 쪽에 맞춘다
+        sizes = [self._path(name).stat().st_size // 8 if self._path(name).exists() else 0 for name, _ in COLUMNS]
+        count = min(sizes)
+        for name, _ in COLUMNS:
+            with open(self._path(name), "ab") as f:
+                f.truncate(count * 8)
+        self.count = count
+        self._remap()
+        times = self.column("open_time")
+        for i in range(1, len(times)):
+            if times[i] <= times[i - 1]:
+                logger.warning(f"캔들 저장소 순서 오류 → {i}행 이후 폐기: {self.pair} {self.interval}")
+                self._truncate_tail(i)
+                break
+
+    def _remap(self) -> None:
+        # 기존 mmap은 닫지 않는다 (밖으로 나간 뷰가 계속 유효하도록, 참조가 끊기면 해제)
+        maps = {}
+        for name, _ in COLUMNS:
+            if self.count == 0:
+                maps[name] = None
+                continue
+            with open(self._path(name), "rb") as f:
+                maps[name] = mmap.mmap(f.fileno(), self.count * 8, access=mmap.ACCESS_READ)
+        self._maps = maps
+
+    def column(self, name: str, start: int = 0, end: Optional[int] = None) -> memoryview:
+        code = dict(COLUMNS)[name]
+        m = self._maps.get(name)
+        if m is None:
+            return memoryview(array(code))
+        return memoryview(m).cast(code)[start:end]
+
+    def last_open_time(self) -> Optional[int]:
+        if self.count == 0:
+            return None
+        return self.column("open_time")[self.count - 1]
+
+    def rows(self, start: int, end: int) -> List[Dict]:
+        cols = [(name, self.column(name, start, end)) for name, _ in COLUMNS]
+        return [{name: col[i] for name, col in cols} for i in range(end - start)]
+
+    def append(self, candles: List[Dict]) -> None:
+        if not candles:
+            return
+        for name, code in COLUMNS:
+            with open(self._path(name), "ab") as f:
+                f.write(array(code, [c[name] for c in candles]).tobytes())
+        self.count += len(candles)
+        self._remap()
+
+    def prepend(self, candles: List[Dict]) -> None:
+        """open_time이 저장분 첫 캔들보다 앞선 캔들을 앞에 붙인다."""
+        if not candles:
+            return
+        self._rewrite({name: array(code, [c[name] for c in candles]) + array(code, self.column(name))
+                       for name, code in COLUMNS})
+
+    def _rewrite(self, candles_by_column: Dict[str, array]) -> None:
+        for name, _ in COLUMNS:
+            tmp = self._path(name).with_suffix(f".{name}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(candles_by_column[name].tobytes())
+            os.replace(tmp, self._path(name))
+        self.count = len(candles_by_column["open_time"])
+        self._remap()
+
+    def _truncate_tail(self, keep: int) -> None:
+        self._rewrite({name: array(code, self.column(name, 0, keep)) for name, code in COLUMNS})
+
+    def keep_last(self, rows: int) -> None:
+        start = max(0, self.count - rows)
+        self._rewrite({name: array(code, self.column(name, start)) for name, code in COLUMNS})
+
+    def merge(self, candles: List[Dict]) -> int:
+        """중간(갭) 캔들을 open_time 순서에 끼워 넣는다. 추가된 수 반환."""
+        by_time = {c["open_time"]: c for c in self.rows(0, self.count)}
+        before = len(by_time)
+        for c in candles:
+            by_time.setdefault(c["open_time"], c)
+        if len(by_time) == before:
+            return 0
+        ordered = [by_time[t] for t in sorted(by_time)]
+        self._rewrite({name: array(code, [c[name] for c in ordered]) for name, code in COLUMNS})
+        return len(by_time) - before
+
+    def gaps(self) -> List[Tuple[int, int]]:
+        """저장된 구간의 빈 곳 [(앞 캔들 open_time, 뒤 캔들 open_time)]."""
+        times = self.column("open_time")
+        step = self.step
+        return [(times[i - 1], times[i]) for i in range(1, len(times)) if times[i] - times[i - 1] > step]
+
+
+class CandleStore:
+    """
+    (pair, interval)별 디스크 캔들 저장소 (컬럼별 파일 + mmap).
+    - get_candles(): REFRESH_SEC가 지났을 때만 마지막 open_time 이후 캔들만 조회해 append
+    - 저장분이 요청 size보다 짧으면 첫 open_time 이전 캔들을 거꾸로 받아 앞에 붙임 (작은 요청으로 먼저 만들어진 시리즈도)
+    - 처음 여는 시리즈는 내부 갭을 찾아 해당 구간만 재조회해 메움 (거래소 자체 공백은 그대로 남음)
+    - view(): 마감 캔들 컬럼을 복사 없이 반환 (numpy 변환도 zero-copy)
+    - window(): get_candles()와 같은 구간을 컬럼 뷰 + 진행 중 캔들로 (일괄 배열 계산용)
+    """
+
+    def __init__(self, root: Path = STORE_DIR, fetch: Fetcher = fetch_klines):
+        self.root = Path(root)
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self.stats = {"refreshes": 0, "fetched_rows": 0, "backfills": 0, "repaired_rows": 0, "history_rows": 0, "errors": 0}
+
+    def series(self, pair: str, interval: str) -> _Series:
+        key = (pair.upper(), interval)
+        s = self._series.get(key)
+        if s is None:
+            with self._lock:
+                s = self._series.get(key)
+                if s is None:
+                    s = self._series[key] = _Series(self.root, key[0], interval)
+        return s
+
+    def _fetch_since(self, s: _Series, start: int, now_ms: int) -> List[Dict]:
+        out: List[Dict] = []
+        while True:
+            missing = (now_ms - start) // s.step + 1
+            limit = int(max(1, min(FETCH_LIMIT, missing)))
+            batch = self._fetch(s.pair, s.interval, limit, start_time=start)
+            out.extend(batch)
+            if not batch or len(batch) < limit or batch[-1]["open_time"] + s.step > now_ms:
+                return out
+            start = batch[-1]["open_time"] + s.step
+
+    def _fetch_range(self, s: _Series, start: int, end: int) -> List[Dict]:
+        out: List[Dict] = []
+        while start <= end:
+            batch = self._fetch(s.pair, s.interval, FETCH_LIMIT, start_time=start, end_time=end)
+            out.extend(batch)
+            if len(batch) < FETCH_LIMIT:
+                break
+            start = batch[-1]["open_time"] + s.step
+        return out
+
+    def _repair(self, s: _Series) -> None:
+        for prev, nxt in s.gaps()[:MAX_REPAIR_GAPS]:
+            rows = self._fetch_range(s, prev + s.step, nxt - s.step)
+            added = s.merge(rows) if rows else 0
+            self.stats["repaired_rows"] += added
+            if added:
+                logger.info(f"캔들 갭 복구: {s.pair} {s.interval} +{added}")
+
+    def _backfill(self, s: _Series, rows: int) -> int:
+        """저장분 첫 캔들 이전 캔들을 최대 rows개 (endTime = 첫 open_time - step부터 거꾸로) 받아 앞에 붙인다."""
+        first = s.column("open_time")[0]
+        older: List[Dict] = []
+        end = first - s.step
+        while rows > 0:
+            limit = int(min(FETCH_LIMIT, rows))
+            batch = [r for r in self._fetch(s.pair, s.interval, limit, end_time=end) if r["open_time"] < first]
+            older = batch + older
+            if len(batch) < limit:
+                # 요청보다 적게 왔으면 거래소의 첫 캔들까지 받은 것
+                if older:
+                    s.history_start = older[0]["open_time"]
+                break
+            rows -= len(batch)
+            end = batch[0]["open_time"] - s.step
+        s.prepend(older)
+        return len(older)
+
+    def _history_short(self, s: _Series, size: int) -> bool:
+        """마감 캔들이 size - 1개(보관 한도 내)보다 적고, 거래소 쪽에 더 오래된 캔들이 남아 있을 수 있으면 True."""
+        want = min(size - 1, KEEP_ROWS.get(s.interval, DEFAULT_KEEP_ROWS))
+        return (
+            0 < s.count < want
+            and s.history_start is None
+            and time.time() >= s.backfill_retry_ts
+        )
+
+    def _extend_history(self, s: _Series, size: int) -> None:
+        want = min(size - 1, KEEP_ROWS.get(s.interval, DEFAULT_KEEP_ROWS))
+        try:
+            added = self._backfill(s, want - s.count)
+        except Exception as e:
+            added = 0
+            self.stats["errors"] += 1
+            logger.warning(f"캔들 과거 보충 실패: {s.pair} {s.interval} {e}")
+        if not added:
+            # 빈 응답: 과거가 없거나 조회 실패 (구분 불가) → 재시도 간격을 둔다
+            s.backfill_retry_ts = time.time() + BACKFILL_RETRY_SEC
+            return
+        self.stats["history_rows"] += added
+        logger.info(f"캔들 과거 보충: {s.pair} {s.interval} +{added}")
+
+    def refresh(self, pair: str, interval: str, size: int) -> bool:
+        s = self.series(pair, interval)
+        with s.lock:
+            return self._refresh_locked(s, size)
+
+    def _refresh_locked(self, s: _Series, size: int) -> bool:
+        now_ms = int(time.time() * 1000)
+        try:
+            if not s.checked:
+                s.checked = True
+                self._repair(s)
+            last = s.last_open_time()
+            keep = KEEP_ROWS.get(s.interval, DEFAULT_KEEP_ROWS)
+            if last is None or (now_ms - last) // s.step > keep:
+                # 비어 있거나 보관 범위보다 오래 비었으면 최신 size개로 다시 시작
+                if last is not None:
+                    s.keep_last(0)
+                rows = self._fetch(s.pair, s.interval, int(min(FETCH_LIMIT, size + 1)))
+                self.stats["backfills"] += 1
+                last = None
+            else:
+                rows = self._fetch_since(s, last + s.step, now_ms)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"캔들 조회 실패: {s.pair} {s.interval} {e}")
+            return False
+
+        closed = [r for r in rows if r["open_time"] + s.step <= now_ms and (last is None or r["open_time"] > last)]
+        s.append(closed)
+        s.live = rows[-1] if rows and rows[-1]["open_time"] + s.step > now_ms else None
+        s.refreshed_ts = time.time()
+        self.stats["refreshes"] += 1
+        self.stats["fetched_rows"] += len(rows)
+        if s.count > keep * 1.1:
+            s.keep_last(keep)
+        if self._history_short(s, size):
+            self._extend_history(s, size)
+        return True
+
+    def get_candles(self, pair: str, interval: str, size: int, max_age_sec: Optional[float] = None) -> List[Dict]:
+        """
+        최근 size개 (마감 캔들 + 진행 중 캔들 1개). 기존 get_candle_data_v2와 같은 dict 형식.
+        갱신이 필요한데 조회에 실패하면 [] (호출 측 기존 실패 처리 유지).
+        """
+        s = self.series(pair, interval)
+        with s.lock:
+            if not self._ensure_locked(s, size, max_age_sec):
+                return []
+            live = s.live
+            n = min(s.count, size - 1 if live else size)
+            rows = s.rows(s.count - n, s.count)
+        if live:
+            rows.append(dict(live))
+        return rows
+
+    def window(self, pair: str, interval: str, size: int,
+               max_age_sec: Optional[float] = None) -> Optional[Tuple[CandleView, Optional[Dict]]]:
+        """
+        get_candles()와 같은 구간을 dict 변환 없이: (마감 캔들 컬럼 뷰, 진행 중 캔들 dict 또는 None).
+        갱신이 필요한데 조회에 실패하면 None.
+        """
+        s = self.series(pair, interval)
+        with s.lock:
+            if not self._ensure_locked(s, size, max_age_sec):
+                return None
+            live = dict(s.live) if s.live else None
+            n = min(s.count, size - 1 if live else size)
+            return CandleView({name: s.column(name, s.count - n, s.count) for name, _ in COLUMNS}), live
+
+    def _ensure_locked(self, s: _Series, size: int, max_age_sec: Optional[float]) -> bool:
+        max_age = REFRESH_SEC.get(s.interval, 60) if max_age_sec is None else max_age_sec
+        if time.time() - s.refreshed_ts >= max_age:
+            return self._refresh_locked(s, size)
+        if self._history_short(s, size):
+            self._extend_history(s, size)
+        return True
+
+    def view(self, pair: str, interval: str, size: Optional[int] = None) -> CandleView:
+        s = self.series(pair, interval)
+        with s.lock:
+            start = 0 if size is None else max(0, s.count - size)
+            return CandleView({name: s.column(name, start, s.count) for name, _ in COLUMNS})
+
+
+_STORE: Optional[CandleStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> CandleStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = CandleStore()
+    return _STORE
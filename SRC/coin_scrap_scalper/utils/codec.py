@@ -0,0 +1,107 @@
+import json
+import re
+from typing import Any, List, Optional, Tuple, Union
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import ujson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    ujson = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif ujson is not None:
+    BACKEND = "ujson"
+else:
+    BACKEND = "json"
+
+Raw = Union[str, bytes, bytearray, memoryview]
+
+# stdlib 전용 miniTicker fast path ("e":"24hrMiniTicker" 객체 1개 단위)
+_MINI_TICKER_RE = re.compile(
+    r'"e":"24hrMiniTicker","E":(\d+),"s":"([A-Z0-9]+)","c":"([0-9.]+)"'
+)
+
+
+def loads(data: Raw) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    if ujson is not None:
+        return ujson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """
+    ensure_ascii=False + 공백 없는 구분자(",", ":") 출력. 세 백엔드 모두 같은 문자열.
+    (REST symbols= 파라미터에 그대로 쓰이므로 공백이 들어가면 -1100으로 거부된다)
+    빠른 백엔드가 못 다루는 값이면 stdlib로 처리.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass
+    elif ujson is not None:
+        try:
+            return ujson.dumps(obj, ensure_ascii=False)
+        except (TypeError, OverflowError):
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def dumps_line(obj: Any) -> str:
+    """JSONL 한 줄 (개행 포함)."""
+    return dumps(obj) + "\n"
+
+
+def _ticker_fields(data: Any) -> Optional[Tuple[str, float, int]]:
+    if not isinstance(data, dict):
+        return None
+    if "data" in data:
+        data = data["data"]
+        if not isinstance(data, dict):
+            return None
+    pair = data.get("s")
+    close = data.get("c")
+    if not pair or close is None or data.get("e") != "24hrMiniTicker":
+        return None
+    return pair, float(close), int(data.get("E") or 0)
+
+
+def decode_mini_ticker(message: Raw) -> Optional[Tuple[str, float, int]]:
+    """
+    miniTicker 메시지(단일/combined)에서 (pair, close, event_ms)만 추출.
+    orjson이 있으면 전체 파싱이 더 빠르고, stdlib만 있으면 정규식으로 필요한 필드만 읽는다.
+    형식이 예상과 다르면 None → 호출 측에서 loads()로 처리.
+    """
+    if orjson is not None:
+        try:
+            return _ticker_fields(orjson.loads(message))
+        except orjson.JSONDecodeError:
+            return None
+    if not isinstance(message, str):
+        message = bytes(message).decode("utf-8")
+    m = _MINI_TICKER_RE.search(message)
+    if m is None:
+        return None
+    return m.group(2), float(m.group(3)), int(m.group(1))
+
+
+def decode_mini_ticker_array(message: Raw) -> List[Tuple[str, float, int]]:
+    """!miniTicker@arr 메시지에서 전체 (pair, close, event_ms) 목록 추출."""
+    payload = loads(message)
+    if isinstance(payload, dict):
+        payload = payload.get("data", [])
+    out = []
+    for item in payload or []:
+        fields = _ticker_fields(item)
+        if fields is not None:
+            out.append(fields)
+    return out
@@ -0,0 +1,254 @@
+import os
+import threading
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils import codec
+from utils.exchange_client import get_client
+from utils.logger import logger
+
+CATALOG_PATH = Path("storage") / "exchange_info.json"
+CATALOG_TTL_SEC = 6 * 3600
+# 모르는 심볼 조회 시 전체 재조회 최소 간격 (신규 상장 대응)
+MISS_REFRESH_MIN_SEC = 60
+# exchangeInfo(weight 20) 조회 실패 후 재시도 최소 간격. 그 사이에는 만료 표를 그대로 쓴다
+REFRESH_RETRY_SEC = 60
+
+
+class SymbolSpec:
+    """exchangeInfo 심볼 1개에서 쓰는 값만 추린 레코드. 수치는 거래소 원문 문자열 그대로 보관."""
+
+    __slots__ = (
+        "symbol",
+        "base_asset",
+        "quote_asset",
+        "status",
+        "permissions",
+        "min_qty",
+        "step_size",
+        "min_notional",
+        "tick_size",
+        "min_price",
+        "max_price",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+        if self.permissions is None:
+            self.permissions = []
+
+    @classmethod
+    def from_exchange(cls, s: Dict) -> "SymbolSpec":
+        filters = {f.get("filterType"): f for f in s.get("filters", [])}
+        lot = filters.get("LOT_SIZE") or {}
+        mn = filters.get("MIN_NOTIONAL") or {}
+        pf = filters.get("PRICE_FILTER") or {}
+        return cls(
+            symbol=s.get("symbol"),
+            base_asset=s.get("baseAsset"),
+            quote_asset=s.get("quoteAsset"),
+            status=s.get("status"),
+            permissions=s.get("permissions", []),
+            min_qty=lot.get("minQty"),
+            step_size=lot.get("stepSize"),
+            min_notional=mn.get("minNotional"),
+            tick_size=pf.get("tickSize"),
+            min_price=pf.get("minPrice"),
+            max_price=pf.get("maxPrice"),
+        )
+
+    def as_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _valid_lot(spec: SymbolSpec) -> Optional[Tuple[str, str]]:
+    if not spec.min_qty or not spec.step_size:
+        return None
+    if Decimal(str(spec.step_size)) <= 0 or Decimal(str(spec.min_qty)) <= 0:
+        return None
+    return str(spec.min_qty), str(spec.step_size)
+
+
+class ExchangeCatalog:
+    """
+    /api/v3/exchangeInfo 1회 조회 → 심볼 pair 기준 인덱스.
+    - LOT_SIZE / MIN_NOTIONAL / PRICE_FILTER, 유니버스 목록 제공
+    - 추린 결과만 디스크에 저장(TTL), 재시작 시 디스크에서 바로 로드
+    - TTL이 지나면 만료 표를 계속 쓰면서 백그라운드로 갱신, 조회 시도는 REFRESH_RETRY_SEC 간격으로만
+    """
+
+    def __init__(self, path: Path = CATALOG_PATH, ttl_sec: int = CATALOG_TTL_SEC):
+        self.path = Path(path)
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._specs: Dict[str, SymbolSpec] = {}
+        self._lots: Dict[str, Tuple[str, str]] = {}
+        self._fetched_ts = 0.0
+        self._last_miss_refresh_ts = 0.0
+        self._last_attempt_ts = 0.0
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._disk_checked = False
+        self._loaded = False
+
+    @property
+    def fetched_ts(self) -> float:
+        return self._fetched_ts
+
+    def _index(self, specs: List[SymbolSpec], fetched_ts: float) -> None:
+        by_symbol = {s.symbol: s for s in specs if s.symbol}
+        lots = {}
+        for symbol, spec in by_symbol.items():
+            lot = _valid_lot(spec)
+            if lot:
+                lots[symbol] = lot
+        self._specs = by_symbol
+        self._lots = lots
+        self._fetched_ts = fetched_ts
+
+    def _load_disk(self) -> bool:
+        if not self.path.exists():
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                payload = codec.loads(f.read())
+            specs = [SymbolSpec(**row) for row in payload.get("symbols", [])]
+            self._index(specs, float(payload.get("fetched_ts", 0)))
+            return bool(self._specs)
+        except Exception as e:
+            logger.warning(f"exchange_info 캐시 로드 실패: {e}")
+            return False
+
+    def _save_disk(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            payload = {
+                "fetched_ts": self._fetched_ts,
+                "symbols": [s.as_dict() for s in self._specs.values()],
+            }
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(codec.dumps(payload))
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"exchange_info 캐시 저장 실패: {e}")
+
+    def refresh(self) -> bool:
+        self._last_attempt_ts = time.time()
+        try:
+            res = get_client().get("/api/v3/exchangeInfo")
+            if res.status_code != 200:
+                logger.warning(f"exchangeInfo 조회 실패: status {res.status_code}")
+                return False
+            data = codec.loads(res.content)
+            specs = [SymbolSpec.from_exchange(s) for s in data.get("symbols", [])]
+            if not specs:
+                return False
+            with self._lock:
+                self._index(specs, time.time())
+                self._loaded = True
+            self._save_disk()
+            logger.info(f"✅ exchangeInfo 카탈로그 갱신 ({len(specs)} symbols)")
+            return True
+        except Exception as e:
+            logger.warning(f"exchangeInfo 조회 실패: {e}")
+            return False
+
+    def _refresh_due(self) -> bool:
+        return time.time() - self._last_attempt_ts >= REFRESH_RETRY_SEC
+
+    def _refresh_background(self) -> None:
+        with self._lock:
+            if self._refreshing or not self._refresh_due():
+                return
+            self._refreshing = True
+        threading.Thread(target=self._run_refresh, name="catalog-refresh", daemon=True).start()
+
+    def _run_refresh(self) -> None:
+        try:
+            with self._refresh_lock:
+                self.refresh()
+        finally:
+            self._refreshing = False
+
+    def ensure_loaded(self) -> None:
+        """
+        표가 있으면(만료돼도) 바로 반환하고 TTL이 지났으면 백그라운드 갱신만 건다.
+        디스크 캐시도 없는 첫 로드만 동기 조회, 실패하면 REFRESH_RETRY_SEC 동안 다시 조회하지 않는다.
+        """
+        if self._loaded and (time.time() - self._fetched_ts) < self.ttl_sec:
+            return
+        with self._lock:
+            if not self._disk_checked:
+                self._disk_checked = True
+                self._load_disk()
+        if self._specs:
+            self._loaded = True
+            if (time.time() - self._fetched_ts) >= self.ttl_sec:
+                self._refresh_background()
+            return
+        with self._refresh_lock:
+            if not self._specs and self._refresh_due():
+                self.refresh()
+
+    def get(self, symbol_pair: str) -> Optional[SymbolSpec]:
+        self.ensure_loaded()
+        spec = self._specs.get(symbol_pair)
+        if spec is None:
+            now = time.time()
+            if now - self._last_miss_refresh_ts >= MISS_REFRESH_MIN_SEC and self._refresh_due():
+                self._last_miss_refresh_ts = now
+                if self.refresh():
+                    spec = self._specs.get(symbol_pair)
+        return spec
+
+    def lot(self, symbol_pair: str) -> Optional[Tuple[str, str]]:
+        """(minQty, stepSize) 문자열. LOT_SIZE가 없거나 0 이하면 None."""
+        if self.get(symbol_pair) is None:
+            return None
+        return self._lots.get(symbol_pair)
+
+    def min_notional(self, symbol_pair: str) -> Optional[str]:
+        spec = self.get(symbol_pair)
+        return str(spec.min_notional) if spec and spec.min_notional else None
+
+    def price_filter(self, symbol_pair: str) -> Optional[Tuple[str, str, str]]:
+        """(tickSize, minPrice, maxPrice)"""
+        spec = self.get(symbol_pair)
+        if not spec or not spec.tick_size:
+            return None
+        return str(spec.tick_size), str(spec.min_price), str(spec.max_price)
+
+    def specs(self) -> List[SymbolSpec]:
+        self.ensure_loaded()
+        return list(self._specs.values())
+
+    def listing(self, quote_asset: str) -> List[Dict]:
+        """TRADING 상태 + SPOT 권한 + quote 일치 심볼 (universe 형식)."""
+        out = []
+        for s in self.specs():
+            if s.status != "TRADING" or s.quote_asset != quote_asset:
+                continue
+            if s.permissions and "SPOT" not in s.permissions:
+                continue
+            out.append({
+                "symbol": s.symbol,
+                "baseAsset": s.base_asset,
+                "quoteAsset": s.quote_asset,
+                "status": s.status,
+                "permissions": s.permissions,
+            })
+        return out
+
+
+_CATALOG: Optional[ExchangeCatalog] = None
+
+
+def get_catalog() -> ExchangeCatalog:
+    global _CATALOG
+    if _CATALOG is None:
+        _CATALOG = ExchangeCatalog()
+    return _CATALOG
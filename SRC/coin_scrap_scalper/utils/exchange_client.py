@@ -0,0 +1,140 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.auth import build_signed_params
+from config.exchange import BINANCE_BASE_URL
+from utils.latency import span
+from utils.logger import logger
+from utils.weight_governor import PRIORITY_ORDER, current_priority, get_governor, request_weight
+
+POOL_SIZE = 16
+WARM_CONNECTIONS = 4
+KEEPALIVE_INTERVAL_SEC = 30
+# (connect, read) 초. 주문은 짧게 끊고, 응답 없이 끊기면 order_executor가 clientOrderId로 체결 여부를 조회
+DEFAULT_TIMEOUT: Tuple[float, float] = (3.05, 10.0)
+ENDPOINT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "/api/v3/order": (2.0, 5.0),
+    "/api/v3/ping": (2.0, 3.0),
+    "/api/v3/ticker/price": (2.0, 5.0),
+    "/api/v3/klines": (3.05, 5.0),
+    "/api/v3/exchangeInfo": (3.05, 10.0),
+    "/api/v3/userDataStream": (3.05, 5.0),
+}
+
+
+class ExchangeClient:
+    """
+    Binance REST 공용 클라이언트.
+    - Session 1개 + 연결 풀(keep-alive)로 주문마다 TCP/TLS 핸드셰이크를 다시 하지 않는다
+    - 엔드포인트별 timeout (무한 대기 방지)
+    - signed=True면 config.auth.build_signed_params로 서명
+    - warm(): 시작 시 풀 연결을 미리 열어 두고, keepalive 스레드가 유휴 연결이 끊기지 않게 유지
+    - 모든 호출은 weight governor로 예약 후 전송, 응답 헤더(X-MBX-USED-WEIGHT-1M, 429/418)를 되돌려 준다
+    """
+
+    def __init__(self,
+                 base_url: str = BINANCE_BASE_URL,
+                 pool_size: int = POOL_SIZE,
+                 timeouts: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.timeouts = dict(ENDPOINT_TIMEOUTS if timeouts is None else timeouts)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._stop = threading.Event()
+        self._keepalive_thread: Optional[threading.Thread] = None
+
+    def timeout_for(self, path: str) -> Tuple[float, float]:
+        return self.timeouts.get(path, DEFAULT_TIMEOUT)
+
+    def request(self,
+                method: str,
+                path: str,
+                params: Optional[Dict] = None,
+                signed: bool = False,
+                timeout=None,
+                priority: Optional[int] = None,
+                weight: Optional[int] = None,
+                **kwargs) -> requests.Response:
+        """priority 미지정 시 /api/v3/order는 PRIORITY_ORDER, 나머지는 priority_scope 값 (기본 PRIORITY_NORMAL)."""
+        headers = kwargs.pop("headers", None)
+        if priority is None:
+            priority = PRIORITY_ORDER if path == "/api/v3/order" else current_priority()
+        governor = get_governor()
+        governor.acquire(request_weight(path, params) if weight is None else weight, priority)
+        if signed:
+            with span("rest.sign"):
+                sign_headers, params = build_signed_params(dict(params or {}))
+            headers = {**(headers or {}), **sign_headers}
+        with span(f"rest.{path.rsplit('/', 1)[-1]}"):
+            res = self.session.request(
+                method,
+                f"{self.base_url}{path}",
+                params=params,
+                headers=headers,
+                timeout=timeout or self.timeout_for(path),
+                **kwargs,
+            )
+        governor.observe(res.status_code, res.headers)
+        return res
+
+    def get(self, path: str, params: Optional[Dict] = None, **kwargs) -> requests.Response:
+        return self.request("GET", path, params, **kwargs)
+
+    def post(self, path: str, params: Optional[Dict] = None, **kwargs) -> requests.Response:
+        return self.request("POST", path, params, **kwargs)
+
+    def put(self, path: str, params: Optional[Dict] = None, **kwargs) -> requests.Response:
+        return self.request("PUT", path, params, **kwargs)
+
+    def delete(self, path: str, params: Optional[Dict] = None, **kwargs) -> requests.Response:
+        return self.request("DELETE", path, params, **kwargs)
+
+    def ping(self) -> bool:
+        try:
+            return self.get("/api/v3/ping").status_code == 200
+        except requests.RequestException:
+            return False
+
+    def warm(self, connections: int = WARM_CONNECTIONS) -> int:
+        """동시에 ping을 보내 풀에 연결 n개를 미리 만들어 둔다. 성공 수 반환."""
+        n = max(1, min(connections, self.pool_size))
+        with ThreadPoolExecutor(max_workers=n, thread_name_prefix="rest-warm") as pool:
+            ok = sum(pool.map(lambda _: self.ping(), range(n)))
+        logger.info(f"REST 연결 예열: {ok}/{n}")
+        return ok
+
+    def start_keepalive(self, interval_sec: float = KEEPALIVE_INTERVAL_SEC, connections: int = WARM_CONNECTIONS) -> None:
+        if self._keepalive_thread and self._keepalive_thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval_sec):
+                self.warm(connections)
+
+        self._keepalive_thread = threading.Thread(target=loop, name="rest-keepalive", daemon=True)
+        self._keepalive_thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self.session.close()
+
+
+_CLIENT: Optional[ExchangeClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client() -> ExchangeClient:
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = ExchangeClient()
+    return _CLIENT
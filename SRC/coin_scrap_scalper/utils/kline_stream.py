@@ -0,0 +1,209 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config.exchange import QUOTE_ASSET
+from utils.candle_store import fetch_klines
+from utils.logger import logger
+from utils.symbols import format_symbol
+from utils.ws_stream import ShardedStream, WS_BASE_URL, MAX_STREAMS_PER_CONNECTION
+
+KLINE_INTERVALS = ("1h", "1m")
+KLINE_WINDOW = {
+    "1m": 120,
+    "1h": 48,
+}
+_INTERVAL_MS = {
+    "1m": 60_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+    "1d": 86_400_000,
+}
+
+Key = Tuple[str, str]
+
+
+class KlineBook:
+    """
+    (pair, interval)별 최근 캔들 롤링 윈도우.
+    REST로 1회 시드한 뒤 kline 이벤트마다 마지막 캔들을 갱신/추가한다.
+    갭(재연결 등)이 감지되면 해당 윈도우를 무효화하고 재시드 대상으로 넘긴다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows: Dict[Key, Deque[Dict]] = {}
+        self._ready: Dict[Key, bool] = {}
+
+    def seed(self, key: Key, candles: List[Dict]) -> None:
+        pair, interval = key
+        window = deque(candles, maxlen=KLINE_WINDOW.get(interval, 100))
+        with self._lock:
+            current = self._windows.get(key)
+            # 시드 도중 들어온 이벤트가 더 최신이면 뒤에 이어 붙인다
+            if current:
+                last_seed = window[-1]["open_time"] if window else -1
+                for c in current:
+                    if c["open_time"] > last_seed:
+                        window.append(c)
+                    elif c["open_time"] == last_seed:
+                        window[-1] = c
+            self._windows[key] = window
+            self._ready[key] = True
+
+    def drop(self, key: Key) -> None:
+        with self._lock:
+            self._windows.pop(key, None)
+            self._ready.pop(key, None)
+
+    def apply(self, pair: str, interval: str, candle: Dict) -> bool:
+        """이벤트 반영. 갭이면 False (재시드 필요)."""
+        key = (pair, interval)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = deque(maxlen=KLINE_WINDOW.get(interval, 100))
+                self._windows[key] = window
+                self._ready.setdefault(key, False)
+            if not window:
+                window.append(candle)
+                return True
+            last_open = window[-1]["open_time"]
+            if candle["open_time"] == last_open:
+                window[-1] = candle
+                return True
+            if candle["open_time"] < last_open:
+                return True
+            step = _INTERVAL_MS.get(interval)
+            window.append(candle)
+            if step and candle["open_time"] - last_open > step and self._ready.get(key):
+                self._ready[key] = False
+                return False
+            return True
+
+    def get(self, pair: str, interval: str, size: int) -> Optional[List[Dict]]:
+        key = (pair, interval)
+        window = self._windows.get(key)
+        if window is None or not self._ready.get(key):
+            return None
+        with self._lock:
+            candles = list(window)
+        return candles[-size:] if size else candles
+
+
+class KlineStream:
+    """watchlist 심볼의 kline@1h / kline@1m 구독 + KlineBook 유지."""
+
+    def __init__(self,
+                 symbols: List[str],
+                 intervals=KLINE_INTERVALS,
+                 base_url: str = WS_BASE_URL,
+                 max_streams_per_connection: int = MAX_STREAMS_PER_CONNECTION):
+        self.book = KlineBook()
+        self._intervals = tuple(intervals)
+        self._pairs: set = set()
+        self._seed_queue: set = set()
+        self._seed_cv = threading.Condition()
+        self._stop = threading.Event()
+        self._seed_thread: Optional[threading.Thread] = None
+        self._stream = ShardedStream("kline", self._on_data, base_url, max_streams_per_connection)
+        self.update_symbols(symbols)
+
+    def update_symbols(self, symbols: List[str]) -> None:
+        pairs = {format_symbol(s, QUOTE_ASSET).upper() for s in symbols}
+        added = pairs - self._pairs
+        removed = self._pairs - pairs
+        self._pairs = pairs
+        self._stream.set_streams(
+            f"{pair.lower()}@kline_{interval}" for pair in pairs for interval in self._intervals
+        )
+        for pair in removed:
+            for interval in self._intervals:
+                self.book.drop((pair, interval))
+        with self._seed_cv:
+            self._seed_queue -= {(p, i) for p in removed for i in self._intervals}
+            self._seed_queue |= {(p, i) for p in added for i in self._intervals}
+            self._seed_cv.notify()
+
+    def get_candles(self, symbol: str, interval: str, size: int) -> Optional[List[Dict]]:
+        return self.book.get(format_symbol(symbol, QUOTE_ASSET).upper(), interval, size)
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._stream.start()
+        if not (self._seed_thread and self._seed_thread.is_alive()):
+            self._seed_thread = threading.Thread(target=self._seed_loop, name="kline-seed", daemon=True)
+            self._seed_thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._stream.stop()
+        with self._seed_cv:
+            self._seed_cv.notify()
+
+    def _on_data(self, data: dict) -> None:
+        k = data.get("k")
+        if not k:
+            return
+        pair = str(k.get("s") or data.get("s", "")).upper()
+        interval = k.get("i")
+        if pair not in self._pairs or interval not in self._intervals:
+            return
+        candle = {
+            "open_time": int(k["t"]),
+            "open": float(k["o"]),
+            "high": float(k["h"]),
+            "low": float(k["l"]),
+            "close": float(k["c"]),
+            "volume": float(k["v"]),
+        }
+        if not self.book.apply(pair, interval, candle):
+            logger.info(f"kline gap 감지 → 재시드: {pair} {interval}")
+            with self._seed_cv:
+                self._seed_queue.add((pair, interval))
+                self._seed_cv.notify()
+
+    def _seed_loop(self) -> None:
+        while not self._stop.is_set():
+            with self._seed_cv:
+                while not self._seed_queue and not self._stop.is_set():
+                    self._seed_cv.wait(timeout=5.0)
+                if self._stop.is_set():
+                    return
+                key = min(self._seed_queue)
+                self._seed_queue.discard(key)
+            pair, interval = key
+            if pair not in self._pairs:
+                continue
+            try:
+                candles = fetch_klines(pair, interval, KLINE_WINDOW.get(interval, 100))
+                self.book.seed(key, candles)
+            except Exception as e:
+                logger.warning(f"kline 시드 실패: {pair} {interval} {e}")
+                self._stop.wait(2.0)
+                with self._seed_cv:
+                    if pair in self._pairs:
+                        self._seed_queue.add(key)
+
+
+_GLOBAL_KLINE_STREAM: Optional[KlineStream] = None
+
+
+def start_kline_stream(symbols: List[str]) -> KlineStream:
+    global _GLOBAL_KLINE_STREAM
+    if _GLOBAL_KLINE_STREAM is None:
+        _GLOBAL_KLINE_STREAM = KlineStream(symbols)
+        _GLOBAL_KLINE_STREAM.start()
+    else:
+        _GLOBAL_KLINE_STREAM.update_symbols(symbols)
+    return _GLOBAL_KLINE_STREAM
+
+
+def get_kline_candles(symbol: str, interval: str, size: int) -> Optional[List[Dict]]:
+    """스트림 윈도우가 준비돼 있으면 캔들 리스트, 아니면 None (호출 측 REST fallback)."""
+    if _GLOBAL_KLINE_STREAM is None:
+        return None
+    return _GLOBAL_KLINE_STREAM.get_candles(symbol, interval, size)
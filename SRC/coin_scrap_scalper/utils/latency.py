@@ -0,0 +1,212 @@
+import functools
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from utils import codec
+
+DUMP_PATH = Path("storage") / "latency_histograms.json"
+
+# HDR 방식 log-linear 버킷: 128µs 미만은 1µs 단위, 그 이상은 2의 거듭제곱 구간마다 64칸 (상대오차 ≤ 1.6%)
+_SUB_BITS = 7
+_SUB_COUNT = 1 << _SUB_BITS
+_HALF = _SUB_COUNT >> 1
+_MAX_US = 3600 * 1_000_000
+_BUCKETS = (_MAX_US.bit_length() - _SUB_BITS + 2) * _HALF
+
+
+def _bucket(us: int) -> int:
+    if us < _SUB_COUNT:
+        return us
+    shift = us.bit_length() - _SUB_BITS
+    return shift * _HALF + (us >> shift)
+
+
+def _bucket_high(idx: int) -> int:
+    """버킷이 대표하는 최대값 (HDR highestEquivalentValue)."""
+    if idx < _SUB_COUNT:
+        return idx
+    shift = idx // _HALF - 1
+    m = idx - shift * _HALF
+    return ((m + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """µs 단위 고정 크기 히스토그램. record O(1), 백분위는 버킷 누적합."""
+
+    __slots__ = ("counts", "count", "total_us", "max_us", "min_us")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * _BUCKETS))
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+        self.min_us = 0
+
+    def record(self, us: int) -> None:
+        if us < 0:
+            us = 0
+        elif us > _MAX_US:
+            us = _MAX_US
+        self.counts[_bucket(us)] += 1
+        if self.count == 0 or us < self.min_us:
+            self.min_us = us
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile(self, pct: float) -> int:
+        if self.count == 0:
+            return 0
+        target = max(1, int(self.count * pct / 100.0 + 0.5))
+        seen = 0
+        for idx, c in enumerate(self.counts):
+            if c:
+                seen += c
+                if seen >= target:
+                    return min(_bucket_high(idx), self.max_us)
+        return self.max_us
+
+    def summary(self) -> Dict:
+        """ms 단위 요약."""
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_us / self.count / 1000.0, 3),
+            "p50_ms": round(self.percentile(50) / 1000.0, 3),
+            "p90_ms": round(self.percentile(90) / 1000.0, 3),
+            "p99_ms": round(self.percentile(99) / 1000.0, 3),
+            "max_ms": round(self.max_us / 1000.0, 3),
+        }
+
+
+class LatencyRecorder:
+    """
+    이름별 span 히스토그램 (누적 + 리포트 구간).
+    구간 히스토그램은 3시간 리포트가 읽고 비운다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total: Dict[str, LatencyHistogram] = {}
+        self._window: Dict[str, LatencyHistogram] = {}
+        self._window_start = time.time()
+
+    def record(self, name: str, seconds: float) -> None:
+        us = int(seconds * 1_000_000)
+        with self._lock:
+            h = self._total.get(name)
+            if h is None:
+                h = self._total[name] = LatencyHistogram()
+            w = self._window.get(name)
+            if w is None:
+                w = self._window[name] = LatencyHistogram()
+            h.record(us)
+            w.record(us)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def snapshot(self, window: bool = False) -> Dict[str, Dict]:
+        with self._lock:
+            source = self._window if window else self._total
+            return {name: h.summary() for name, h in sorted(source.items())}
+
+    def take_window(self) -> Dict:
+        """리포트 구간 요약을 반환하고 구간 히스토그램을 비운다."""
+        with self._lock:
+            out = {
+                "since": self._window_start,
+                "spans": {name: h.summary() for name, h in sorted(self._window.items())},
+            }
+            self._window = {}
+            self._window_start = time.time()
+        return out
+
+    def dump(self, path: Path = DUMP_PATH) -> Path:
+        payload = {"ts": time.time(), "total": self.snapshot(), "window": self.snapshot(window=True)}
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(codec.dumps(payload))
+        return path
+
+
+LATENCY = LatencyRecorder()
+
+
+def span(name: str):
+    """with span("order.http"): ... 형태로 구간 시간 기록."""
+    return LATENCY.span(name)
+
+
+def timed(name: str):
+    """함수 전체 실행 시간을 name 히스토그램에 기록하는 데코레이터."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with LATENCY.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def record_latency(name: str, seconds: float) -> None:
+    LATENCY.record(name, seconds)
+
+
+def dump_latency(path: Path = DUMP_PATH) -> Path:
+    return LATENCY.dump(path)
+
+
+def format_report_lines(spans: Dict[str, Dict], prefixes=("order.", "rest.", "step.", "engine.")) -> List[str]:
+    """텔레그램 리포트용 한 줄 요약 (p50/p99/max, ms)."""
+    lines = []
+    for name, s in spans.items():
+        if not s.get("count") or not name.startswith(tuple(prefixes)):
+            continue
+        lines.append(f"{name}: n={s['count']} p50 {s['p50_ms']:.1f} / p99 {s['p99_ms']:.1f} / max {s['max_ms']:.1f} ms")
+    return lines
+
+
+def install_dump_signal(path: Optional[Path] = None) -> bool:
+    """
+    SIGUSR1 수신 시 히스토그램을 파일로 덤프 (POSIX 전용).
+    핸들러는 메인 스레드에서 돌고 메인 스레드도 record()로 _lock을 잡으므로,
+    핸들러는 이벤트만 세우고 덤프는 전용 스레드가 한다 (핸들러에서 _lock을 잡으면 교착).
+    """
+    import signal
+
+    if not hasattr(signal, "SIGUSR1"):
+        return False
+
+    requested = threading.Event()
+
+    def dumper():
+        from utils.logger import logger
+
+        while True:
+            requested.wait()
+            requested.clear()
+            try:
+                logger.info(f"지연 히스토그램 덤프: {dump_latency(path or DUMP_PATH)}")
+            except Exception as e:
+                logger.warning(f"지연 히스토그램 덤프 실패: {e}")
+
+    threading.Thread(target=dumper, name="latency-dump", daemon=True).start()
+
+    def handler(signum, frame):
+        requested.set()
+
+    signal.signal(signal.SIGUSR1, handler)
+    return True
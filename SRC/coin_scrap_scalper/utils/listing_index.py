@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.exchange import QUOTE_ASSET
+from utils import codec
+from utils.candle_store import fetch_klines
+from utils.exchange_catalog import get_catalog
+from utils.logger import logger
+from utils.weight_governor import PRIORITY_SCAN, priority_scope
+
+INDEX_PATH = Path("storage") / "listing_index.json"
+# 카탈로그 신규 pair 확인 주기 / 조회 실패 pair 재시도 간격
+SYNC_INTERVAL_SEC = 600
+RETRY_FAILED_SEC = 3600
+DAY_MS = 86_400_000
+
+
+class ListingIndex:
+    """
+    pair → 최초 캔들 open_time(ms) 영구 인덱스. 값은 바뀌지 않으므로 날짜가 바뀌어도 버리지 않는다.
+    - is_recent(): 메모리 비교만 (REST 없음)
+    - 백그라운드 스레드가 exchangeInfo 카탈로그의 신규 pair만 조회해 채운다
+    - 파일 저장은 _save_lock으로 한 번에 하나 (stage1 워커는 save=False로 모아 두고 스캔당 flush() 1회)
+    """
+
+    def __init__(self, path: Path = INDEX_PATH, quote_asset: str = QUOTE_ASSET):
+        self.path = Path(path)
+        self.quote_asset = quote_asset
+        self._lock = threading.Lock()
+        self._first: Dict[str, int] = {}
+        self._failed: Dict[str, float] = {}
+        self._dirty = False
+        self._save_lock = threading.Lock()
+        self._loaded = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self.path.exists():
+                try:
+                    with open(self.path, "rb") as f:
+                        payload = codec.loads(f.read())
+                    self._first = {k: int(v) for k, v in payload.get("first_open_ms", {}).items()}
+                except Exception as e:
+                    logger.warning(f"listing index 로드 실패: {e}")
+            self._loaded = True
+
+    def _save(self) -> None:
+        # 같은 .tmp를 여러 스레드가 동시에 쓰면 서로의 파일을 잘라 먹으므로 저장 전체를 직렬화
+        with self._save_lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+                with self._lock:
+                    payload = {"first_open_ms": dict(self._first)}
+                    self._dirty = False
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(codec.dumps(payload))
+                os.replace(tmp, self.path)
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                logger.warning(f"listing index 저장 실패: {e}")
+
+    def flush(self) -> None:
+        """save=False로 쌓인 변경이 있으면 저장."""
+        if self._dirty:
+            self._save()
+
+    def first_open_ms(self, symbol_pair: str) -> Optional[int]:
+        self._load()
+        return self._first.get(symbol_pair)
+
+    def is_recent(self, symbol_pair: str, max_days: int, now_ms: Optional[int] = None) -> Optional[bool]:
+        """상장 후 max_days일 이내면 True. 인덱스에 없으면 None."""
+        first = self.first_open_ms(symbol_pair)
+        if first is None:
+            return None
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        return (now_ms - first) // DAY_MS <= max_days
+
+    def lookup_due(self, symbol_pair: str) -> bool:
+        """최근(RETRY_FAILED_SEC 이내) 조회 실패한 pair가 아니면 True."""
+        with self._lock:
+            failed = self._failed.get(symbol_pair)
+        return failed is None or time.time() - failed >= RETRY_FAILED_SEC
+
+    def lookup(self, symbol_pair: str, save: bool = True) -> Optional[int]:
+        """REST로 최초 1h 캔들 시각 조회 후 인덱스에 기록."""
+        self._load()
+        try:
+            with priority_scope(PRIORITY_SCAN):
+                rows = fetch_klines(symbol_pair, "1h", 1, start_time=0)
+        except Exception as e:
+            logger.warning(f"최초 캔들 조회 실패({symbol_pair}): {e}")
+            rows = []
+        if not rows:
+            with self._lock:
+                self._failed[symbol_pair] = time.time()
+            return None
+        first = int(rows[0]["open_time"])
+        with self._lock:
+            self._first[symbol_pair] = first
+            self._failed.pop(symbol_pair, None)
+            self._dirty = True
+        if save:
+            self._save()
+        return first
+
+    def missing(self) -> List[str]:
+        self._load()
+        now = time.time()
+        pairs = [s["symbol"] for s in get_catalog().listing(self.quote_asset)]
+        with self._lock:
+            return [
+                p for p in pairs
+                if p not in self._first and now - self._failed.get(p, 0.0) >= RETRY_FAILED_SEC
+            ]
+
+    def sync(self) -> int:
+        """카탈로그에 있지만 인덱스에 없는 pair 조회. 추가된 수 반환."""
+        added = 0
+        for pair in self.missing():
+            if self._stop.is_set():
+                break
+            if self.lookup(pair, save=False) is not None:
+                added += 1
+        if added:
+            self.flush()
+            logger.info(f"listing index 갱신: +{added} (총 {len(self._first)})")
+        return added
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.sync()
+                except Exception as e:
+                    logger.warning(f"listing index 동기화 오류: {e}")
+                self._wake.wait(SYNC_INTERVAL_SEC)
+                self._wake.clear()
+
+        self._thread = threading.Thread(target=loop, name="listing-index", daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+
+_INDEX: Optional[ListingIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_listing_index() -> ListingIndex:
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = ListingIndex()
+    return _INDEX
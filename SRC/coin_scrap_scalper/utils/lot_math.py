@@ -0,0 +1,214 @@
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config.exchange import QUOTE_ASSET
+from utils.exchange_catalog import get_catalog
+from utils.logger import logger
+from utils.symbols import format_symbol
+
+# Decimal 기본 context 정밀도 (곱셈 결과 반올림 자릿수) — 기존 Decimal 비교와 결과를 맞추기 위해 사용
+_DECIMAL_PREC = 28
+# float 곱(qty*price)과 10진 곱의 상대오차 상한(~4e-16)보다 넉넉한 경계폭. 이 안쪽만 정수로 재판정
+_NOTIONAL_GUARD = 1e-14
+_POW10 = [10 ** i for i in range(64)]
+
+
+def _pow10(n: int) -> int:
+    return _POW10[n] if n < 64 else 10 ** n
+
+
+def parse_decimal(text: str) -> Tuple[int, int]:
+    """
+    10진 문자열 → (mantissa, exp). value = mantissa * 10**exp.
+    Decimal(text)와 같은 값을 정수로만 표현한다. ('1e-05', '0.00100000', '12' 모두 지원)
+    """
+    s = text.strip()
+    exp = 0
+    epos = s.find("e")
+    if epos < 0:
+        epos = s.find("E")
+    if epos >= 0:
+        exp = int(s[epos + 1:])
+        s = s[:epos]
+    dot = s.find(".")
+    if dot >= 0:
+        frac = s[dot + 1:]
+        s = s[:dot] + frac
+        exp -= len(frac)
+    return int(s), exp
+
+
+def _cmp_lt(a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+    am, ae = a
+    bm, be = b
+    if ae >= be:
+        return am * _pow10(ae - be) < bm
+    return am < bm * _pow10(be - ae)
+
+
+def _float_exact(v: Tuple[int, int]) -> bool:
+    """
+    유효숫자 15자리 이하면 float 비교가 10진 비교와 같다.
+    (15자리 이하 10진수는 서로 다른 double로 구분되고, repr(x)가 가장 짧은 왕복 표현이므로
+     Decimal(str(x)) < v  <=>  x < float(v))
+    """
+    m, _ = v
+    m = abs(m)
+    while m and m % 10 == 0:
+        m //= 10
+    return len(str(m)) <= 15
+
+
+def _round_context(m: int, e: int) -> Tuple[int, int]:
+    """Decimal context(prec=28, ROUND_HALF_EVEN)과 동일한 유효숫자 반올림."""
+    neg = m < 0
+    am = -m if neg else m
+    digits = len(str(am))
+    if digits <= _DECIMAL_PREC:
+        return m, e
+    shift = digits - _DECIMAL_PREC
+    q, r = divmod(am, _pow10(shift))
+    half = _pow10(shift) // 2 if shift else 0
+    if r > half or (r == half and (q & 1)):
+        q += 1
+    return (-q if neg else q), e + shift
+
+
+class SymbolConstraints:
+    """심볼 1개의 LOT_SIZE / MIN_NOTIONAL을 정수(mantissa, exp)로 미리 계산한 레코드."""
+
+    __slots__ = (
+        "symbol_pair",
+        "min_qty",
+        "step",
+        "min_notional",
+        "precision",
+        "min_qty_text",
+        "step_text",
+        "min_notional_text",
+        "min_qty_f",
+        "min_notional_lo",
+        "min_notional_hi",
+    )
+
+    def __init__(self, symbol_pair: str, min_qty: str, step: str, min_notional: Optional[str]):
+        self.symbol_pair = symbol_pair
+        self.min_qty_text = min_qty
+        self.step_text = step
+        self.min_notional_text = min_notional
+        self.min_qty = parse_decimal(min_qty)
+        self.step = parse_decimal(step)
+        self.min_notional = parse_decimal(min_notional) if min_notional else None
+        # _adjust_qty와 동일: 소수 자릿수 = |stepSize 지수|
+        self.precision = abs(Decimal(step).as_tuple().exponent)
+        # per-tick fast path 기준값 (정확성이 보장되지 않으면 None → 정수 비교)
+        self.min_qty_f = float(min_qty) if _float_exact(self.min_qty) else None
+        if self.min_notional is not None:
+            n = float(min_notional)
+            self.min_notional_lo = n * (1.0 - _NOTIONAL_GUARD)
+            self.min_notional_hi = n * (1.0 + _NOTIONAL_GUARD)
+        else:
+            self.min_notional_lo = self.min_notional_hi = None
+
+
+def below_min_qty(c: SymbolConstraints, qty: float) -> bool:
+    """Decimal(str(qty)) < minQty"""
+    if c.min_qty_f is not None:
+        return qty < c.min_qty_f
+    return _cmp_lt(parse_decimal(str(qty)), c.min_qty)
+
+
+def below_min_notional(c: SymbolConstraints, qty: float, price: float) -> bool:
+    """Decimal(str(qty)) * Decimal(str(price)) < minNotional. minNotional 없으면 False."""
+    if c.min_notional is None:
+        return False
+    notional = qty * price
+    if notional < c.min_notional_lo:
+        return True
+    if notional > c.min_notional_hi:
+        return False
+    # 경계 근처만 정수 곱 + Decimal context 반올림으로 판정
+    qm, qe = parse_decimal(str(qty))
+    pm, pe = parse_decimal(str(price))
+    return _cmp_lt(_round_context(qm * pm, qe + pe), c.min_notional)
+
+
+def round_down_qty(c: SymbolConstraints, qty: float) -> Optional[str]:
+    """
+    기존 _adjust_qty와 동일 결과의 정수 버전.
+    minQty 미만이면 None, 아니면 stepSize 배수로 내림한 주문 수량 문자열.
+    """
+    q = parse_decimal(str(qty))
+    if _cmp_lt(q, c.min_qty):
+        return None
+    qm, qe = q
+    sm, se = c.step
+    if sm <= 0:
+        return None
+    e = min(qe, se)
+    n = (qm * _pow10(qe - e)) // (sm * _pow10(se - e))
+    adj = (n * sm, se)
+    if _cmp_lt(adj, c.min_qty):
+        return None
+    p = c.precision
+    units = adj[0] * _pow10(se + p)
+    if p == 0:
+        return str(units)
+    whole, frac = divmod(units, _pow10(p))
+    return f"{whole}.{frac:0{p}d}"
+
+
+def dust_flags(cs: Sequence[SymbolConstraints], qtys: Sequence[float], prices: Sequence[float]) -> List[Optional[str]]:
+    """
+    배치 dust 판정. 심볼별로 None(정상) / "minQty" / "minNotional".
+    below_min_qty / below_min_notional을 원소마다 부르는 편의 루프 (배열 연산 아님).
+    원소별 판정이 이미 float 비교 1~2번이고 정수 재판정은 경계폭 안쪽만이라,
+    SymbolConstraints 객체에서 기준값을 배열로 모으는 비용이 더 크다 (numpy 버전: 10개 7배, 400개 1.4배, 20만 개 1.7배 느렸음).
+    """
+    out: List[Optional[str]] = []
+    for c, qty, price in zip(cs, qtys, prices):
+        if below_min_qty(c, qty):
+            out.append("minQty")
+        elif below_min_notional(c, qty, price):
+            out.append("minNotional")
+        else:
+            out.append(None)
+    return out
+
+
+class ConstraintTable:
+    """
+    pair → SymbolConstraints. exchange catalog에서 1회 계산 후 재사용.
+    카탈로그가 갱신되면(fetched_ts 변경) 비우고 다시 계산한다.
+    """
+
+    def __init__(self):
+        self._rows: Dict[str, Optional[SymbolConstraints]] = {}
+        self._catalog_ts = 0.0
+
+    def get(self, symbol: str) -> Optional[SymbolConstraints]:
+        pair = format_symbol(symbol, QUOTE_ASSET)
+        catalog = get_catalog()
+        if catalog.fetched_ts != self._catalog_ts:
+            self._rows = {}
+            self._catalog_ts = catalog.fetched_ts
+        if pair in self._rows:
+            return self._rows[pair]
+        row = None
+        lot = catalog.lot(pair)
+        if lot:
+            min_qty, step = lot
+            row = SymbolConstraints(pair, min_qty, step, catalog.min_notional(pair))
+        self._rows[pair] = row
+        return row
+
+
+CONSTRAINTS = ConstraintTable()
+
+
+def get_constraints(symbol: str) -> Optional[SymbolConstraints]:
+    try:
+        return CONSTRAINTS.get(symbol)
+    except Exception as e:
+        logger.warning(f"LOT_SIZE 조회 실패: {symbol} {e}")
+        return None
@@ -0,0 +1,252 @@
+import logging
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from utils import codec
+
+# utils.logger → utils.telegram → 이 모듈 순환 import를 피하려고 같은 로거를 이름으로 가져온다
+logger = logging.getLogger("trading")
+
+SPOOL_PATH = Path("storage") / "telegram_spool.jsonl"
+# 첫 메시지 후 이 시간 동안 들어온 메시지는 한 digest로 합친다
+COALESCE_WINDOW_SEC = 0.5
+# Telegram sendMessage 본문 한도 4096자
+MAX_MESSAGE_CHARS = 4000
+# Telegram 권장 한도: 채팅당 초당 1건, 그룹은 분당 20건
+CHAT_MIN_INTERVAL_SEC = 1.0
+CHAT_MAX_PER_MINUTE = 20
+MAX_BACKOFF_SEC = 120.0
+LATENCY_WINDOW = 500
+
+# (chat_id, text, parse_mode) → (HTTP status, retry_after 초). 네트워크 오류는 예외
+PostFn = Callable[[str, str, Optional[str]], Tuple[int, Optional[float]]]
+
+
+class _Message:
+    __slots__ = ("id", "chat_id", "text", "ts")
+
+    def __init__(self, msg_id: int, chat_id: str, text: str, ts: float):
+        self.id = msg_id
+        self.chat_id = chat_id
+        self.text = text
+        self.ts = ts
+
+
+class _ChatState:
+    __slots__ = ("pending", "ready_at", "sent_ts", "backoff")
+
+    def __init__(self):
+        self.pending: Deque[_Message] = deque()
+        self.ready_at = 0.0
+        self.sent_ts: Deque[float] = deque()
+        self.backoff = 0.0
+
+
+def _digest(messages: List[_Message]) -> str:
+    if len(messages) == 1:
+        return messages[0].text[:MAX_MESSAGE_CHARS]
+    return f"📬 알림 {len(messages)}건\n\n" + "\n\n".join(m.text for m in messages)
+
+
+class TelegramNotifier:
+    """
+    텔레그램 전송 큐 (전송 스레드 1개).
+    - enqueue()는 spool 파일에 1줄 기록 후 바로 반환 → 재시작해도 미전송 메시지 유지
+    - 채팅별로 몰린 메시지는 MAX_MESSAGE_CHARS 안에서 digest 1건으로 합쳐 보낸다
+    - 채팅별 최소 간격/분당 한도 준수, 429는 retry_after, 그 외 오류는 지수 백오프
+    - stats(): 큐 길이, 전송 지연(p50/max) 등
+    """
+
+    def __init__(self,
+                 post: PostFn,
+                 spool_path: Path = SPOOL_PATH,
+                 parse_mode: Optional[str] = None,
+                 coalesce_sec: float = COALESCE_WINDOW_SEC,
+                 min_interval_sec: float = CHAT_MIN_INTERVAL_SEC,
+                 max_per_minute: int = CHAT_MAX_PER_MINUTE):
+        self._post = post
+        self.spool_path = Path(spool_path)
+        self.parse_mode = parse_mode
+        self.coalesce_sec = coalesce_sec
+        self.min_interval_sec = min_interval_sec
+        self.max_per_minute = max_per_minute
+        self._cv = threading.Condition()
+        self._chats: Dict[str, _ChatState] = {}
+        self._seq = 0
+        self._depth = 0
+        self._spool = None
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+        self._latency: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._counts = {"enqueued": 0, "delivered": 0, "digests": 0, "rate_limited": 0, "errors": 0, "dropped": 0}
+
+    # ---- spool ----
+    def _load_spool(self) -> List[_Message]:
+        if not self.spool_path.exists():
+            return []
+        pending: Dict[int, _Message] = {}
+        with open(self.spool_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = codec.loads(line)
+                except Exception:
+                    continue
+                if "ack" in row:
+                    for msg_id in row["ack"]:
+                        pending.pop(msg_id, None)
+                elif "id" in row:
+                    pending[row["id"]] = _Message(row["id"], str(row["chat_id"]), row["text"], float(row["ts"]))
+        return [pending[k] for k in sorted(pending)]
+
+    def _spool_write(self, row: Dict) -> None:
+        self._spool.write(codec.dumps_line(row))
+        self._spool.flush()
+
+    # ---- lifecycle ----
+    def start(self) -> None:
+        with self._cv:
+            if self._thread and self._thread.is_alive():
+                return
+            restored = self._load_spool()
+            if self._spool is not None:
+                # stop() 후 재시작: 대기 메시지는 모두 spool 파일에 있다
+                self._spool.close()
+                early = []
+            else:
+                # start() 전에 들어온 메시지: 복구분 뒤 번호로 다시 매기고 spool에도 기록
+                early = [m for st in self._chats.values() for m in st.pending]
+            self._chats.clear()
+            self._seq = max((m.id for m in restored), default=0)
+            for m in early:
+                self._seq += 1
+                m.id = self._seq
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            self._spool = open(self.spool_path, "w", encoding="utf-8")
+            for m in restored + early:
+                self._chats.setdefault(m.chat_id, _ChatState()).pending.append(m)
+                self._spool.write(codec.dumps_line({"id": m.id, "chat_id": m.chat_id, "text": m.text, "ts": m.ts}))
+            self._spool.flush()
+            self._depth = len(restored) + len(early)
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+            self._thread.start()
+        if restored:
+            logger.info(f"텔레그램 spool 재전송 대기: {len(restored)}건")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cv:
+            self._stop = True
+            self._cv.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def enqueue(self, chat_id: str, text: str) -> None:
+        if not chat_id or not text:
+            return
+        with self._cv:
+            self._seq += 1
+            m = _Message(self._seq, str(chat_id), text, time.time())
+            if self._spool is not None:
+                self._spool_write({"id": m.id, "chat_id": m.chat_id, "text": m.text, "ts": m.ts})
+            self._chats.setdefault(m.chat_id, _ChatState()).pending.append(m)
+            self._depth += 1
+            self._counts["enqueued"] += 1
+            self._cv.notify()
+
+    def stats(self) -> Dict:
+        with self._cv:
+            lat = sorted(self._latency)
+            out = dict(self._counts)
+            out["queue_depth"] = self._depth
+        out["latency_p50_sec"] = round(lat[len(lat) // 2], 3) if lat else None
+        out["latency_max_sec"] = round(lat[-1], 3) if lat else None
+        return out
+
+    # ---- sender ----
+    def _next_ready(self, now: float) -> Tuple[Optional[str], float]:
+        """전송 가능한 채팅 (없으면 None, 다음 확인까지 대기 초)."""
+        best_wait = 60.0
+        for chat_id, st in self._chats.items():
+            if not st.pending:
+                continue
+            while st.sent_ts and now - st.sent_ts[0] >= 60.0:
+                st.sent_ts.popleft()
+            ready = max(st.ready_at, st.pending[0].ts + self.coalesce_sec)
+            if len(st.sent_ts) >= self.max_per_minute:
+                ready = max(ready, st.sent_ts[0] + 60.0)
+            if ready <= now:
+                return chat_id, 0.0
+            best_wait = min(best_wait, ready - now)
+        return None, best_wait
+
+    def _take_batch(self, st: _ChatState) -> List[_Message]:
+        batch: List[_Message] = []
+        size = 0
+        for m in st.pending:
+            extra = len(m.text) + 2
+            if batch and size + extra > MAX_MESSAGE_CHARS - 32:
+                break
+            batch.append(m)
+            size += extra
+        return batch
+
+    def _deliver(self, chat_id: str, text: str) -> Tuple[int, Optional[float]]:
+        status, retry_after = self._post(chat_id, text, self.parse_mode)
+        if status == 400 and self.parse_mode:
+            # digest로 합치면서 마크다운이 깨진 경우 일반 텍스트로 재시도
+            status, retry_after = self._post(chat_id, text, None)
+        return status, retry_after
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while True:
+                    if self._stop:
+                        return
+                    chat_id, wait = self._next_ready(time.time())
+                    if chat_id is not None:
+                        break
+                    self._cv.wait(wait)
+                st = self._chats[chat_id]
+                batch = self._take_batch(st)
+
+            try:
+                status, retry_after = self._deliver(chat_id, _digest(batch))
+            except Exception as e:
+                status, retry_after = 0, None
+                logger.warning(f"⛔ Telegram 전송 오류: {e}")
+
+            now = time.time()
+            with self._cv:
+                if status == 200 or (400 <= status < 500 and status != 429):
+                    # 성공, 또는 재시도해도 소용없는 4xx → spool에서 제거
+                    for _ in batch:
+                        st.pending.popleft()
+                    self._depth -= len(batch)
+                    st.backoff = 0.0
+                    st.sent_ts.append(now)
+                    st.ready_at = now + self.min_interval_sec
+                    if status == 200:
+                        self._counts["delivered"] += len(batch)
+                        self._counts["digests"] += 1
+                        self._latency.extend(now - m.ts for m in batch)
+                    else:
+                        self._counts["dropped"] += len(batch)
+                        logger.error(f"⛔ Telegram 전송 실패(status={status}), {len(batch)}건 폐기")
+                    if self._depth == 0:
+                        self._spool.seek(0)
+                        self._spool.truncate()
+                        self._spool.flush()
+                    else:
+                        self._spool_write({"ack": [m.id for m in batch]})
+                elif status == 429:
+                    self._counts["rate_limited"] += 1
+                    st.ready_at = now + (retry_after or max(self.min_interval_sec, st.backoff or 1.0))
+                    logger.warning(f"Telegram 429: {chat_id} {st.ready_at - now:.1f}s 후 재시도")
+                else:
+                    self._counts["errors"] += 1
+                    st.backoff = min(MAX_BACKOFF_SEC, (st.backoff * 2) or 1.0)
+                    st.ready_at = now + st.backoff
@@ -1,32 +1,199 @@
+import random
+import threading
 import time
-from requests import Session, RequestException, ConnectionError, Timeout
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from requests import Session, ConnectionError, ConnectTimeout, RequestException, Timeout
+
+from utils.latency import record_latency
+from utils.weight_governor import BAN_DEFAULT_SEC, RequestBanned, current_priority, get_governor, request_weight
 
 # 전역 세션
 _session = Session()
 
-RATE_LIMIT_DELAY = 1.2
 MAX_RETRIES = 3
+# 재시도 대기: full jitter 지수 백오프 uniform(0, min(MAX, BASE * 2^(n-1)))
+BACKOFF_BASE_SEC = 0.25
+BACKOFF_MAX_SEC = 8.0
+# Retry-After(또는 429/418 기본 밴)가 이보다 길면 붙잡고 기다리지 않는다. 이후 호출은 governor가 막는다
+MAX_RETRY_AFTER_SEC = 30.0
+# 호출 측에서 timeout을 안 주면 무한 대기하지 않도록 (connect, read)
+DEFAULT_TIMEOUT = (3.05, 10.0)
+
+# 응답을 못 받았거나 서버가 처리하지 않은 경우만 재시도
+RETRYABLE = {"rate_limited", "banned", "server", "timeout", "connect", "connection", "decode"}
+# POST 등은 서버가 이미 처리했을 수 있으므로 거절이 확실한 경우만 재시도
+RETRYABLE_UNSAFE = {"rate_limited", "banned", "connect"}
+IDEMPOTENT_METHODS = {"get", "head", "options"}
+
+
+def classify_status(status_code: int) -> str:
+    if 200 <= status_code < 300:
+        return "ok"
+    if status_code == 429:
+        return "rate_limited"
+    if status_code == 418:
+        return "banned"
+    if status_code >= 500:
+        return "server"
+    return "client"
+
+
+def classify_error(error: Exception) -> str:
+    if isinstance(error, RequestBanned):
+        return "ban_active"
+    # ConnectTimeout은 ConnectionError/Timeout 양쪽 하위라 먼저 본다
+    if isinstance(error, ConnectTimeout):
+        return "connect"
+    if isinstance(error, Timeout):
+        return "timeout"
+    if isinstance(error, ConnectionError):
+        return "connection"
+    if isinstance(error, ValueError):
+        return "decode"
+    return "error"
+
+
+def backoff_delay(attempt: int, kind: str, status_code: Optional[int] = None,
+                  retry_after: Optional[float] = None) -> Optional[float]:
+    """다음 시도까지 대기(초). 기다릴 가치가 없으면(밴이 너무 김) None."""
+    if retry_after is None and kind in ("rate_limited", "banned") and status_code in BAN_DEFAULT_SEC:
+        retry_after = BAN_DEFAULT_SEC[status_code]
+    if retry_after is not None:
+        return retry_after if retry_after <= MAX_RETRY_AFTER_SEC else None
+    return random.uniform(0, min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * (2 ** (attempt - 1))))
+
+
+def _retry_after(headers) -> Optional[float]:
+    for key, value in (headers or {}).items():
+        if key.lower() == "retry-after":
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+class RequestStats:
+    """엔드포인트별 시도 결과 집계 (결과 종류별 수, 재시도 수, 지연 합계/최대)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Dict] = {}
+
+    def _entry(self, endpoint: str) -> Dict:
+        entry = self._endpoints.get(endpoint)
+        if entry is None:
+            entry = self._endpoints[endpoint] = {
+                "attempts": 0,
+                "ok": 0,
+                "failed": 0,
+                "retries": 0,
+                "retry_wait_sec": 0.0,
+                "kinds": {},
+                "latency_sum_sec": 0.0,
+                "latency_max_sec": 0.0,
+            }
+        return entry
+
+    def record(self, endpoint: str, kind: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry["attempts"] += 1
+            if kind == "ok":
+                entry["ok"] += 1
+            else:
+                entry["kinds"][kind] = entry["kinds"].get(kind, 0) + 1
+            entry["latency_sum_sec"] += seconds
+            entry["latency_max_sec"] = max(entry["latency_max_sec"], seconds)
+
+    def record_retry(self, endpoint: str, delay: float) -> None:
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry["retries"] += 1
+            entry["retry_wait_sec"] += delay
+
+    def record_failure(self, endpoint: str) -> None:
+        with self._lock:
+            self._entry(endpoint)["failed"] += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            out = {}
+            for endpoint, entry in self._endpoints.items():
+                attempts = entry["attempts"]
+                out[endpoint] = {
+                    **entry,
+                    "kinds": dict(entry["kinds"]),
+                    "success_rate": round(entry["ok"] / attempts, 4) if attempts else None,
+                    "latency_mean_ms": round(entry["latency_sum_sec"] / attempts * 1000, 2) if attempts else None,
+                }
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints = {}
+
+
+REQUEST_STATS = RequestStats()
+
+
+def get_request_stats() -> Dict[str, Dict]:
+    return REQUEST_STATS.snapshot()
+
 
 def safe_request(method, url, **kwargs):
     """
     method: _session.get 혹은 _session.post
     url: 호출 URL
     kwargs: headers, params, json, timeout 등
+    매 시도마다 weight governor에 예약하고 응답 헤더(사용 weight, 429/418)를 반영한다.
+    성공하면 바로 반환하고, 실패는 종류(429/418/5xx/timeout/연결)를 보고 재시도 여부와 대기를 정한다.
+    - Retry-After가 있으면 그만큼, 없으면 jitter 지수 백오프
+    - 4xx(429/418 제외)는 재시도해도 같은 결과라 바로 None
+    - GET 이외 메서드는 서버가 처리하지 않은 게 확실한 경우(429/418/connect timeout)만 재시도
+    - governor가 418 밴 중이라 보내지 않은 경우(ban_active)는 재시도 없이 None
     """
 
     from utils.logger import logger
-    
+
+    name = getattr(method, "__name__", "request")
+    endpoint = urlsplit(url).path or url
+    retryable = RETRYABLE if name.lower() in IDEMPOTENT_METHODS else RETRYABLE_UNSAFE
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    governor = get_governor()
+
     for attempt in range(1, MAX_RETRIES + 1):
+        status_code = None
+        retry_after = None
+        start = time.perf_counter()
         try:
+            governor.acquire(request_weight(url, kwargs.get("params")), current_priority())
+            start = time.perf_counter()
             res = method(url, **kwargs)
-            res.raise_for_status()
-            data = res.json()
-            time.sleep(RATE_LIMIT_DELAY)
+            status_code = res.status_code
+            governor.observe(status_code, res.headers)
+            kind = classify_status(status_code)
+            if kind == "ok":
+                data = res.json()
+            else:
+                retry_after = _retry_after(res.headers)
+                detail = f"status {status_code} {res.text[:120]}"
+        except (ValueError, RequestException) as e:
+            kind = classify_error(e)
+            detail = str(e)
+        elapsed = time.perf_counter() - start
+        REQUEST_STATS.record(endpoint, kind, elapsed)
+        record_latency(f"rest.{endpoint.rsplit('/', 1)[-1]}", elapsed)
+        if kind == "ok":
             return data
-        except (ConnectionError, Timeout, RequestException) as e:
-            logger.warning(f"[API] {method.__name__} 시도 {attempt} 실패: {e}")
-            if attempt == MAX_RETRIES:
-                logger.error(f"[API] {method.__name__} 최대 재시도 실패 → None 반환")
-                return None
-            # 지수 백오프
-            time.sleep(RATE_LIMIT_DELAY * attempt)
+
+        delay = backoff_delay(attempt, kind, status_code, retry_after) if kind in retryable else None
+        if delay is None or attempt == MAX_RETRIES:
+            REQUEST_STATS.record_failure(endpoint)
+            logger.error(f"[API] {name} {endpoint} 시도 {attempt} 실패({kind}) → None 반환: {detail}")
+            return None
+        REQUEST_STATS.record_retry(endpoint, delay)
+        logger.warning(f"[API] {name} {endpoint} 시도 {attempt} 실패({kind}): {detail} → {delay:.2f}s 후 재시도")
+        time.sleep(delay)
@@ -0,0 +1,243 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from storage.repo import append_event, append_trade
+from utils import codec
+from utils.logger import logger
+from utils.telegram import send_telegram_message
+
+JOURNAL_PATH = Path("storage") / "trade_journal.jsonl"
+QUEUE_MAXSIZE = 2000
+BATCH_MAX = 100
+# 배치를 모으는 최대 대기 (이벤트가 몰릴 때만 의미 있음)
+BATCH_WAIT_SEC = 0.2
+
+_STOP = object()
+
+
+class SideEffectPipeline:
+    """
+    주문 경로 밖에서 처리하는 부수 작업 파이프라인.
+    - trade: 호출 스레드에서 journal에 1줄 append+flush 후 큐에 넣고 바로 반환.
+      persist 워커가 fsync → append_trade 배치 → ack 기록. 재시작 시 ack 없는 기록을 다시 저장한다.
+      (append_trade 성공 직후 ack 전에 죽으면 중복 1건 가능: at-least-once)
+    - event: 같은 워커가 배치 저장. 큐가 가득 차면 버리고 카운트만 남긴다.
+    - notify: utils.telegram 전송 큐(digest/레이트 리밋)에 넘긴다.
+    """
+
+    def __init__(self, journal_path: Path = JOURNAL_PATH, maxsize: int = QUEUE_MAXSIZE):
+        self.journal_path = Path(journal_path)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._journal_lock = threading.Lock()
+        self._journal = None
+        self._seq = 0
+        self._unacked = 0
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self.stats = {
+            "trades": 0,
+            "events": 0,
+            "dropped_events": 0,
+            "sync_fallbacks": 0,
+            "replayed": 0,
+            "persist_errors": 0,
+        }
+
+    # ---- journal ----
+    def _open_journal(self) -> None:
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _replay_journal(self) -> List[Tuple[int, Dict]]:
+        if not self.journal_path.exists():
+            return []
+        pending: Dict[int, Dict] = {}
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = codec.loads(line)
+                except Exception:
+                    # 마지막 줄이 쓰다 끊긴 경우
+                    continue
+                if "ack" in row:
+                    for seq in row["ack"]:
+                        pending.pop(seq, None)
+                elif "seq" in row:
+                    pending[row["seq"]] = row["trade"]
+        if pending:
+            self._seq = max(pending)
+        return sorted(pending.items())
+
+    def _journal_trade(self, fields: Dict) -> int:
+        with self._journal_lock:
+            self._seq += 1
+            seq = self._seq
+            self._journal.write(codec.dumps_line({"seq": seq, "trade": fields}))
+            self._journal.flush()
+            self._unacked += 1
+            return seq
+
+    def _ack(self, seqs: List[int]) -> None:
+        with self._journal_lock:
+            self._journal.write(codec.dumps_line({"ack": seqs}))
+            self._unacked -= len(seqs)
+            if self._unacked <= 0:
+                # 전부 저장됐으면 journal 비우기
+                self._journal.truncate(0)
+                self._journal.seek(0)
+                self._unacked = 0
+            self._journal.flush()
+
+    def _fsync(self) -> None:
+        with self._journal_lock:
+            try:
+                os.fsync(self._journal.fileno())
+            except (OSError, ValueError):
+                pass
+
+    # ---- lifecycle ----
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        replay = self._replay_journal()
+        self._open_journal()
+        if replay:
+            # 미저장 trade만 남기고 journal 재작성
+            with self._journal_lock:
+                self._journal.truncate(0)
+                for seq, fields in replay:
+                    self._journal.write(codec.dumps_line({"seq": seq, "trade": fields}))
+                self._journal.flush()
+                self._unacked = len(replay)
+        t = threading.Thread(target=self._persist_loop, name="side-effects-persist", daemon=True)
+        t.start()
+        self._threads.append(t)
+        if replay:
+            logger.info(f"trade journal 재처리: {len(replay)}건")
+            self.stats["replayed"] += len(replay)
+            for seq, fields in replay:
+                self._queue.put(("trade", seq, fields))
+        atexit.register(self.stop)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """남은 큐를 비우고 종료 (미처리 trade는 journal에 남아 다음 기동 시 저장)."""
+        if not self._started:
+            return
+        self._started = False
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        deadline = time.time() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.time()))
+        self._threads = []
+
+    # ---- producers (주문 경로에서 호출, 블로킹 없음) ----
+    def record_trade(self, **fields) -> None:
+        if not self._started:
+            append_trade(**fields)
+            return
+        seq = self._journal_trade(fields)
+        try:
+            self._queue.put_nowait(("trade", seq, fields))
+        except queue.Full:
+            # 큐 포화 시에도 trade는 잃지 않는다 (동기 저장)
+            self.stats["sync_fallbacks"] += 1
+            self._persist_trades([(seq, fields)])
+
+    def record_event(self, **fields) -> None:
+        if not self._started:
+            append_event(**fields)
+            return
+        try:
+            self._queue.put_nowait(("event", 0, fields))
+        except queue.Full:
+            self.stats["dropped_events"] += 1
+
+    def notify(self, message: str) -> None:
+        # send_telegram_message는 전송 큐에 넣고 바로 반환
+        send_telegram_message(message)
+
+    def pending(self) -> Dict[str, int]:
+        return {"queue": self._queue.qsize(), "unacked_trades": self._unacked}
+
+    # ---- workers ----
+    def _drain(self, first) -> Tuple[List, bool]:
+        batch = [first]
+        deadline = time.time() + BATCH_WAIT_SEC
+        while len(batch) < BATCH_MAX:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _persist_trades(self, trades: List[Tuple[int, Dict]]) -> None:
+        done = []
+        for seq, fields in trades:
+            try:
+                append_trade(**fields)
+                done.append(seq)
+                self.stats["trades"] += 1
+            except Exception as e:
+                # journal에 남겨 두고 다음 기동 시 재시도
+                self.stats["persist_errors"] += 1
+                logger.error(f"trade 저장 실패(seq={seq}): {e}")
+        if done:
+            self._ack(done)
+
+    def _persist_loop(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stopping = self._drain(first)
+            trades = [(seq, fields) for kind, seq, fields in batch if kind == "trade"]
+            if trades:
+                self._fsync()
+                self._persist_trades(trades)
+            for kind, _, fields in batch:
+                if kind != "event":
+                    continue
+                try:
+                    append_event(**fields)
+                    self.stats["events"] += 1
+                except Exception as e:
+                    self.stats["persist_errors"] += 1
+                    logger.error(f"event 저장 실패: {e}")
+
+
+_PIPELINE: Optional[SideEffectPipeline] = None
+_PIPELINE_LOCK = threading.Lock()
+
+
+def get_pipeline() -> SideEffectPipeline:
+    global _PIPELINE
+    if _PIPELINE is None:
+        with _PIPELINE_LOCK:
+            if _PIPELINE is None:
+                _PIPELINE = SideEffectPipeline()
+    return _PIPELINE
+
+
+def record_trade(**fields) -> None:
+    get_pipeline().record_trade(**fields)
+
+
+def record_event(**fields) -> None:
+    get_pipeline().record_event(**fields)
+
+
+def notify(message: str) -> None:
+    get_pipeline().notify(message)
@@ -1,8 +1,10 @@
 import requests
 import json
 import os
+import threading
 from datetime import datetime, timedelta
-from utils.safe_request import safe_request
+from typing import Optional, Tuple
+from utils.notifier import TelegramNotifier
 from config.exchange import QUOTE_ASSET
 from storage.repo import get_latest_snapshot, save_snapshot
 
@@ -12,29 +14,51 @@ with open(os.path.join(os.path.dirname(__file__), '..', 'config', 'secrets.json'
 BOT_TOKEN = secrets.get("TELEGRAM_TOKEN")
 CHAT_ID   = secrets.get("TELEGRAM_CHAT_ID")
 
+TELEGRAM_TIMEOUT = (3.05, 10)
+
+_session = requests.Session()
+_notifier: Optional[TelegramNotifier] = None
+_notifier_lock = threading.Lock()
+
+
+def _post_message(chat_id: str, text: str, parse_mode: Optional[str]) -> Tuple[int, Optional[float]]:
+    """sendMessage 1회 호출 → (status, retry_after)"""
+    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
+    payload = {"chat_id": chat_id, "text": text}
+    if parse_mode:
+        payload["parse_mode"] = parse_mode
+    res = _session.post(url, json=payload, timeout=TELEGRAM_TIMEOUT)
+    retry_after = None
+    if res.status_code == 429:
+        try:
+            retry_after = float(res.json().get("parameters", {}).get("retry_after"))
+        except Exception:
+            retry_after = None
+    return res.status_code, retry_after
+
+
+def get_notifier() -> TelegramNotifier:
+    global _notifier
+    if _notifier is None:
+        with _notifier_lock:
+            if _notifier is None:
+                notifier = TelegramNotifier(_post_message, parse_mode="Markdown")
+                notifier.start()
+                _notifier = notifier
+    return _notifier
+
+
 def send_telegram_message(msg: str):
     """
-    Telegram 메시지 전송 (단일 메시지)
+    Telegram 메시지 전송 요청 (비동기).
+    전송 큐(spool)에 넣고 바로 반환하며, 몰린 메시지는 digest로 합쳐 보낸다.
     """
     from utils.logger import logger
 
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": CHAT_ID,
-        "text": msg,
-        "parse_mode": "Markdown"
-    }
     try:
-        res = safe_request(requests.post, url, json=payload)
-
-        if isinstance(res, dict):
-            if not res.get("ok", False):
-                logger.error("⛔ Telegram 전송 실패: ok=False")
-        else:
-            if hasattr(res, 'status_code') and (res.status_code != 200 or not getattr(res, 'ok', False)):
-                logger.error(f"⛔ Telegram 전송 실패: {res.text}")
+        get_notifier().enqueue(CHAT_ID, msg)
     except Exception as e:
-        logger.error(f"⛔ Telegram 예외 발생: {e}")
+        logger.error(f"⛔ Telegram 큐 등록 실패: {e}")
 
 
 def send_telegram_summary_if_needed(summary: dict):
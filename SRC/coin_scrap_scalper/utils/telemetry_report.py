@@ -3,7 +3,10 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple
 
 from storage.db import connect
-from utils.telegram import send_telegram_message
+from utils.candle_log import cache_stats
+from utils.latency import LATENCY, dump_latency, format_report_lines
+from utils.telegram import get_notifier, send_telegram_message
+from utils.weight_governor import get_governor
 
 KST = timezone(timedelta(hours=9))
 
@@ -127,6 +130,33 @@ def send_3h_report_once() -> None:
     else:
         msg_lines.append("💰 실현손익: 집계 데이터 없음")
 
+    tg = get_notifier().stats()
+    if tg["latency_p50_sec"] is not None:
+        msg_lines.append(
+            f"📨 알림 큐: 대기 {tg['queue_depth']}건, 지연 p50 {tg['latency_p50_sec']:.1f}s / max {tg['latency_max_sec']:.1f}s"
+        )
+
+    gov = get_governor().snapshot()
+    msg_lines.append(
+        f"⚖️ REST weight: {gov['used']}/{gov['limit']} (헤더 {gov['last_used_header']}), "
+        f"대기 {gov['waits']}회 {gov['waited_sec']:.0f}s, 429/418 {gov['bans']}회"
+    )
+    cc = cache_stats()
+    msg_lines.append(
+        f"🕯️ 캔들 캐시: hit {cc['hits']} / miss {cc['misses']} / 합류 {cc['coalesced']}, "
+        f"제거 {cc['evictions']}, {cc['series']}개 시리즈 {cc['rows']}행"
+    )
+
+    # 주문 경로 지연 (직전 리포트 이후 구간, ms). 구간을 비우기 전에 파일로 덤프
+    try:
+        dump_latency()
+    except Exception:
+        pass
+    latency_lines = format_report_lines(LATENCY.take_window()["spans"])
+    if latency_lines:
+        msg_lines.append("⏱️ 지연 p50/p99/max")
+        msg_lines.extend(latency_lines)
+
     send_telegram_message("\n".join(msg_lines))
 
 
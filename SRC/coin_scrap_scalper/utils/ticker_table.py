@@ -0,0 +1,238 @@
+import threading
+import time
+from array import array
+from typing import Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+from data.fetch_price import get_all_tickers_24hr
+from utils.logger import logger
+from utils.ws_stream import StreamConnection, WS_BASE_URL
+
+# !ticker@arr: 변경된 심볼만 1초마다 (P/q/n 포함). !miniTicker@arr는 체결 수(n)가 없어 REST 시드 값을 유지
+TICKER_STREAM = "!ticker@arr"
+# 마지막 수신 후 이 시간이 지나면 표를 믿지 않는다 (1차 필터는 REST fallback)
+TICKER_STALE_SEC = 10.0
+RESEED_INTERVAL_SEC = 3600
+RETRY_SEC = 5.0
+
+# (change_pct, quote_volume, trade_count) -> 통과 여부
+Predicate = Callable[[float, float, int], bool]
+Stats = Tuple[float, float, int]
+
+
+class TickerTable:
+    """
+    전체 pair 24h 통계표 (change %, quote volume, trade count).
+    - REST ticker/24hr 1회 시드 후 all-market ticker 스트림으로 갱신 ((재)연결 시 REST 재시드)
+    - 컬럼은 PriceBoard처럼 pair별 고정 슬롯 array
+    - track(key, predicate)로 지정한 필터의 통과 집합을 갱신 때마다 유지 → matching()은 집합만 복사
+    - 통과 집합에 들어오거나 빠진 pair(threshold cross)는 crossed로 모아 wait_crossing()을 깨운다
+    - track(..., universe=)로 판정 대상 pair를 제한 (QUOTE_ASSET 외 pair의 crossing으로 재스캔하지 않도록)
+    """
+
+    def __init__(self, stream: str = TICKER_STREAM, base_url: str = WS_BASE_URL):
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._change = array("d")
+        self._quote_volume = array("d")
+        self._trade_count = array("q")
+        self._event_ms = array("q")
+        self._key: Optional[Hashable] = None
+        self._predicate: Optional[Predicate] = None
+        self._universe: Optional[FrozenSet[str]] = None
+        self._passing: Set[str] = set()
+        self._crossed: Set[str] = set()
+        self._cross_event = threading.Event()
+        self._last_recv = 0.0
+        self._seeded = False
+        self._stop = threading.Event()
+        self._reseed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn = StreamConnection("ticker-arr", self._on_data, base_url, on_open=self._reseed.set)
+        self._conn.set_streams([stream])
+
+    def _slot(self, pair: str) -> int:
+        idx = self._index.get(pair)
+        if idx is None:
+            idx = len(self._change)
+            self._change.append(0.0)
+            self._quote_volume.append(0.0)
+            self._trade_count.append(0)
+            self._event_ms.append(0)
+            self._index[pair] = idx
+        return idx
+
+    def _set_locked(self, pair: str, change_pct: float, quote_volume: float,
+                    trade_count: Optional[int], event_ms: int) -> None:
+        idx = self._slot(pair)
+        if event_ms < self._event_ms[idx]:
+            return
+        self._change[idx] = change_pct
+        self._quote_volume[idx] = quote_volume
+        if trade_count is not None:
+            self._trade_count[idx] = trade_count
+        self._event_ms[idx] = event_ms
+        if self._predicate is None or (self._universe is not None and pair not in self._universe):
+            return
+        passed = self._predicate(change_pct, quote_volume, self._trade_count[idx])
+        if passed != (pair in self._passing):
+            if passed:
+                self._passing.add(pair)
+            else:
+                self._passing.discard(pair)
+            self._crossed.add(pair)
+            self._cross_event.set()
+
+    def load_rest(self, tickers: List[Dict]) -> int:
+        """REST ticker/24hr 응답으로 표 갱신. 반영 수 반환."""
+        n = 0
+        with self._lock:
+            for t in tickers:
+                if not isinstance(t, dict) or not t.get("symbol"):
+                    continue
+                self._set_locked(
+                    t["symbol"],
+                    float(t.get("priceChangePercent", 0)),
+                    float(t.get("quoteVolume", 0)),
+                    int(t.get("count", 0)),
+                    int(t.get("closeTime") or 0),
+                )
+                n += 1
+            self._seeded = True
+        return n
+
+    def _on_data(self, data) -> None:
+        if isinstance(data, dict):
+            data = [data]
+        now = time.time()
+        with self._lock:
+            for item in data:
+                pair = item.get("s")
+                if not pair:
+                    continue
+                if "P" in item:
+                    change_pct = float(item["P"])
+                else:
+                    open_price = float(item.get("o") or 0)
+                    change_pct = (float(item["c"]) / open_price - 1) * 100 if open_price > 0 else 0.0
+                trade_count = item.get("n")
+                self._set_locked(
+                    pair,
+                    change_pct,
+                    float(item.get("q") or 0),
+                    int(trade_count) if trade_count is not None else None,
+                    int(item.get("E") or 0),
+                )
+            self._last_recv = now
+
+    def is_live(self) -> bool:
+        return self._seeded and self._conn.connected and time.time() - self._last_recv <= TICKER_STALE_SEC
+
+    def get(self, pair: str) -> Optional[Stats]:
+        idx = self._index.get(pair)
+        if idx is None:
+            return None
+        return self._change[idx], self._quote_volume[idx], self._trade_count[idx]
+
+    def track(self, key: Hashable, predicate: Predicate, universe: Optional[Iterable[str]] = None) -> None:
+        """
+        crossing 감시 필터 교체. 현재 표 전체로 통과 집합을 다시 만든다 (이때는 crossing 없음).
+        universe를 주면 그 pair만 판정한다 (나머지는 통과 집합/crossing 모두 제외).
+        """
+        universe = frozenset(universe) if universe is not None else None
+        with self._lock:
+            self._key = key
+            self._predicate = predicate
+            self._universe = universe
+            self._passing = {
+                pair for pair, i in self._index.items()
+                if (universe is None or pair in universe)
+                and predicate(self._change[i], self._quote_volume[i], self._trade_count[i])
+            }
+            self._crossed.clear()
+
+    def ensure_tracking(self, key: Hashable, predicate: Predicate, universe: Optional[Iterable[str]] = None) -> None:
+        universe = frozenset(universe) if universe is not None else None
+        if key != self._key or universe != self._universe:
+            self.track(key, predicate, universe)
+
+    def matching(self, key: Hashable, predicate: Predicate, universe: Optional[Iterable[str]] = None) -> Dict[str, Stats]:
+        """필터 통과 pair → (change %, quote volume, trade count). key/universe가 감시 중인 필터와 같으면 집합만 읽는다."""
+        self.ensure_tracking(key, predicate, universe)
+        with self._lock:
+            return {
+                pair: (self._change[i], self._quote_volume[i], self._trade_count[i])
+                for pair, i in ((p, self._index[p]) for p in self._passing)
+            }
+
+    def has_crossed(self) -> bool:
+        return bool(self._crossed)
+
+    def take_crossed(self) -> Set[str]:
+        with self._lock:
+            crossed, self._crossed = self._crossed, set()
+        return crossed
+
+    def wait_crossing(self, timeout: float) -> bool:
+        """threshold cross가 생기거나 timeout까지 대기. cross로 깨어났으면 True."""
+        fired = self._cross_event.wait(timeout)
+        self._cross_event.clear()
+        return fired
+
+    def _seed(self) -> bool:
+        try:
+            n = self.load_rest(get_all_tickers_24hr() or [])
+            logger.info(f"24h ticker 표 REST 시드: {n} pairs")
+            return True
+        except Exception as e:
+            logger.warning(f"24h ticker 표 REST 시드 실패: {e}")
+            return False
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._conn.start()
+        self._thread = threading.Thread(target=self._run, name="ticker-table", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._reseed.set()
+        self._conn.stop()
+
+    def _run(self) -> None:
+        last_seed = 0.0
+        while not self._stop.is_set():
+            since = time.time() - last_seed
+            if self._reseed.is_set() and since < TICKER_STALE_SEC:
+                # 시작 시드 직후 첫 연결이면 다시 받지 않는다
+                self._reseed.clear()
+            elif self._reseed.is_set() or since >= RESEED_INTERVAL_SEC:
+                # (재)연결 직후: 끊긴 동안 바뀐 통계를 REST로 덮어쓴다 (더 최신 이벤트는 유지)
+                self._reseed.clear()
+                if self._seed():
+                    last_seed = time.time()
+                else:
+                    self._stop.wait(RETRY_SEC)
+                    self._reseed.set()
+                    continue
+            self._reseed.wait(RETRY_SEC)
+
+
+_TABLE: Optional[TickerTable] = None
+_TABLE_LOCK = threading.Lock()
+
+
+def get_ticker_table() -> TickerTable:
+    global _TABLE
+    if _TABLE is None:
+        with _TABLE_LOCK:
+            if _TABLE is None:
+                _TABLE = TickerTable()
+    return _TABLE
+
+
+def start_ticker_table() -> TickerTable:
+    table = get_ticker_table()
+    table.start()
+    return table
@@ -1,9 +1,8 @@
 from datetime import datetime
 from typing import List, Dict
 
-import requests
-
-from config.exchange import BINANCE_BASE_URL, QUOTE_ASSET
+from config.exchange import QUOTE_ASSET
+from utils.exchange_catalog import get_catalog
 from utils.logger import logger
 from storage.repo import get_latest_snapshot, save_snapshot, append_event
 
@@ -28,26 +27,11 @@ def load_or_refresh_universe(quote_asset: str = QUOTE_ASSET) -> List[Dict]:
         if data.get("date") == today and data.get("quoteAsset") == quote_asset:
             return data.get("symbols", [])
 
-    # 2) 없으면 갱신 시도
+    # 2) 없으면 exchangeInfo 카탈로그에서 생성
     try:
-        res = requests.get(f"{BINANCE_BASE_URL}/api/v3/exchangeInfo", timeout=5)
-        data = res.json()
-        symbols = []
-        for s in data.get("symbols", []):
-            if s.get("status") != "TRADING":
-                continue
-            if s.get("quoteAsset") != quote_asset:
-                continue
-            perms = s.get("permissions", [])
-            if perms and "SPOT" not in perms:
-                continue
-            symbols.append({
-                "symbol": s.get("symbol"),
-                "baseAsset": s.get("baseAsset"),
-                "quoteAsset": s.get("quoteAsset"),
-                "status": s.get("status"),
-                "permissions": perms
-            })
+        symbols = get_catalog().listing(quote_asset)
+        if not symbols:
+            raise RuntimeError("exchange catalog empty")
 
         payload = {
             "date": today,
@@ -0,0 +1,275 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from config.auth import build_signed_params
+from config.exchange import QUOTE_ASSET
+from data.fetch_balance import fetch_active_balances
+from utils.exchange_client import get_client
+from utils.logger import logger
+from utils.ws_stream import StreamConnection, WS_BASE_URL
+
+LISTEN_KEY_PATH = "/api/v3/userDataStream"
+# listenKey 유효시간 60분 → 30분마다 연장
+LISTEN_KEY_KEEPALIVE_SEC = 30 * 60
+# 스트림이 살아 있어도 가끔 REST로 맞춰 본다 (누락 이벤트 보정)
+RESYNC_INTERVAL_SEC = 30 * 60
+RETRY_SEC = 10
+EXECUTION_HISTORY = 500
+
+
+class AccountBook:
+    """
+    user-data-stream으로 갱신되는 계정 잔고/체결 장부.
+    balances()는 fetch_active_balances()와 같은 형식을 돌려준다.
+    평균단가는 REST 동기화 값을 기준으로, 이후 BUY 체결은 가중평균으로 반영한다.
+    """
+
+    def __init__(self, quote_asset: str = QUOTE_ASSET):
+        self.quote_asset = quote_asset
+        self._lock = threading.Lock()
+        self._free: Dict[str, float] = {}
+        self._locked: Dict[str, float] = {}
+        self._avg: Dict[str, float] = {}
+        self.executions: Deque[Dict] = deque(maxlen=EXECUTION_HISTORY)
+        self.synced_ts = 0.0
+        self.event_ts = 0.0
+
+    def _base_asset(self, symbol_pair: str) -> Optional[str]:
+        if symbol_pair.endswith(self.quote_asset):
+            return symbol_pair[:-len(self.quote_asset)]
+        return None
+
+    def load_rest(self, balances: List[Dict], quote_free: float) -> None:
+        with self._lock:
+            self._free = {}
+            self._locked = {}
+            for b in balances:
+                asset = b["symbol"]
+                self._free[asset] = float(b.get("available") or 0.0)
+                self._locked[asset] = float(b.get("limit") or 0.0)
+                avg = b.get("average_price")
+                if avg:
+                    self._avg[asset] = float(avg)
+            self._free[self.quote_asset] = float(quote_free or 0.0)
+            self._locked.setdefault(self.quote_asset, 0.0)
+            self.synced_ts = time.time()
+
+    def apply_account_position(self, msg: Dict) -> None:
+        """outboundAccountPosition: 변경된 자산의 free/locked 전체값."""
+        with self._lock:
+            for b in msg.get("B", []):
+                asset = b["a"]
+                self._free[asset] = float(b["f"])
+                self._locked[asset] = float(b["l"])
+            self.event_ts = time.time()
+
+    def apply_balance_update(self, msg: Dict) -> None:
+        """balanceUpdate: 입출금 등 free 증감분."""
+        with self._lock:
+            asset = msg["a"]
+            self._free[asset] = self._free.get(asset, 0.0) + float(msg["d"])
+            self.event_ts = time.time()
+
+    def apply_execution(self, msg: Dict) -> None:
+        with self._lock:
+            self.executions.append({
+                "symbol": msg.get("s"),
+                "side": msg.get("S"),
+                "status": msg.get("X"),
+                "exec_type": msg.get("x"),
+                "order_id": msg.get("i"),
+                "client_order_id": msg.get("c"),
+                "last_qty": float(msg.get("l") or 0.0),
+                "last_price": float(msg.get("L") or 0.0),
+                "cum_qty": float(msg.get("z") or 0.0),
+                "cum_quote": float(msg.get("Z") or 0.0),
+                "ts": msg.get("T") or msg.get("E"),
+            })
+            if msg.get("x") != "TRADE" or msg.get("S") != "BUY":
+                return
+            base = self._base_asset(str(msg.get("s", "")))
+            last_qty = float(msg.get("l") or 0.0)
+            if not base or last_qty <= 0:
+                return
+            # 이 체결 이전 보유량 기준 가중평균 (outboundAccountPosition이 먼저 와도 last_qty만큼 제외)
+            held = max(0.0, self._free.get(base, 0.0) + self._locked.get(base, 0.0) - last_qty)
+            prev_avg = self._avg.get(base, 0.0)
+            if held <= 0 or prev_avg <= 0:
+                self._avg[base] = float(msg["L"])
+            else:
+                self._avg[base] = (prev_avg * held + float(msg["L"]) * last_qty) / (held + last_qty)
+
+    def balance(self, asset: str) -> Optional[Dict]:
+        with self._lock:
+            free = self._free.get(asset, 0.0)
+            locked = self._locked.get(asset, 0.0)
+            if free + locked <= 0:
+                return None
+            return {"symbol": asset, "available": free, "limit": locked, "average_price": self._avg.get(asset)}
+
+    @property
+    def quote_free(self) -> float:
+        return self._free.get(self.quote_asset, 0.0)
+
+    def balances(self) -> Tuple[List[Dict], float]:
+        with self._lock:
+            out = []
+            for asset, free in self._free.items():
+                if asset == self.quote_asset:
+                    continue
+                locked = self._locked.get(asset, 0.0)
+                if free + locked <= 0:
+                    continue
+                out.append({"symbol": asset, "available": free, "limit": locked, "average_price": self._avg.get(asset)})
+            return out, self._free.get(self.quote_asset, 0.0)
+
+
+class UserDataStream:
+    """
+    listenKey 1개로 계정 이벤트를 받아 AccountBook을 유지한다.
+    - 시작/재연결 시 REST(fetch_active_balances)로 전체 동기화
+    - listenKey 30분마다 연장, 만료/실패 시 새 키로 교체
+    """
+
+    def __init__(self, base_url: str = WS_BASE_URL):
+        self.book = AccountBook()
+        self._base_url = base_url
+        self._listen_key: Optional[str] = None
+        self._conn: Optional[StreamConnection] = None
+        self._resync = threading.Event()
+        self._renew = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._synced_once = False
+
+    @property
+    def ready(self) -> bool:
+        """연결돼 있고 REST 동기화가 끝난 상태에서만 장부를 신뢰한다."""
+        return self._synced_once and self._conn is not None and self._conn.connected and not self._resync.is_set()
+
+    def _api_headers(self) -> Dict:
+        headers, _ = build_signed_params({})
+        return {"X-MBX-APIKEY": headers["X-MBX-APIKEY"]} if "X-MBX-APIKEY" in headers else headers
+
+    def _new_listen_key(self) -> Optional[str]:
+        try:
+            res = get_client().post(LISTEN_KEY_PATH, headers=self._api_headers())
+            if res.status_code == 200:
+                return res.json().get("listenKey")
+            logger.warning(f"listenKey 발급 실패: status {res.status_code} {res.text[:120]}")
+        except Exception as e:
+            logger.warning(f"listenKey 발급 실패: {e}")
+        return None
+
+    def _keepalive(self) -> bool:
+        try:
+            res = get_client().put(LISTEN_KEY_PATH, {"listenKey": self._listen_key}, headers=self._api_headers())
+            return res.status_code == 200
+        except Exception as e:
+            logger.warning(f"listenKey 연장 실패: {e}")
+            return False
+
+    def _sync_rest(self) -> bool:
+        try:
+            balances, quote_free = fetch_active_balances()
+            self.book.load_rest(balances or [], quote_free)
+            self._synced_once = True
+            return True
+        except Exception as e:
+            logger.warning(f"잔고 REST 동기화 실패: {e}")
+            return False
+
+    def _connect(self, listen_key: str) -> None:
+        if self._conn is not None:
+            self._conn.stop()
+        self._listen_key = listen_key
+        self._conn = StreamConnection("user", self._on_data, self._base_url, on_open=self._resync.set)
+        self._conn.set_streams([listen_key])
+        self._conn.start()
+
+    def _on_data(self, data: Dict) -> None:
+        event = data.get("e")
+        if event == "outboundAccountPosition":
+            self.book.apply_account_position(data)
+        elif event == "balanceUpdate":
+            self.book.apply_balance_update(data)
+        elif event == "executionReport":
+            self.book.apply_execution(data)
+        elif event == "listenKeyExpired":
+            logger.warning("listenKey 만료 → 재발급")
+            self._renew.set()
+            self._resync.set()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._sync_rest()
+        self._thread = threading.Thread(target=self._run, name="user-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._resync.set()
+        if self._conn is not None:
+            self._conn.stop()
+
+    def _run(self) -> None:
+        last_keepalive = 0.0
+        last_sync = time.time()
+        while not self._stop.is_set():
+            now = time.time()
+            if self._listen_key is None or self._renew.is_set():
+                key = self._new_listen_key()
+                if key is None:
+                    self._stop.wait(RETRY_SEC)
+                    continue
+                self._renew.clear()
+                self._connect(key)
+                last_keepalive = now
+            elif now - last_keepalive >= LISTEN_KEY_KEEPALIVE_SEC:
+                if self._keepalive():
+                    last_keepalive = now
+                else:
+                    self._renew.set()
+                    continue
+
+            if self._resync.is_set() or now - last_sync >= RESYNC_INTERVAL_SEC:
+                # (재)연결 직후: 끊긴 동안의 변화를 REST로 덮어쓴다
+                if self._sync_rest():
+                    self._resync.clear()
+                    last_sync = time.time()
+                    logger.info("✅ user-data-stream 잔고 동기화")
+                else:
+                    self._stop.wait(RETRY_SEC)
+                    continue
+            self._resync.wait(timeout=min(60.0, LISTEN_KEY_KEEPALIVE_SEC))
+
+
+_GLOBAL_USER_STREAM: Optional[UserDataStream] = None
+
+
+def start_user_stream() -> UserDataStream:
+    global _GLOBAL_USER_STREAM
+    if _GLOBAL_USER_STREAM is None:
+        _GLOBAL_USER_STREAM = UserDataStream()
+        _GLOBAL_USER_STREAM.start()
+    return _GLOBAL_USER_STREAM
+
+
+def get_account_book() -> Optional[AccountBook]:
+    """스트림이 정상(연결+동기화)일 때만 장부 반환. 아니면 None → 호출 측 REST 사용."""
+    stream = _GLOBAL_USER_STREAM
+    if stream is None or not stream.ready:
+        return None
+    return stream.book
+
+
+def get_balances() -> Tuple[List[Dict], float]:
+    """fetch_active_balances() 대체. 스트림 장부가 있으면 메모리에서, 없으면 REST."""
+    book = get_account_book()
+    if book is not None:
+        return book.balances()
+    return fetch_active_balances()
@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+from requests import RequestException
+
+PRIORITY_ORDER = 0   # 주문/청산
+PRIORITY_NORMAL = 1  # 전략 시세/잔고/카탈로그
+PRIORITY_SCAN = 2    # 1차 필터 스캔
+
+WEIGHT_LIMIT_1M = 6000
+WEIGHT_WINDOW_SEC = 60
+# 우선순위별 분당 사용 상한 (한도 대비 비율). 스캔이 먼저 멈추고, 주문 몫은 항상 남겨 둔다
+PRIORITY_CEILING = {
+    PRIORITY_ORDER: 1.0,
+    PRIORITY_NORMAL: 0.8,
+    PRIORITY_SCAN: 0.5,
+}
+# 주문은 429/한도 대기라도 이 이상은 붙잡지 않는다 (청산 지연 방지). 418(IP 밴) 중에는 보내지 않고 실패
+ORDER_MAX_WAIT_SEC = 3.0
+# Retry-After 헤더가 없을 때 기본 대기
+BAN_DEFAULT_SEC = {429: 60, 418: 120}
+
+# utils.logger → utils.telegram 쪽과 import 순환을 피하려고 같은 이름의 로거를 직접 쓴다
+logger = logging.getLogger("trading")
+
+ENDPOINT_WEIGHTS: Dict[str, int] = {
+    "/api/v3/order": 1,
+    "/api/v3/ping": 1,
+    "/api/v3/time": 1,
+    "/api/v3/account": 20,
+    "/api/v3/exchangeInfo": 20,
+    "/api/v3/userDataStream": 2,
+}
+
+
+class RequestBanned(RequestException):
+    """418 IP 밴 중이라 요청을 보내지 않음 (밴 중 요청은 밴 시간을 늘린다)."""
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Retry-After 초. 숫자가 아니면(HTTP-date 등) None → 호출 측 기본 대기."""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds >= 0 else None
+
+
+_SCOPE = threading.local()
+
+
+@contextmanager
+def priority_scope(priority: int) -> Iterator[None]:
+    """블록 안에서 나가는 REST 호출(ExchangeClient, safe_request)의 기본 우선순위 지정."""
+    prev = getattr(_SCOPE, "priority", None)
+    _SCOPE.priority = priority
+    try:
+        yield
+    finally:
+        _SCOPE.priority = prev
+
+
+def current_priority(default: int = PRIORITY_NORMAL) -> int:
+    priority = getattr(_SCOPE, "priority", None)
+    return default if priority is None else priority
+
+
+def kline_weight(limit: int) -> int:
+    """/api/v3/klines request weight (limit 구간별)."""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def request_weight(path: str, params: Optional[Dict] = None) -> int:
+    """엔드포인트 경로(또는 전체 URL) + 파라미터로 request weight 추정."""
+    if "://" in path:
+        path = urlsplit(path).path
+    params = params or {}
+    if path.endswith("/klines"):
+        return kline_weight(int(params.get("limit") or 500))
+    if path.endswith("/ticker/24hr"):
+        return 2 if params.get("symbol") else 80
+    if path.endswith("/ticker/price"):
+        return 2 if params.get("symbol") else 4
+    return ENDPOINT_WEIGHTS.get(path, 1)
+
+
+class WeightGovernor:
+    """
+    계정(IP) 단위 REST request weight 관리.
+    - 분 단위 창마다 사용량을 세고, 응답의 X-MBX-USED-WEIGHT-1M 값이 더 크면 그 값으로 맞춘다
+      (다른 프로세스/모듈이 쓴 weight도 반영)
+    - acquire(weight, priority): 우선순위별 상한을 넘으면 다음 창까지 대기 (낮은 우선순위부터 멈춤)
+    - 429/418 응답은 Retry-After 동안 모든 호출을 막는다
+      (주문은 ORDER_MAX_WAIT_SEC까지만 대기 후 전송, 단 418 밴 중이면 RequestBanned)
+    """
+
+    def __init__(self,
+                 limit: int = WEIGHT_LIMIT_1M,
+                 window_sec: int = WEIGHT_WINDOW_SEC,
+                 ceilings: Optional[Dict[int, float]] = None):
+        self.limit = limit
+        self.window_sec = window_sec
+        self.ceilings = dict(PRIORITY_CEILING if ceilings is None else ceilings)
+        self._cv = threading.Condition()
+        self._window = 0
+        self._used = 0
+        self._ban_until = 0.0
+        self._ban_status: Optional[int] = None
+        self.stats = {
+            "acquired": 0,
+            "waits": 0,
+            "waited_sec": 0.0,
+            "forced": 0,
+            "refused": 0,
+            "bans": 0,
+            "last_used_header": None,
+        }
+
+    def _roll(self, now: float) -> None:
+        window = int(now // self.window_sec)
+        if window != self._window:
+            self._window = window
+            self._used = 0
+            self._cv.notify_all()
+
+    def acquire(self, weight: int, priority: int = PRIORITY_NORMAL, max_wait: Optional[float] = None) -> float:
+        """
+        weight만큼 예약. 대기한 초를 반환. max_wait 초과 시 예약만 하고 그대로 진행하되,
+        418 밴이 남아 있으면 보내지 않고 RequestBanned.
+        """
+        if max_wait is None and priority == PRIORITY_ORDER:
+            max_wait = ORDER_MAX_WAIT_SEC
+        cap = self.limit * self.ceilings.get(priority, self.ceilings[PRIORITY_NORMAL])
+        start = time.time()
+        with self._cv:
+            while True:
+                now = time.time()
+                self._roll(now)
+                if now >= self._ban_until and (self._used + weight <= cap or self._used == 0):
+                    break
+                if now < self._ban_until:
+                    until = self._ban_until
+                else:
+                    until = (self._window + 1) * self.window_sec
+                if max_wait is not None and now - start >= max_wait:
+                    if now < self._ban_until and self._ban_status == 418:
+                        self.stats["refused"] += 1
+                        raise RequestBanned(f"418 IP 밴 중: {self._ban_until - now:.0f}s 남음")
+                    self.stats["forced"] += 1
+                    break
+                if max_wait is not None:
+                    until = min(until, start + max_wait)
+                self._cv.wait(max(0.01, until - now))
+            self._used += weight
+            waited = time.time() - start
+            self.stats["acquired"] += 1
+            if waited > 0.01:
+                self.stats["waits"] += 1
+                self.stats["waited_sec"] += waited
+            return waited
+
+    def observe(self, status_code: int, headers) -> None:
+        """응답 헤더/상태로 사용량과 밴 상태 갱신."""
+        now = time.time()
+        used = None
+        retry_after = None
+        for key, value in (headers or {}).items():
+            k = key.lower()
+            if k == "x-mbx-used-weight-1m":
+                try:
+                    used = int(value)
+                except (TypeError, ValueError):
+                    pass
+            elif k == "retry-after":
+                retry_after = parse_retry_after(value)
+        with self._cv:
+            self._roll(now)
+            if used is not None:
+                self.stats["last_used_header"] = used
+                if used > self._used:
+                    self._used = used
+            if status_code in BAN_DEFAULT_SEC:
+                wait = retry_after if retry_after is not None else BAN_DEFAULT_SEC[status_code]
+                until = now + wait
+                if status_code == 418 or now >= self._ban_until:
+                    self._ban_status = status_code
+                if until > self._ban_until:
+                    self._ban_until = until
+                    self.stats["bans"] += 1
+                    logger.warning(f"⛔ REST weight 제한 응답 {status_code}: {wait}s 동안 호출 보류")
+            self._cv.notify_all()
+
+    def snapshot(self) -> Dict:
+        with self._cv:
+            self._roll(time.time())
+            return {
+                "used": self._used,
+                "limit": self.limit,
+                "ban_remaining_sec": round(max(0.0, self._ban_until - time.time()), 1),
+                **self.stats,
+            }
+
+
+_GOVERNOR: Optional[WeightGovernor] = None
+_GOVERNOR_LOCK = threading.Lock()
+
+
+def get_governor() -> WeightGovernor:
+    global _GOVERNOR
+    if _GOVERNOR is None:
+        with _GOVERNOR_LOCK:
+            if _GOVERNOR is None:
+                _GOVERNOR = WeightGovernor()
+    return _GOVERNOR
@@ -1,26 +1,26 @@
-import json
-import random
 import threading
 import time
 import re
-from typing import List, Optional, Dict
+from array import array
+from typing import Callable, List, Optional, Dict, Tuple
 
+from utils import codec
+from utils.exchange_client import get_client
 from utils.logger import logger
 from utils.symbols import format_symbol
+from utils.ws_stream import ShardedStream, WS_BASE_URL, MAX_STREAMS_PER_CONNECTION
 from config.exchange import QUOTE_ASSET
 
-try:
-    import websocket  # type: ignore
-except Exception:  # pragma: no cover - optional dependency
-    websocket = None
+# 이 시간(초) 넘게 tick이 없으면 stale → get_price()는 None, 배치 REST 갱신 대상
+PRICE_STALE_SEC = 15.0
+REST_REFRESH_INTERVAL_SEC = 5.0
+REST_REFRESH_BATCH = 100
 
-_PRICE_CACHE: Dict[str, float] = {}
+TickCallback = Callable[[str, float], None]
 _VALID_SYMBOL_RE = re.compile(r"^[A-Z0-9]+$")
 
 
-def _build_stream_url(symbols: List[str]) -> Optional[str]:
-    if not symbols:
-        return None
+def _build_streams(symbols: List[str]) -> List[str]:
     valid_streams = []
     for s in symbols:
         full = format_symbol(s, QUOTE_ASSET).upper()
@@ -28,94 +28,233 @@ def _build_stream_url(symbols: List[str]) -> Optional[str]:
             logger.warning(f"WS skip invalid symbol: {full}")
             continue
         valid_streams.append(f"{full.lower()}@miniTicker")
-    if not valid_streams:
-        return None
-    streams = "/".join(valid_streams)
-    return f"wss://stream.binance.com:9443/stream?streams={streams}"
+    return valid_streams
 
 
-def get_price(symbol: str) -> Optional[float]:
-    return _PRICE_CACHE.get(symbol.upper())
+def _pair_key(symbol: str) -> str:
+    return format_symbol(symbol, QUOTE_ASSET).upper()
+
+
+class PriceBoard:
+    """
+    심볼별 고정 슬롯(price, event_ts, recv_ts) 가격판.
+    - 슬롯 생성만 lock, 읽기/쓰기는 lock 없음 (array 원소 단위 대입)
+    - 쓰기는 price → event_ts → recv_ts 순, 읽기는 recv_ts를 먼저 읽어
+      경합 시에도 age가 실제보다 작게 나오지 않는다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._price = array("d")
+        self._event_ts = array("d")
+        self._recv_ts = array("d")
+        self._wanted = set()
+
+    def _slot(self, pair: str) -> int:
+        idx = self._index.get(pair)
+        if idx is not None:
+            return idx
+        with self._lock:
+            idx = self._index.get(pair)
+            if idx is None:
+                self._price.append(0.0)
+                self._event_ts.append(0.0)
+                self._recv_ts.append(0.0)
+                idx = len(self._price) - 1
+                self._index[pair] = idx
+        return idx
+
+    def update(self, pair: str, price: float, event_ts: float = 0.0, recv_ts: float = 0.0) -> None:
+        idx = self._slot(pair)
+        now = recv_ts or time.time()
+        self._price[idx] = price
+        self._event_ts[idx] = event_ts or now
+        self._recv_ts[idx] = now
+
+    def read(self, pair: str) -> Optional[Tuple[float, float]]:
+        """(price, age_sec). 수신 이력이 없으면 None."""
+        idx = self._index.get(pair)
+        if idx is None:
+            return None
+        recv = self._recv_ts[idx]
+        if recv <= 0:
+            return None
+        return self._price[idx], time.time() - recv
+
+    def mark_wanted(self, pair: str) -> None:
+        self._wanted.add(pair)
+
+    def take_stale(self, stale_sec: float) -> List[str]:
+        """stale이면서 조회 요청이 있었던 pair 목록을 꺼낸다."""
+        wanted, self._wanted = self._wanted, set()
+        stale = []
+        for pair in wanted:
+            cur = self.read(pair)
+            if cur is None or cur[1] > stale_sec:
+                stale.append(pair)
+        return sorted(stale)
+
+
+PRICE_BOARD = PriceBoard()
+
+
+def get_price_age(symbol: str) -> Optional[Tuple[float, float]]:
+    return PRICE_BOARD.read(_pair_key(symbol))
+
+
+def get_price(symbol: str, max_age_sec: float = PRICE_STALE_SEC) -> Optional[float]:
+    """
+    max_age_sec 이내에 갱신된 가격만 반환.
+    stale/미수신이면 None을 반환하고 배치 REST 갱신 대상으로 등록한다.
+    """
+    pair = _pair_key(symbol)
+    cur = PRICE_BOARD.read(pair)
+    if cur is not None and cur[1] <= max_age_sec:
+        return cur[0]
+    PRICE_BOARD.mark_wanted(pair)
+    return None
+
+
+def refresh_stale_prices(stale_sec: float = PRICE_STALE_SEC) -> int:
+    """stale 심볼을 /api/v3/ticker/price 배치 호출로 갱신. 갱신 수 반환."""
+    pairs = PRICE_BOARD.take_stale(stale_sec)
+    updated = 0
+    for i in range(0, len(pairs), REST_REFRESH_BATCH):
+        chunk = pairs[i:i + REST_REFRESH_BATCH]
+        try:
+            res = get_client().get(
+                "/api/v3/ticker/price",
+                params={"symbols": codec.dumps(chunk)},
+            )
+            if res.status_code != 200:
+                logger.warning(f"가격 배치 갱신 실패: status {res.status_code} {res.text[:120]}")
+                continue
+            now = time.time()
+            for row in codec.loads(res.content):
+                PRICE_BOARD.update(row["symbol"], float(row["price"]), recv_ts=now)
+                updated += 1
+        except Exception as e:
+            logger.warning(f"가격 배치 갱신 실패: {e}")
+    return updated
 
 
 class MiniTickerStream:
-    def __init__(self, symbols: List[str]):
+    """
+    watchlist 심볼 miniTicker 구독.
+    심볼 변경은 살아있는 소켓에 SUBSCRIBE/UNSUBSCRIBE로 반영하고(재연결 없음),
+    심볼 수가 연결당 한도를 넘으면 여러 연결로 자동 분할한다.
+    """
+
+    def __init__(self,
+                 symbols: List[str],
+                 base_url: str = WS_BASE_URL,
+                 max_streams_per_connection: int = MAX_STREAMS_PER_CONNECTION):
         self._symbols = sorted({s.upper() for s in symbols})
         self._stop = threading.Event()
-        self._thread: Optional[threading.Thread] = None
-        self._ws = None
+        self._stream = ShardedStream(
+            "miniTicker", self._on_data, base_url, max_streams_per_connection, on_raw=self._on_raw
+        )
+        self._stream.set_streams(_build_streams(self._symbols))
+        self._listeners: Dict[str, List[TickCallback]] = {}
+        self._pending: Dict[str, float] = {}
+        self._pending_cv = threading.Condition()
+        self._dispatch_thread: Optional[threading.Thread] = None
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @property
+    def shard_count(self) -> int:
+        return self._stream.shard_count
 
     def update_symbols(self, symbols: List[str]) -> None:
         new_symbols = sorted({s.upper() for s in symbols})
         if new_symbols == self._symbols:
             return
         self._symbols = new_symbols
-        self.restart()
+        self._stream.set_streams(_build_streams(new_symbols))
 
-    def start(self) -> None:
-        if websocket is None:
-            logger.warning("websocket-client not installed; WS price feed disabled")
-            return
-        if self._thread and self._thread.is_alive():
+    def subscribe(self, symbol: str, callback: TickCallback) -> None:
+        """
+        symbol tick 수신 시 callback(pair, price) 호출. (pair = BTCUSDT 형식)
+        콜백은 전용 디스패처 스레드에서 실행되며, 밀리면 심볼별 최신 가격 1건으로 합쳐진다.
+        """
+        key = _pair_key(symbol)
+        with self._pending_cv:
+            callbacks = list(self._listeners.get(key, []))
+            if callback not in callbacks:
+                callbacks.append(callback)
+            self._listeners[key] = callbacks
+
+    def unsubscribe(self, symbol: str, callback: TickCallback) -> None:
+        key = _pair_key(symbol)
+        with self._pending_cv:
+            callbacks = [cb for cb in self._listeners.get(key, []) if cb != callback]
+            if callbacks:
+                self._listeners[key] = callbacks
+            else:
+                self._listeners.pop(key, None)
+                self._pending.pop(key, None)
+
+    def _on_tick(self, symbol: str, price: float, event_ts: float = 0.0) -> None:
+        PRICE_BOARD.update(symbol, price, event_ts)
+        if symbol not in self._listeners:
             return
+        with self._pending_cv:
+            wake = not self._pending
+            self._pending[symbol] = price
+            if wake:
+                self._pending_cv.notify()
+
+    def _dispatch(self) -> None:
+        while not self._stop.is_set():
+            with self._pending_cv:
+                while not self._pending and not self._stop.is_set():
+                    self._pending_cv.wait(timeout=1.0)
+                batch = self._pending
+                self._pending = {}
+                listeners = {s: self._listeners.get(s, []) for s in batch}
+            for symbol, price in batch.items():
+                for cb in listeners[symbol]:
+                    try:
+                        cb(symbol, price)
+                    except Exception:
+                        logger.warning(f"WS tick callback error: {symbol}", exc_info=True)
+
+    def start(self) -> None:
         self._stop.clear()
-        self._thread = threading.Thread(target=self._run, daemon=True)
-        self._thread.start()
+        self._stream.start()
+        if not (self._dispatch_thread and self._dispatch_thread.is_alive()):
+            self._dispatch_thread = threading.Thread(target=self._dispatch, daemon=True)
+            self._dispatch_thread.start()
+        if not (self._refresh_thread and self._refresh_thread.is_alive()):
+            self._refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._refresh_thread.start()
 
-    def stop(self) -> None:
-        self._stop.set()
-        if self._ws:
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(REST_REFRESH_INTERVAL_SEC):
             try:
-                self._ws.close()
+                refresh_stale_prices()
             except Exception:
-                pass
+                logger.warning("가격 배치 갱신 오류", exc_info=True)
 
-    def restart(self) -> None:
-        self.stop()
-        time.sleep(1)
-        self.start()
+    def stop(self) -> None:
+        self._stop.set()
+        self._stream.stop()
 
-    def _run(self) -> None:
-        backoff = 1.0
-        while not self._stop.is_set():
-            url = _build_stream_url(self._symbols)
-            if not url:
-                time.sleep(5)
-                continue
-            logger.info(f"WS connect: {url}")
-
-            def on_message(_, message: str):
-                try:
-                    payload = json.loads(message)
-                    data = payload.get("data", payload)
-                    symbol = data.get("s")
-                    price = data.get("c")
-                    if symbol and price is not None:
-                        _PRICE_CACHE[symbol.upper()] = float(price)
-                except Exception:
-                    return
-
-            def on_error(_, error):
-                logger.warning(f"WS error: {error}")
-
-            def on_close(*_):
-                logger.info("WS closed, reconnecting...")
-
-            self._ws = websocket.WebSocketApp(
-                url,
-                on_message=on_message,
-                on_error=on_error,
-                on_close=on_close,
-            )
+    def _on_raw(self, message: str) -> bool:
+        decoded = codec.decode_mini_ticker(message)
+        if decoded is None:
+            return False
+        pair, price, event_ms = decoded
+        self._on_tick(pair, price, event_ms / 1000.0)
+        return True
 
-            try:
-                self._ws.run_forever(ping_interval=30, ping_timeout=10)
-                backoff = 1.0
-            except Exception as e:
-                logger.warning(f"WS run_forever error: {e}")
-            sleep_sec = min(backoff, 60.0) + random.random()
-            time.sleep(sleep_sec)
-            backoff = min(backoff * 2.0, 60.0)
+    def _on_data(self, data: dict) -> None:
+        symbol = data.get("s")
+        price = data.get("c")
+        if symbol and price is not None:
+            event_ms = data.get("E")
+            self._on_tick(symbol.upper(), float(price), event_ms / 1000.0 if event_ms else 0.0)
 
 
 _GLOBAL_STREAM: Optional[MiniTickerStream] = None
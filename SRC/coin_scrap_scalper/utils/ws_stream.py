@@ -0,0 +1,324 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from utils import codec
+from utils.logger import logger
+
+try:
+    import websocket  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    websocket = None
+
+WS_BASE_URL = "wss://stream.binance.com:9443"
+# Binance 한도: 연결당 1024 stream, 연결당 수신 control 메시지 초당 5건
+MAX_STREAMS_PER_CONNECTION = 200
+SUBSCRIBE_BATCH_SIZE = 100
+CONTROL_MSG_INTERVAL_SEC = 0.25
+
+DataHandler = Callable[[dict], None]
+# 원문 메시지 fast path. 처리했으면 True, 아니면 False → 일반 디코딩
+RawHandler = Callable[[str], bool]
+# (재)연결 직후 호출 — 끊긴 동안 놓친 상태를 REST로 다시 맞출 때 사용
+OpenHandler = Callable[[], None]
+
+
+def build_combined_url(streams: Iterable[str], base_url: str = WS_BASE_URL) -> Optional[str]:
+    streams = sorted(streams)
+    if not streams:
+        return None
+    return f"{base_url}/stream?streams={'/'.join(streams)}"
+
+
+class StreamConnection:
+    """
+    combined stream 소켓 1개.
+    연결된 상태에서 set_streams()가 호출되면 재연결 없이 SUBSCRIBE/UNSUBSCRIBE만 보낸다.
+    set_streams()는 목록만 바꾸고 바로 반환하고, 차이 계산은 락 안에서, 전송·간격 대기는 락 밖
+    control 스레드에서 한다 (watchlist 발행 쪽이 전송 간격만큼 묶이지 않게).
+    재연결 시에는 그 시점의 전체 stream 목록으로 URL을 만든다.
+    """
+
+    def __init__(self,
+                 name: str,
+                 on_data: DataHandler,
+                 base_url: str = WS_BASE_URL,
+                 on_raw: Optional[RawHandler] = None,
+                 on_open: Optional[OpenHandler] = None):
+        self.name = name
+        self._on_data = on_data
+        self._on_raw = on_raw
+        self._on_open = on_open
+        self._base_url = base_url
+        self._lock = threading.Lock()
+        self._desired: Set[str] = set()
+        self._live: Set[str] = set()
+        self._connected = False
+        self._msg_id = 0
+        self._last_control_ts = 0.0
+        # on_open마다 증가. 전송 중 재연결되면 이전 연결 기준 diff는 버린다
+        self._epoch = 0
+        self._diff_event = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._control_thread: Optional[threading.Thread] = None
+        self._ws = None
+
+    @property
+    def streams(self) -> Set[str]:
+        return set(self._desired)
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    def set_streams(self, streams: Iterable[str]) -> None:
+        with self._lock:
+            self._desired = set(streams)
+            if self._connected:
+                self._diff_event.set()
+
+    def start(self) -> None:
+        if websocket is None:
+            logger.warning("websocket-client not installed; WS price feed disabled")
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"ws-{self.name}", daemon=True)
+        self._thread.start()
+        if not (self._control_thread and self._control_thread.is_alive()):
+            self._control_thread = threading.Thread(target=self._control_loop, name=f"ws-{self.name}-ctl", daemon=True)
+            self._control_thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._diff_event.set()
+        if self._ws:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+    def _next_id(self) -> int:
+        self._msg_id += 1
+        return self._msg_id
+
+    def _send_control(self, ws, epoch: int, method: str, params: List[str]) -> bool:
+        """batch 단위 전송 (락 밖에서 간격 대기). 보낸 batch만큼 _live 반영. 도중에 재연결됐으면 False."""
+        for i in range(0, len(params), SUBSCRIBE_BATCH_SIZE):
+            wait = CONTROL_MSG_INTERVAL_SEC - (time.time() - self._last_control_ts)
+            if wait > 0:
+                time.sleep(wait)
+            chunk = params[i:i + SUBSCRIBE_BATCH_SIZE]
+            with self._lock:
+                if self._epoch != epoch or not self._connected:
+                    return False
+                msg_id = self._next_id()
+            ws.send(codec.dumps({"method": method, "params": chunk, "id": msg_id}))
+            self._last_control_ts = time.time()
+            with self._lock:
+                if self._epoch != epoch:
+                    return False
+                if method == "SUBSCRIBE":
+                    self._live |= set(chunk)
+                else:
+                    self._live -= set(chunk)
+        return True
+
+    def _apply_diff(self) -> None:
+        with self._lock:
+            if not self._connected:
+                return
+            to_add = sorted(self._desired - self._live)
+            to_remove = sorted(self._live - self._desired)
+            ws, epoch = self._ws, self._epoch
+        if not to_add and not to_remove:
+            return
+        try:
+            if to_remove and not self._send_control(ws, epoch, "UNSUBSCRIBE", to_remove):
+                return
+            if to_add and not self._send_control(ws, epoch, "SUBSCRIBE", to_add):
+                return
+            logger.info(f"WS[{self.name}] streams +{len(to_add)} -{len(to_remove)} (total={len(self._live)})")
+        except Exception as e:
+            # 전송 실패 시 소켓을 끊어 재연결 때 전체 목록으로 다시 구독
+            logger.warning(f"WS[{self.name}] subscribe diff failed: {e}")
+            with self._lock:
+                if self._epoch == epoch:
+                    self._connected = False
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _control_loop(self) -> None:
+        while not self._stop.is_set():
+            self._diff_event.wait()
+            self._diff_event.clear()
+            if self._stop.is_set():
+                break
+            self._apply_diff()
+            # 전송하는 동안 목록이 또 바뀌었으면 이어서 한 번 더
+            with self._lock:
+                if self._connected and self._desired != self._live:
+                    self._diff_event.set()
+
+    def _handle_message(self, message: str) -> None:
+        if self._on_raw is not None:
+            try:
+                if self._on_raw(message):
+                    return
+            except Exception:
+                pass
+        try:
+            payload = codec.loads(message)
+        except Exception:
+            return
+        if not isinstance(payload, dict):
+            return
+        if "id" in payload and "result" in payload:
+            return
+        if "error" in payload:
+            logger.warning(f"WS[{self.name}] control error: {payload.get('error')}")
+            return
+        data = payload.get("data", payload)
+        try:
+            self._on_data(data)
+        except Exception:
+            return
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            with self._lock:
+                url = build_combined_url(self._desired, self._base_url)
+                initial = set(self._desired)
+            if not url:
+                time.sleep(1)
+                continue
+            logger.info(f"WS[{self.name}] connect: {len(initial)} streams")
+
+            def on_open(_):
+                with self._lock:
+                    self._live = set(initial)
+                    self._connected = True
+                    self._epoch += 1
+                    # 연결 중에 바뀐 목록은 control 스레드가 맞춘다
+                    if self._desired != self._live:
+                        self._diff_event.set()
+                if self._on_open is not None:
+                    try:
+                        self._on_open()
+                    except Exception:
+                        logger.warning(f"WS[{self.name}] on_open handler error", exc_info=True)
+
+            def on_message(_, message: str):
+                self._handle_message(message)
+
+            def on_error(_, error):
+                logger.warning(f"WS[{self.name}] error: {error}")
+
+            def on_close(*_):
+                with self._lock:
+                    self._connected = False
+                    self._live = set()
+                logger.info(f"WS[{self.name}] closed, reconnecting...")
+
+            self._ws = websocket.WebSocketApp(
+                url,
+                on_open=on_open,
+                on_message=on_message,
+                on_error=on_error,
+                on_close=on_close,
+            )
+
+            try:
+                self._ws.run_forever(ping_interval=30, ping_timeout=10)
+                backoff = 1.0
+            except Exception as e:
+                logger.warning(f"WS[{self.name}] run_forever error: {e}")
+            with self._lock:
+                self._connected = False
+                self._live = set()
+            if self._stop.is_set():
+                break
+            sleep_sec = min(backoff, 60.0) + random.random()
+            time.sleep(sleep_sec)
+            backoff = min(backoff * 2.0, 60.0)
+
+
+class ShardedStream:
+    """
+    stream 목록을 MAX_STREAMS_PER_CONNECTION 단위로 여러 StreamConnection에 나눠 담는다.
+    이미 배정된 stream은 옮기지 않으므로 목록이 바뀌어도 기존 구독은 끊기지 않는다.
+    """
+
+    def __init__(self,
+                 name: str,
+                 on_data: DataHandler,
+                 base_url: str = WS_BASE_URL,
+                 max_streams_per_connection: int = MAX_STREAMS_PER_CONNECTION,
+                 on_raw: Optional[RawHandler] = None):
+        self.name = name
+        self._on_data = on_data
+        self._on_raw = on_raw
+        self._base_url = base_url
+        self._max_per_conn = max(1, max_streams_per_connection)
+        self._lock = threading.Lock()
+        self._shards: List[StreamConnection] = []
+        self._assign: Dict[str, StreamConnection] = {}
+        self._started = False
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._shards)
+
+    def set_streams(self, streams: Iterable[str]) -> None:
+        desired = set(streams)
+        with self._lock:
+            for stream in list(self._assign):
+                if stream not in desired:
+                    del self._assign[stream]
+
+            counts = {id(c): 0 for c in self._shards}
+            for conn in self._assign.values():
+                counts[id(conn)] += 1
+
+            for stream in sorted(desired - set(self._assign)):
+                conn = next((c for c in self._shards if counts[id(c)] < self._max_per_conn), None)
+                if conn is None:
+                    conn = StreamConnection(
+                        f"{self.name}-{len(self._shards)}", self._on_data, self._base_url, self._on_raw
+                    )
+                    self._shards.append(conn)
+                    counts[id(conn)] = 0
+                    if self._started:
+                        conn.start()
+                self._assign[stream] = conn
+                counts[id(conn)] += 1
+
+            for conn in self._shards:
+                conn.set_streams(s for s, c in self._assign.items() if c is conn)
+
+            # 비어버린 shard는 첫 번째를 제외하고 닫는다
+            keep = []
+            for i, conn in enumerate(self._shards):
+                if i > 0 and counts[id(conn)] == 0:
+                    conn.stop()
+                    continue
+                keep.append(conn)
+            self._shards = keep
+
+    def start(self) -> None:
+        with self._lock:
+            self._started = True
+            for conn in self._shards:
+                conn.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._started = False
+            for conn in self._shards:
+                conn.stop()
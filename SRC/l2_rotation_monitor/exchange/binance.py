@@ -4,8 +4,10 @@ from typing import Dict, List
 import requests
 
 from config.settings import BINANCE_BASE_URL
+from infra.codec import loads
 from infra.logger import logger
 from infra.storage import append_event
+from infra.weight_governor import get_governor, kline_weight
 
 _NEXT_ALLOWED_TS = 0.0
 _BACKOFF_SEC = 5
@@ -93,7 +95,13 @@ def _clear_fetch_fail_state() -> None:
     _FETCH_FAIL_STATE["last_log_ts"] = 0.0
 
 
-def fetch_klines(symbol_pair: str, interval: str, limit: int) -> List[Dict]:
+def fetch_klines(
+    symbol_pair: str,
+    interval: str,
+    limit: int,
+    start_time: int | None = None,
+    end_time: int | None = None,
+) -> List[Dict]:
     global _NEXT_ALLOWED_TS
     now = time.time()
     if now >= _NEXT_ALLOWED_TS and _BACKOFF_STATE["active"]:
@@ -107,11 +115,30 @@ def fetch_klines(symbol_pair: str, interval: str, limit: int) -> List[Dict]:
         _log_backoff_state(symbol_pair, reason, backoff_sec, _NEXT_ALLOWED_TS, now)
         return []
 
+    governor = get_governor()
+    wait_sec = governor.try_acquire(kline_weight(limit), now)
+    if wait_sec > 0:
+        # Weight budget for this minute is spent (or a ban is active): skip without touching the API.
+        next_allowed = now + wait_sec
+        _log_backoff_state(symbol_pair, "weight_budget", int(wait_sec), next_allowed, now)
+        return []
+
     url = f"{BINANCE_BASE_URL}/api/v3/klines"
     params = {"symbol": symbol_pair, "interval": interval, "limit": limit}
+    if start_time is not None:
+        params["startTime"] = start_time
+    if end_time is not None:
+        params["endTime"] = end_time
 
     try:
         res = requests.get(url, params=params, timeout=10)
+        ban_sec = governor.observe(res.status_code, res.headers)
+        if ban_sec:
+            next_allowed = _set_backoff(int(ban_sec))
+            _log_fetch_fail(symbol_pair, "rate_limit", res.text[:200], res.status_code)
+            _log_backoff_state(symbol_pair, "rate_limit", int(ban_sec), next_allowed, time.time())
+            logger.warning(f"klines {symbol_pair} status {res.status_code}: backoff {int(ban_sec)}s")
+            return []
         if res.status_code != 200:
             next_allowed = _set_backoff(_BACKOFF_SEC * 2)
             _log_fetch_fail(symbol_pair, "http_status", res.text[:200], res.status_code)
@@ -119,7 +146,7 @@ def fetch_klines(symbol_pair: str, interval: str, limit: int) -> List[Dict]:
             logger.warning(f"klines {symbol_pair} status {res.status_code}: {res.text[:120]}")
             return []
 
-        data = res.json()
+        data = loads(res.content)
         if isinstance(data, dict) and data.get("code") == -1003:
             next_allowed = _set_backoff(_BACKOFF_SEC * 2)
             _log_fetch_fail(symbol_pair, "rate_limit", data.get("msg", ""))
@@ -0,0 +1,363 @@
+﻿import mmap
+import os
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.settings import STORAGE_DIR
+from exchange.binance import fetch_klines
+from infra.logger import logger
+
+STORE_DIR = Path(STORAGE_DIR) / "candles"
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("open_time", "q"),
+    ("open", "d"),
+    ("high", "d"),
+    ("low", "d"),
+    ("close", "d"),
+    ("volume", "d"),
+)
+INTERVAL_MS = {
+    "1m": 60_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+    "1d": 86_400_000,
+}
+# The monitor polls every cycle for the newest candle, so refresh on every call by default.
+DEFAULT_MAX_AGE_SEC = 0.0
+# Rows kept per (pair, interval); older rows are dropped once the file grows 10% past this.
+KEEP_ROWS = {"1m": 527_040, "5m": 210_816, "1h": 17_568, "1d": 1_000}
+DEFAULT_KEEP_ROWS = 20_000
+FETCH_LIMIT = 1000
+MAX_REPAIR_GAPS = 20
+# When fewer rows are stored than requested, older candles are fetched and prepended.
+# If the exchange had nothing older (new listing, or an error), retry at most this often.
+BACKFILL_RETRY_SEC = 3600
+
+Fetcher = Callable[..., List[Dict]]
+
+
+class CandleView:
+    """Column views over closed candles (memoryviews on the mmap, no copies)."""
+
+    __slots__ = ("open_time", "open", "high", "low", "close", "volume")
+
+    def __init__(self, columns: Dict[str, memoryview]):
+        for name, _ in COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self) -> int:
+        return len(self.open_time)
+
+    def numpy(self) -> Dict:
+        """Dict of numpy arrays via np.frombuffer (zero-copy). Raises ImportError without numpy."""
+        import numpy as np
+
+        return {name: np.frombuffer(getattr(self, name), dtype=np.int64 if code == "q" else np.float64)
+                for name, code in COLUMNS}
+
+
+class _Series:
+    """
+    Column files for one (pair, interval): <root>/<PAIR>/<interval>.<column>
+    Only closed candles are appended; the in-progress candle lives in memory as `live`.
+    """
+
+    def __init__(self, root: Path, pair: str, interval: str):
+        self.pair = pair
+        self.interval = interval
+        self.step = INTERVAL_MS[interval]
+        self.dir = root / pair
+        self.lock = threading.Lock()
+        self.count = 0
+        self.live: Optional[Dict] = None
+        self.refreshed_ts = 0.0
+        self.checked = False
+        self.history_start: Optional[int] = None
+        self.backfill_retry_ts = 0.0
+        self._maps: Dict[str, Optional[mmap.mmap]] = {}
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._open()
+
+    def _path(self, column: str) -> Path:
+        return self.dir / f"{self.interval}.{column}"
+
+    def _open(self) -> None:
+        # Columns of different length mean a crash mid-append: cut all to the shortest.
+        sizes = [self._path(name).stat().st_size // 8 if self._path(name).exists() else 0 for name, _ in COLUMNS]
+        count = min(sizes)
+        for name, _ in COLUMNS:
+            with open(self._path(name), "ab") as f:
+                f.truncate(count * 8)
+        self.count = count
+        self._remap()
+        times = self.column("open_time")
+        for i in range(1, len(times)):
+            if times[i] <= times[i - 1]:
+                logger.warning(f"candle store out of order, dropping rows from {i}: {self.pair} {self.interval}")
+                self._truncate_tail(i)
+                break
+
+    def _remap(self) -> None:
+        # Old maps are not closed so views handed out stay valid; they are freed with their last reference.
+        maps = {}
+        for name, _ in COLUMNS:
+            if self.count == 0:
+                maps[name] = None
+                continue
+            with open(self._path(name), "rb") as f:
+                maps[name] = mmap.mmap(f.fileno(), self.count * 8, access=mmap.ACCESS_READ)
+        self._maps = maps
+
+    def column(self, name: str, start: int = 0, end: Optional[int] = None) -> memoryview:
+        code = dict(COLUMNS)[name]
+        m = self._maps.get(name)
+        if m is None:
+            return memoryview(array(code))
+        return memoryview(m).cast(code)[start:end]
+
+    def last_open_time(self) -> Optional[int]:
+        if self.count == 0:
+            return None
+        return self.column("open_time")[self.count - 1]
+
+    def rows(self, start: int, end: int) -> List[Dict]:
+        cols = [(name, self.column(name, start, end)) for name, _ in COLUMNS]
+        return [{name: col[i] for name, col in cols} for i in range(end - start)]
+
+    def append(self, candles: List[Dict]) -> None:
+        if not candles:
+            return
+        for name, code in COLUMNS:
+            with open(self._path(name), "ab") as f:
+                f.write(array(code, [c[name] for c in candles]).tobytes())
+        self.count += len(candles)
+        self._remap()
+
+    def prepend(self, candles: List[Dict]) -> None:
+        """Put candles older than the first stored one in front of the stored range."""
+        if not candles:
+            return
+        self._rewrite({name: array(code, [c[name] for c in candles]) + array(code, self.column(name))
+                       for name, code in COLUMNS})
+
+    def _rewrite(self, candles_by_column: Dict[str, array]) -> None:
+        for name, _ in COLUMNS:
+            tmp = self._path(name).with_suffix(f".{name}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(candles_by_column[name].tobytes())
+            os.replace(tmp, self._path(name))
+        self.count = len(candles_by_column["open_time"])
+        self._remap()
+
+    def _truncate_tail(self, keep: int) -> None:
+        self._rewrite({name: array(code, self.column(name, 0, keep)) for name, code in COLUMNS})
+
+    def keep_last(self, rows: int) -> None:
+        start = max(0, self.count - rows)
+        self._rewrite({name: array(code, self.column(name, start)) for name, code in COLUMNS})
+
+    def merge(self, candles: List[Dict]) -> int:
+        """Insert gap candles in open_time order. Returns the number added."""
+        by_time = {c["open_time"]: c for c in self.rows(0, self.count)}
+        before = len(by_time)
+        for c in candles:
+            by_time.setdefault(c["open_time"], c)
+        if len(by_time) == before:
+            return 0
+        ordered = [by_time[t] for t in sorted(by_time)]
+        self._rewrite({name: array(code, [c[name] for c in ordered]) for name, code in COLUMNS})
+        return len(by_time) - before
+
+    def gaps(self) -> List[Tuple[int, int]]:
+        """Holes in the stored range as [(open_time before, open_time after)]."""
+        times = self.column("open_time")
+        step = self.step
+        return [(times[i - 1], times[i]) for i in range(1, len(times)) if times[i] - times[i - 1] > step]
+
+
+class CandleStore:
+    """
+    On-disk candle store per (pair, interval), one mmap'd file per column.
+    - get_candles(): fetches only candles after the last stored open_time
+    - fewer stored rows than requested (e.g. the series was seeded by a smaller request): older candles are fetched and prepended
+    - a series opened for the first time has its internal gaps re-fetched (exchange outages stay as gaps)
+    - view(): closed-candle columns without copying (numpy conversion is zero-copy too)
+    """
+
+    def __init__(self, root: Path = STORE_DIR, fetch: Fetcher = fetch_klines):
+        self.root = Path(root)
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self.stats = {"refreshes": 0, "fetched_rows": 0, "backfills": 0, "repaired_rows": 0, "history_rows": 0, "errors": 0}
+
+    def series(self, pair: str, interval: str) -> _Series:
+        key = (pair.upper(), interval)
+        s = self._series.get(key)
+        if s is None:
+            with self._lock:
+                s = self._series.get(key)
+                if s is None:
+                    s = self._series[key] = _Series(self.root, key[0], interval)
+        return s
+
+    def _fetch_since(self, s: _Series, start: int, now_ms: int) -> List[Dict]:
+        out: List[Dict] = []
+        while True:
+            missing = (now_ms - start) // s.step + 1
+            limit = int(max(1, min(FETCH_LIMIT, missing)))
+            batch = self._fetch(s.pair, s.interval, limit, start_time=start)
+            if not batch and not out:
+                # fetch_klines swallows errors; a live pair always returns the in-progress candle
+                raise RuntimeError("empty klines response")
+            out.extend(batch)
+            if not batch or len(batch) < limit or batch[-1]["open_time"] + s.step > now_ms:
+                return out
+            start = batch[-1]["open_time"] + s.step
+
+    def _fetch_range(self, s: _Series, start: int, end: int) -> List[Dict]:
+        out: List[Dict] = []
+        while start <= end:
+            batch = self._fetch(s.pair, s.interval, FETCH_LIMIT, start_time=start, end_time=end)
+            out.extend(batch)
+            if len(batch) < FETCH_LIMIT:
+                break
+            start = batch[-1]["open_time"] + s.step
+        return out
+
+    def _repair(self, s: _Series) -> None:
+        for prev, nxt in s.gaps()[:MAX_REPAIR_GAPS]:
+            rows = self._fetch_range(s, prev + s.step, nxt - s.step)
+            added = s.merge(rows) if rows else 0
+            self.stats["repaired_rows"] += added
+            if added:
+                logger.info(f"candle gap repaired: {s.pair} {s.interval} +{added}")
+
+    def _backfill(self, s: _Series, rows: int) -> int:
+        """Fetch up to `rows` candles before the first stored one (walking back from endTime = first open_time - step) and prepend them."""
+        first = s.column("open_time")[0]
+        older: List[Dict] = []
+        end = first - s.step
+        while rows > 0:
+            limit = int(min(FETCH_LIMIT, rows))
+            batch = [r for r in self._fetch(s.pair, s.interval, limit, end_time=end) if r["open_time"] < first]
+            older = batch + older
+            if len(batch) < limit:
+                # Fewer than asked: we reached the exchange's first candle
+                if older:
+                    s.history_start = older[0]["open_time"]
+                break
+            rows -= len(batch)
+            end = batch[0]["open_time"] - s.step
+        s.prepend(older)
+        return len(older)
+
+    def _history_short(self, s: _Series, size: int) -> bool:
+        """True when fewer than size - 1 closed rows (capped at retention) are stored and the exchange may still have older ones."""
+        want = min(size - 1, KEEP_ROWS.get(s.interval, DEFAULT_KEEP_ROWS))
+        return (
+            0 < s.count < want
+            and s.history_start is None
+            and time.time() >= s.backfill_retry_ts
+        )
+
+    def _extend_history(self, s: _Series, size: int) -> None:
+        want = min(size - 1, KEEP_ROWS.get(s.interval, DEFAULT_KEEP_ROWS))
+        try:
+            added = self._backfill(s, want - s.count)
+        except Exception as e:
+            added = 0
+            self.stats["errors"] += 1
+            logger.warning(f"candle history backfill failed: {s.pair} {s.interval} {e}")
+        if not added:
+            # Empty response: no older history or a failed fetch (indistinguishable) -> retry later
+            s.backfill_retry_ts = time.time() + BACKFILL_RETRY_SEC
+            return
+        self.stats["history_rows"] += added
+        logger.info(f"candle history backfilled: {s.pair} {s.interval} +{added}")
+
+    def refresh(self, pair: str, interval: str, size: int) -> bool:
+        s = self.series(pair, interval)
+        with s.lock:
+            return self._refresh_locked(s, size)
+
+    def _refresh_locked(self, s: _Series, size: int) -> bool:
+        now_ms = int(time.time() * 1000)
+        try:
+            if not s.checked:
+                s.checked = True
+                self._repair(s)
+            last = s.last_open_time()
+            keep = KEEP_ROWS.get(s.interval, DEFAULT_KEEP_ROWS)
+            if last is None or (now_ms - last) // s.step > keep:
+                # Empty, or stale beyond the retention window: start over from the newest `size` candles.
+                if last is not None:
+                    s.keep_last(0)
+                rows = self._fetch(s.pair, s.interval, int(min(FETCH_LIMIT, size + 1)))
+                if not rows:
+                    raise RuntimeError("empty klines response")
+                self.stats["backfills"] += 1
+                last = None
+            else:
+                rows = self._fetch_since(s, last + s.step, now_ms)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"candle fetch failed: {s.pair} {s.interval} {e}")
+            return False
+
+        closed = [r for r in rows if r["open_time"] + s.step <= now_ms and (last is None or r["open_time"] > last)]
+        s.append(closed)
+        s.live = rows[-1] if rows and rows[-1]["open_time"] + s.step > now_ms else None
+        s.refreshed_ts = time.time()
+        self.stats["refreshes"] += 1
+        self.stats["fetched_rows"] += len(rows)
+        if s.count > keep * 1.1:
+            s.keep_last(keep)
+        if self._history_short(s, size):
+            self._extend_history(s, size)
+        return True
+
+    def get_candles(self, pair: str, interval: str, size: int, max_age_sec: Optional[float] = None) -> List[Dict]:
+        """
+        Latest `size` candles (closed ones plus the in-progress one), same dicts as fetch_klines.
+        Returns [] when a refresh is due and fails, so callers keep their empty-candles handling.
+        """
+        s = self.series(pair, interval)
+        max_age = DEFAULT_MAX_AGE_SEC if max_age_sec is None else max_age_sec
+        with s.lock:
+            if time.time() - s.refreshed_ts >= max_age:
+                if not self._refresh_locked(s, size):
+                    return []
+            elif self._history_short(s, size):
+                self._extend_history(s, size)
+            live = s.live
+            n = min(s.count, size - 1 if live else size)
+            rows = s.rows(s.count - n, s.count)
+        if live:
+            rows.append(dict(live))
+        return rows
+
+    def view(self, pair: str, interval: str, size: Optional[int] = None) -> CandleView:
+        s = self.series(pair, interval)
+        with s.lock:
+            start = 0 if size is None else max(0, s.count - size)
+            return CandleView({name: s.column(name, start, s.count) for name, _ in COLUMNS})
+
+
+_STORE: Optional[CandleStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> CandleStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = CandleStore()
+    return _STORE
@@ -1,27 +1,302 @@
 ﻿import os
-from typing import Optional
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
 
 import requests
 
+from config.settings import STORAGE_DIR
+from infra.codec import dumps_line, loads
 from infra.logger import logger
 
+SPOOL_PATH = Path(STORAGE_DIR) / "telegram_spool.jsonl"
+COALESCE_WINDOW_SEC = 0.5
+MAX_MESSAGE_CHARS = 4000
+CHAT_MIN_INTERVAL_SEC = 1.0
+CHAT_MAX_PER_MINUTE = 20
+MAX_BACKOFF_SEC = 120.0
+LATENCY_WINDOW = 500
+SEND_TIMEOUT = (3.05, 10)
 
-def send_telegram_message(text: str) -> bool:
-    token = os.getenv("TELEGRAM_BOT_TOKEN")
-    chat_id = os.getenv("TELEGRAM_CHAT_ID")
-    if not token or not chat_id:
-        return False
+# (chat_id, text, parse_mode) -> (HTTP status, retry_after seconds); network errors raise
+PostFn = Callable[[str, str, Optional[str]], Tuple[int, Optional[float]]]
+
+_session = requests.Session()
+
+
+class _Message:
+    __slots__ = ("id", "chat_id", "text", "ts")
+
+    def __init__(self, msg_id: int, chat_id: str, text: str, ts: float):
+        self.id = msg_id
+        self.chat_id = chat_id
+        self.text = text
+        self.ts = ts
+
+
+class _ChatState:
+    __slots__ = ("pending", "ready_at", "sent_ts", "backoff")
+
+    def __init__(self):
+        self.pending: Deque[_Message] = deque()
+        self.ready_at = 0.0
+        self.sent_ts: Deque[float] = deque()
+        self.backoff = 0.0
 
+
+def _digest(messages: List[_Message]) -> str:
+    if len(messages) == 1:
+        return messages[0].text[:MAX_MESSAGE_CHARS]
+    return f"[{len(messages)} alerts]\n\n" + "\n\n".join(m.text for m in messages)
+
+
+def make_post(token: str) -> PostFn:
+    """sendMessage over the shared requests session for the given bot token."""
     url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {"chat_id": chat_id, "text": text}
 
-    try:
-        res = requests.post(url, json=payload, timeout=10)
-        if res.status_code != 200:
+    def post(chat_id: str, text: str, parse_mode: Optional[str]) -> Tuple[int, Optional[float]]:
+        payload = {"chat_id": chat_id, "text": text}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        res = _session.post(url, json=payload, timeout=SEND_TIMEOUT)
+        retry_after = None
+        if res.status_code == 429:
+            try:
+                retry_after = float(res.json().get("parameters", {}).get("retry_after"))
+            except Exception:
+                retry_after = None
+        elif res.status_code != 200:
             logger.warning(f"telegram send failed: {res.status_code} {res.text[:120]}")
-            return False
+        return res.status_code, retry_after
+
+    return post
+
+
+class TelegramNotifier:
+    """
+    Single sender thread with an on-disk spool.
+    Bursts per chat are merged into one digest, per-chat pacing and the
+    per-minute budget are respected, 429 honours retry_after and other
+    failures back off exponentially. The transport is injected as `post`.
+    """
+
+    def __init__(self,
+                 post: PostFn,
+                 spool_path: Path = SPOOL_PATH,
+                 parse_mode: Optional[str] = None,
+                 coalesce_sec: float = COALESCE_WINDOW_SEC,
+                 min_interval_sec: float = CHAT_MIN_INTERVAL_SEC,
+                 max_per_minute: int = CHAT_MAX_PER_MINUTE):
+        self._post = post
+        self.spool_path = Path(spool_path)
+        self.parse_mode = parse_mode
+        self.coalesce_sec = coalesce_sec
+        self.min_interval_sec = min_interval_sec
+        self.max_per_minute = max_per_minute
+        self._cv = threading.Condition()
+        self._chats: Dict[str, _ChatState] = {}
+        self._seq = 0
+        self._depth = 0
+        self._stop = False
+        self._spool = None
+        self._thread: Optional[threading.Thread] = None
+        self._latency: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._counts = {"enqueued": 0, "delivered": 0, "digests": 0, "rate_limited": 0, "errors": 0, "dropped": 0}
+
+    def _load_spool(self) -> List[_Message]:
+        if not self.spool_path.exists():
+            return []
+        pending: Dict[int, _Message] = {}
+        with open(self.spool_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = loads(line)
+                except Exception:
+                    continue
+                if "ack" in row:
+                    for msg_id in row["ack"]:
+                        pending.pop(msg_id, None)
+                elif "id" in row:
+                    pending[row["id"]] = _Message(row["id"], str(row["chat_id"]), row["text"], float(row["ts"]))
+        return [pending[k] for k in sorted(pending)]
+
+    def _spool_write(self, row: Dict) -> None:
+        self._spool.write(dumps_line(row))
+        self._spool.flush()
+
+    def start(self) -> None:
+        with self._cv:
+            if self._thread and self._thread.is_alive():
+                return
+            restored = self._load_spool()
+            if self._spool is not None:
+                # restart after stop(): everything pending is already in the spool file
+                self._spool.close()
+                early = []
+            else:
+                # queued before start(): renumber after the restored ids and spool them too
+                early = [m for st in self._chats.values() for m in st.pending]
+            self._chats.clear()
+            self._seq = max((m.id for m in restored), default=0)
+            for m in early:
+                self._seq += 1
+                m.id = self._seq
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            self._spool = open(self.spool_path, "w", encoding="utf-8")
+            for m in restored + early:
+                self._chats.setdefault(m.chat_id, _ChatState()).pending.append(m)
+                self._spool.write(dumps_line({"id": m.id, "chat_id": m.chat_id, "text": m.text, "ts": m.ts}))
+            self._spool.flush()
+            self._depth = len(restored) + len(early)
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+            self._thread.start()
+        if restored:
+            logger.info(f"telegram spool restored: {len(restored)} pending")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cv:
+            self._stop = True
+            self._cv.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def enqueue(self, chat_id: str, text: str) -> None:
+        if not chat_id or not text:
+            return
+        with self._cv:
+            self._seq += 1
+            m = _Message(self._seq, str(chat_id), text, time.time())
+            if self._spool is not None:
+                self._spool_write({"id": m.id, "chat_id": m.chat_id, "text": m.text, "ts": m.ts})
+            self._chats.setdefault(m.chat_id, _ChatState()).pending.append(m)
+            self._depth += 1
+            self._counts["enqueued"] += 1
+            self._cv.notify()
+
+    def stats(self) -> Dict:
+        with self._cv:
+            lat = sorted(self._latency)
+            out = dict(self._counts)
+            out["queue_depth"] = self._depth
+        out["latency_p50_sec"] = round(lat[len(lat) // 2], 3) if lat else None
+        out["latency_max_sec"] = round(lat[-1], 3) if lat else None
+        return out
+
+    def _next_ready(self, now: float) -> Tuple[Optional[str], float]:
+        best_wait = 60.0
+        for chat_id, st in self._chats.items():
+            if not st.pending:
+                continue
+            while st.sent_ts and now - st.sent_ts[0] >= 60.0:
+                st.sent_ts.popleft()
+            ready = max(st.ready_at, st.pending[0].ts + self.coalesce_sec)
+            if len(st.sent_ts) >= self.max_per_minute:
+                ready = max(ready, st.sent_ts[0] + 60.0)
+            if ready <= now:
+                return chat_id, 0.0
+            best_wait = min(best_wait, ready - now)
+        return None, best_wait
+
+    def _take_batch(self, st: _ChatState) -> List[_Message]:
+        batch: List[_Message] = []
+        size = 0
+        for m in st.pending:
+            extra = len(m.text) + 2
+            if batch and size + extra > MAX_MESSAGE_CHARS - 32:
+                break
+            batch.append(m)
+            size += extra
+        return batch
+
+    def _deliver(self, chat_id: str, text: str) -> Tuple[int, Optional[float]]:
+        status, retry_after = self._post(chat_id, text, self.parse_mode)
+        if status == 400 and self.parse_mode:
+            # markup broken by digest concatenation: retry as plain text
+            status, retry_after = self._post(chat_id, text, None)
+        return status, retry_after
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while True:
+                    if self._stop:
+                        return
+                    chat_id, wait = self._next_ready(time.time())
+                    if chat_id is not None:
+                        break
+                    self._cv.wait(wait)
+                st = self._chats[chat_id]
+                batch = self._take_batch(st)
+
+            try:
+                status, retry_after = self._deliver(chat_id, _digest(batch))
+            except Exception as exc:
+                status, retry_after = 0, None
+                logger.warning(f"telegram send error: {exc}")
+
+            now = time.time()
+            with self._cv:
+                if status == 200 or (400 <= status < 500 and status != 429):
+                    # delivered, or a 4xx that will never succeed: remove from the spool
+                    for _ in batch:
+                        st.pending.popleft()
+                    self._depth -= len(batch)
+                    st.backoff = 0.0
+                    st.sent_ts.append(now)
+                    st.ready_at = now + self.min_interval_sec
+                    if status == 200:
+                        self._counts["delivered"] += len(batch)
+                        self._counts["digests"] += 1
+                        self._latency.extend(now - m.ts for m in batch)
+                    else:
+                        self._counts["dropped"] += len(batch)
+                        logger.error(f"telegram send failed (status={status}), dropped {len(batch)}")
+                    if self._depth == 0:
+                        self._spool.seek(0)
+                        self._spool.truncate()
+                        self._spool.flush()
+                    else:
+                        self._spool_write({"ack": [m.id for m in batch]})
+                elif status == 429:
+                    self._counts["rate_limited"] += 1
+                    st.ready_at = now + (retry_after or max(self.min_interval_sec, st.backoff or 1.0))
+                    logger.warning(f"telegram 429: {chat_id} retry in {st.ready_at - now:.1f}s")
+                else:
+                    self._counts["errors"] += 1
+                    st.backoff = min(MAX_BACKOFF_SEC, (st.backoff * 2) or 1.0)
+                    st.ready_at = now + st.backoff
+
+
+_NOTIFIER: Optional[TelegramNotifier] = None
+_NOTIFIER_LOCK = threading.Lock()
+
+
+def get_notifier() -> Optional[TelegramNotifier]:
+    global _NOTIFIER
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token:
+        return None
+    if _NOTIFIER is None:
+        with _NOTIFIER_LOCK:
+            if _NOTIFIER is None:
+                notifier = TelegramNotifier(make_post(token))
+                notifier.start()
+                _NOTIFIER = notifier
+    return _NOTIFIER
+
+
+def send_telegram_message(text: str) -> bool:
+    """Queue a message for delivery. True when queued (delivery is asynchronous)."""
+    chat_id = os.getenv("TELEGRAM_CHAT_ID")
+    notifier = get_notifier()
+    if notifier is None or not chat_id or not text:
+        return False
+    try:
+        notifier.enqueue(chat_id, text)
         return True
     except Exception as exc:
-        logger.warning(f"telegram send error: {exc}")
+        logger.warning(f"telegram enqueue error: {exc}")
         return False
-
@@ -1,8 +1,8 @@
-﻿import json
-from pathlib import Path
+﻿from pathlib import Path
 from typing import Dict
 
 from config.settings import STORAGE_DIR
+from infra.codec import dumps_line
 from infra.logger import logger
 
 SIGNALS_PATH = Path(STORAGE_DIR) / "signals.jsonl"
@@ -13,7 +13,7 @@ def append_signal(payload: Dict) -> None:
     try:
         STORAGE_DIR.mkdir(parents=True, exist_ok=True)
         with open(SIGNALS_PATH, "a", encoding="utf-8") as f:
-            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+            f.write(dumps_line(payload))
     except Exception as exc:
         logger.error(f"signals.jsonl append failed: {exc}")
 
@@ -22,7 +22,7 @@ def append_event(payload: Dict) -> None:
     try:
         STORAGE_DIR.mkdir(parents=True, exist_ok=True)
         with open(EVENTS_PATH, "a", encoding="utf-8") as f:
-            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+            f.write(dumps_line(payload))
     except Exception as exc:
         logger.error(f"events.jsonl append failed: {exc}")
 
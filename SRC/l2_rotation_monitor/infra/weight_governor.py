@@ -0,0 +1,108 @@
+﻿import os
+import threading
+import time
+from typing import Dict, Mapping, Optional
+
+from infra.logger import logger
+
+WEIGHT_LIMIT_1M = 6000
+WEIGHT_WINDOW_SEC = 60
+# The monitor shares the IP weight budget with the trading bot; stay well below the limit.
+WEIGHT_SHARE = float(os.getenv("L2_WEIGHT_SHARE", "0.3"))
+BAN_DEFAULT_SEC = {429: 60, 418: 120}
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Retry-After in seconds; None for non-numeric values (HTTP-date etc.) so the default ban applies."""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds >= 0 else None
+
+
+def kline_weight(limit: int) -> int:
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class WeightGovernor:
+    """Per-minute request-weight budget fed by X-MBX-USED-WEIGHT-1M and 429/418 responses."""
+
+    def __init__(self, limit: int = WEIGHT_LIMIT_1M, share: float = WEIGHT_SHARE, window_sec: int = WEIGHT_WINDOW_SEC):
+        self.limit = limit
+        self.cap = limit * share
+        self.window_sec = window_sec
+        self._lock = threading.Lock()
+        self._window = 0
+        self._used = 0
+        self._ban_until = 0.0
+        self.stats = {"granted": 0, "deferred": 0, "bans": 0, "last_used_header": None}
+
+    def _roll(self, now: float) -> None:
+        window = int(now // self.window_sec)
+        if window != self._window:
+            self._window = window
+            self._used = 0
+
+    def try_acquire(self, weight: int, now: Optional[float] = None) -> float:
+        """Reserve weight and return 0, or return the seconds to wait without reserving."""
+        now = now or time.time()
+        with self._lock:
+            self._roll(now)
+            if now < self._ban_until:
+                self.stats["deferred"] += 1
+                return self._ban_until - now
+            if self._used and self._used + weight > self.cap:
+                self.stats["deferred"] += 1
+                return (self._window + 1) * self.window_sec - now
+            self._used += weight
+            self.stats["granted"] += 1
+            return 0.0
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> float:
+        """Update usage from response headers. Returns the ban length in seconds for 429/418, else 0."""
+        now = time.time()
+        used = None
+        retry_after = None
+        for key, value in (headers or {}).items():
+            k = key.lower()
+            if k == "x-mbx-used-weight-1m":
+                try:
+                    used = int(value)
+                except (TypeError, ValueError):
+                    pass
+            elif k == "retry-after":
+                retry_after = parse_retry_after(value)
+        with self._lock:
+            self._roll(now)
+            if used is not None:
+                self.stats["last_used_header"] = used
+                self._used = max(self._used, used)
+            if status_code not in BAN_DEFAULT_SEC:
+                return 0.0
+            wait = retry_after if retry_after is not None else BAN_DEFAULT_SEC[status_code]
+            self._ban_until = max(self._ban_until, now + wait)
+            self.stats["bans"] += 1
+        logger.warning(f"binance weight limit response {status_code}: pausing REST for {wait}s")
+        return float(wait)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._roll(time.time())
+            return {"used": self._used, "cap": int(self.cap), **self.stats}
+
+
+_GOVERNOR: Optional[WeightGovernor] = None
+
+
+def get_governor() -> WeightGovernor:
+    global _GOVERNOR
+    if _GOVERNOR is None:
+        _GOVERNOR = WeightGovernor()
+    return _GOVERNOR
@@ -24,13 +24,14 @@ from config.settings import (
 from core.gates import btc_gate
 from core.scoring import compute_metrics
 from core.signal_engine import make_signal_key, select_lags, select_leader
-from exchange.binance import fetch_klines
+from exchange.candle_store import get_store
 from infra.counters import increment_counter
 from infra.fetch_tracker import FetchTracker
 from infra.logger import logger, setup_logging
-from infra.notifier import send_telegram_message
+from infra.notifier import get_notifier, send_telegram_message
 from infra.rate_limiter import RateLimiter
 from infra.storage import append_event, append_signal
+from infra.weight_governor import get_governor
 
 
 def build_symbol_pairs() -> Dict[str, str]:
@@ -90,7 +91,7 @@ def run_cycle(
     missing_symbols = []
     for symbol, pair in symbol_pairs.items():
         key = f"klines:{pair}:{TIMEFRAME}"
-        candles = fetch_klines(pair, TIMEFRAME, CANDLE_LIMIT)
+        candles = get_store().get_candles(pair, TIMEFRAME, CANDLE_LIMIT)
         if not candles:
             should_emit, event = fetch_tracker.on_fail(key, symbol_pair=pair, reason="empty_candles")
             if should_emit and event:
@@ -202,7 +203,7 @@ def run_cycle(
 
     text = format_signal_text(leader, lags, btc_ret_15, metrics_by_symbol)
     if send_telegram_message(text):
-        logger.info("telegram sent")
+        logger.info("telegram queued")
     logger.info(f"signal saved: {text}")
 
 
@@ -224,6 +225,7 @@ def main() -> None:
             now = time.time()
             if HEARTBEAT_INTERVAL_SEC > 0 and now - last_heartbeat_ts >= HEARTBEAT_INTERVAL_SEC:
                 success_age_sec = int(now - last_success_ts) if last_success_ts else None
+                notifier = get_notifier()
                 append_event(
                     {
                         "ts": int(now),
@@ -234,12 +236,14 @@ def main() -> None:
                         "last_success_candle_open_time": last_success_candle_open_time,
                         "last_success_symbol": last_success_symbol,
                         "success_age_sec": success_age_sec,
+                        "telegram": notifier.stats() if notifier else None,
+                        "rest_weight": get_governor().snapshot(),
                     }
                 )
                 last_heartbeat_ts = now
 
             btc_key = f"klines:{BTC_PAIR}:{TIMEFRAME}"
-            btc_candles = fetch_klines(BTC_PAIR, TIMEFRAME, CANDLE_LIMIT)
+            btc_candles = get_store().get_candles(BTC_PAIR, TIMEFRAME, CANDLE_LIMIT)
             if not btc_candles:
                 should_emit, event = fetch_tracker.on_fail(btc_key, symbol_pair=BTC_PAIR, reason="empty_btc_candles")
                 if should_emit and event: